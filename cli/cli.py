@@ -1,10 +1,45 @@
 import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from config.constants import Bridge
+from config.constants import (
+    CHUNKING_MODES,
+    DEFAULT_CHUNKING_MODE,
+    DEFAULT_DECODE_WORKERS,
+    DEFAULT_EXTRACTION_ENGINE,
+    DEFAULT_LOG_FILTER_MODE,
+    DEFAULT_TRANSACTION_FETCH_STRATEGY,
+    EXTRACTION_ENGINES,
+    FOLLOW_GENERATE_SECONDS,
+    FOLLOW_POLL_SECONDS,
+    LOG_FILTER_MODES,
+    MAX_NUM_THREADS_EXTRACTOR,
+    MAX_NUM_THREADS_TOTAL,
+    MAX_PARALLEL_BLOCKCHAINS,
+    TRANSACTION_FETCH_STRATEGIES,
+    WORK_QUEUE_CHUNK_SIZE,
+    WORK_QUEUE_MAX_ATTEMPTS,
+    Bridge,
+)
+from extractor.abi_bundle import AbiBundle
+from extractor.async_evm_extractor import AsyncEvmExtractor
+from extractor.checkpoints import Checkpoints
+from extractor.decoder import BridgeDecoder
 from extractor.evm_extractor import EvmExtractor
+from extractor.follower import ChainFollower
+from extractor.pipeline_evm_extractor import PipelineEvmExtractor
 from extractor.solana_extractor import SolanaExtractor
+from extractor.work_queue import QueueWorker, WorkQueue
 from generator.generator import Generator
-from repository.database import create_tables
+from repository.common.repository import (
+    ExtractionCheckpointRepository,
+    ExtractionTaskRepository,
+)
+from repository.database import DBSession, create_tables
 from rpcs import generate_rpc_configs
 from utils.utils import (
     CliColor,
@@ -12,53 +47,360 @@ from utils.utils import (
     build_log_message_2,
     get_block_by_timestamp,
     get_enum_instance,
+    load_abi_bundle_dir,
     load_module,
     log_to_cli,
 )
 
+# extractor of EVM blockchains of each extraction engine
+EVM_EXTRACTORS = {
+    "threads": EvmExtractor,
+    "async": AsyncEvmExtractor,
+    "pipeline": PipelineEvmExtractor,
+}
+
 
 class Cli:
     CLASS_NAME = "Cli"
 
     def extract_data(args):
+        """
+        Extracts the data of the bridge in each blockchain. Up to `parallel_blockchains`
+        blockchains are extracted at once, sharing a budget of MAX_NUM_THREADS_TOTAL worker
+        threads, and the post-processing runs once all blockchains are done.
+        """
         blockchains = args.blockchains
 
         bridge = get_enum_instance(Bridge, args.bridge)
 
         Cli.load_db_models(bridge)
 
-        for idx, blockchain in enumerate(blockchains):
-            generate_rpc_configs(blockchain)
+        generate_rpc_configs(blockchains)
 
+        parallel_blockchains = max(
+            1,
+            min(getattr(args, "parallel_blockchains", MAX_PARALLEL_BLOCKCHAINS), len(blockchains)),
+        )
+        max_threads = max(1, MAX_NUM_THREADS_TOTAL // parallel_blockchains)
+
+        def extract_blockchain(idx: int, blockchain: str):
             if blockchain == "solana":
-                solana_ranges = {}
-                for item in args.solana_range:
-                    program, start_sig, end_sig = item.split(":")
-                    solana_ranges[program] = {
-                        "start_signature": start_sig,
-                        "end_signature": end_sig,
-                    }
-
-                Cli.extract_solana_data(
+                return Cli.extract_solana_data(
                     idx,
                     bridge,
                     blockchain,
-                    solana_ranges,
+                    Cli.parse_solana_ranges(args.solana_range),
                     blockchains,
                 )
+
+            start_block = get_block_by_timestamp(args.start_ts, blockchain, bridge)
+            end_block = get_block_by_timestamp(args.end_ts, blockchain, bridge)
+            return Cli.extract_evm_data(
+                idx,
+                bridge,
+                blockchain,
+                start_block,
+                end_block,
+                blockchains,
+                getattr(args, "fetch_strategy", DEFAULT_TRANSACTION_FETCH_STRATEGY),
+                getattr(args, "engine", DEFAULT_EXTRACTION_ENGINE),
+                getattr(args, "log_filter", DEFAULT_LOG_FILTER_MODE),
+                max_threads,
+                getattr(args, "resume", False),
+                getattr(args, "chunking", DEFAULT_CHUNKING_MODE),
+                getattr(args, "decode_workers", DEFAULT_DECODE_WORKERS),
+            )
+
+        extractors = []
+        with ThreadPoolExecutor(
+            max_workers=parallel_blockchains, thread_name_prefix="blockchain"
+        ) as executor:
+            futures = {
+                executor.submit(extract_blockchain, idx, blockchain): blockchain
+                for idx, blockchain in enumerate(blockchains)
+            }
+
+            for future in as_completed(futures):
+                try:
+                    extractors.append(future.result())
+                except Exception as e:
+                    log_to_cli(
+                        f"{bridge.value} - Extraction of {futures[future]} failed: {e}",
+                        CliColor.ERROR,
+                    )
+
+        evm_extractors = [
+            extractor for extractor in extractors if isinstance(extractor, EvmExtractor)
+        ]
+        if evm_extractors:
+            evm_extractors[-1].post_processing()
+
+    def retry_failed(args):
+        """
+        Extracts again the block ranges of the bridge that failed in previous runs (and were not
+        completed since), in each blockchain with failed ranges or in the given blockchains.
+        """
+        bridge = get_enum_instance(Bridge, args.bridge)
+
+        Cli.load_db_models(bridge)
+
+        blockchains = args.blockchains
+        if not blockchains:
+            blockchains = ExtractionCheckpointRepository(DBSession).get_blockchains_with_status(
+                bridge.value, Checkpoints.FAILED
+            )
+
+        blockchains = [blockchain for blockchain in blockchains if blockchain != "solana"]
+        if not blockchains:
+            log_to_cli(f"{bridge.value} - No failed block ranges to retry.", CliColor.SUCCESS)
+            return
+
+        generate_rpc_configs(blockchains)
+
+        for blockchain in blockchains:
+            tasks = Checkpoints(bridge, blockchain).failed_ranges()
+
+            log_to_cli(
+                f"{bridge.value} - Retrying {len(tasks)} failed block ranges of {blockchain}..."
+            )
+
+            try:
+                extractor = EvmExtractor(bridge, blockchain, blockchains, args.fetch_strategy)
+                extractor.extract_ranges(tasks)
+            except Exception as e:
+                log_to_cli(
+                    f"{bridge.value} - Retry of {blockchain} failed: {e}",
+                    CliColor.ERROR,
+                )
+
+    def enqueue(args):
+        """
+        Adds the block ranges of the bridge in each (EVM) blockchain to the work queue in the
+        database, to be extracted by `worker` processes on any machine using the same database.
+        """
+        bridge = get_enum_instance(Bridge, args.bridge)
+
+        Cli.load_db_models(bridge)
+
+        blockchains = [blockchain for blockchain in args.blockchains if blockchain != "solana"]
+
+        generate_rpc_configs(blockchains)
+
+        work_queue = WorkQueue(bridge)
+
+        for blockchain in blockchains:
+            start_block = get_block_by_timestamp(args.start_ts, blockchain, bridge)
+            end_block = get_block_by_timestamp(args.end_ts, blockchain, bridge)
+
+            extractor = EvmExtractor(
+                bridge, blockchain, blockchains, log_filter_mode=args.log_filter
+            )
+            log_filters = extractor.build_log_filters(
+                extractor.handler.get_bridge_contracts_and_topics(bridge, blockchain)
+            )
+
+            added = work_queue.enqueue(
+                blockchain, log_filters, start_block, end_block, args.chunk_size
+            )
+
+            log_to_cli(
+                build_log_message_2(
+                    start_block,
+                    end_block,
+                    bridge,
+                    blockchain,
+                    f"Added {added} block ranges to the work queue.",
+                ),
+                CliColor.SUCCESS,
+            )
+
+    def worker(args):
+        """
+        Extracts the block ranges of the work queue of the bridge with `processes` local worker
+        processes, until the queue is empty, and then runs the post-processing.
+        """
+        bridge = get_enum_instance(Bridge, args.bridge)
+
+        Cli.load_db_models(bridge)
+
+        repository = ExtractionTaskRepository(DBSession)
+        blockchains = repository.get_blockchains(bridge.value)
+
+        generate_rpc_configs(blockchains)
+
+        owner = f"{socket.gethostname()}:{os.getpid()}"
+
+        if args.processes <= 1:
+            Cli.run_queue_worker(
+                bridge.value, owner, args.threads, args.fetch_strategy, args.blockchains
+            )
+        else:
+            # spawned processes open their own database connections
+            context = multiprocessing.get_context("spawn")
+            processes = [
+                context.Process(
+                    target=Cli.run_queue_worker,
+                    args=(
+                        bridge.value,
+                        f"{owner}:{idx}",
+                        args.threads,
+                        args.fetch_strategy,
+                        args.blockchains,
+                    ),
+                    name=f"queue_worker_{idx}",
+                )
+                for idx in range(args.processes)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+
+        log_to_cli(f"{bridge.value} - Work queue -- {repository.count_by_status(bridge.value)}")
+
+        if blockchains and not repository.has_active_tasks(bridge.value, WORK_QUEUE_MAX_ATTEMPTS):
+            EvmExtractor(bridge, blockchains[0], blockchains).post_processing()
+
+    def run_queue_worker(
+        bridge_name: str, owner: str, threads: int, fetch_strategy: str, blockchains: list
+    ):
+        bridge = get_enum_instance(Bridge, bridge_name)
+
+        Cli.load_db_models(bridge)
+
+        QueueWorker(bridge, owner, threads, fetch_strategy, blockchains).run()
+
+    def follow(args):
+        """
+        Keeps the extraction of the bridge in each (EVM) blockchain up to date, a number of
+        confirmations behind its latest block, and generates the cross-chain transactions every
+        `generate_interval` seconds when new events were extracted. Runs until interrupted.
+        """
+        bridge = get_enum_instance(Bridge, args.bridge)
+
+        Cli.load_db_models(bridge)
+
+        blockchains = [blockchain for blockchain in args.blockchains if blockchain != "solana"]
+
+        generate_rpc_configs(blockchains)
+
+        max_threads = max(1, MAX_NUM_THREADS_TOTAL // max(1, len(blockchains)))
+
+        followers = []
+        for blockchain in blockchains:
+            # only used the first time the blockchain is followed
+            start_block = None
+            if args.start_ts is not None:
+                start_block = get_block_by_timestamp(args.start_ts, blockchain, bridge)
+
+            extractor = EvmExtractor(
+                bridge,
+                blockchain,
+                args.blockchains,
+                args.fetch_strategy,
+                args.log_filter,
+                max_threads,
+                chunking=args.chunking,
+                decode_workers=args.decode_workers,
+            )
+            followers.append(ChainFollower(extractor, args.confirmations, start_block))
+
+        stop = threading.Event()
+        threads = [
+            threading.Thread(
+                target=follower.run, args=(stop,), name=f"follow_{follower.blockchain}"
+            )
+            for follower in followers
+        ]
+        for thread in threads:
+            thread.start()
+
+        generate_interval = args.generate_interval
+        generated_changes = 0
+
+        try:
+            while not stop.wait(
+                generate_interval if generate_interval > 0 else FOLLOW_POLL_SECONDS
+            ):
+                changes = sum(
+                    follower.extractor.metrics.get("events") + follower.metrics.get("reorgs")
+                    for follower in followers
+                )
+                if generate_interval <= 0 or changes == generated_changes:
+                    continue
+
+                generated_changes = changes
+                followers[0].extractor.post_processing()
+                Generator(bridge).generate_data()
+        except KeyboardInterrupt:
+            log_to_cli(f"{bridge.value} - Stopping, waiting for the current ranges to finish...")
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def parse_solana_ranges(solana_range: list) -> dict:
+        solana_ranges = {}
+        for item in solana_range:
+            program, start_sig, end_sig = item.split(":")
+            solana_ranges[program] = {
+                "start_signature": start_sig,
+                "end_signature": end_sig,
+            }
+        return solana_ranges
+
+    def benchmark(args):
+        """
+        Extracts a fixed block range with the existing RPC configuration (e.g. written by
+        rpcs/mock_rpc_node.py to replay recorded calls), and reports the extracted events/sec.
+        """
+        bridge = get_enum_instance(Bridge, args.bridge)
+
+        Cli.load_db_models(bridge)
+
+        for blockchain in args.blockchains:
+            if blockchain == "solana":
+                extractor = SolanaExtractor(bridge, blockchain, args.blockchains)
+                start_time = time.time()
+                extractor.extract_data(Cli.parse_solana_ranges(args.solana_range))
             else:
-                start_block = get_block_by_timestamp(args.start_ts, blockchain)
-                end_block = get_block_by_timestamp(args.end_ts, blockchain)
-                Cli.extract_evm_data(
-                    idx,
+                extractor_class = EVM_EXTRACTORS[args.engine]
+                extractor = extractor_class(
                     bridge,
                     blockchain,
-                    start_block,
-                    end_block,
-                    blockchains,
+                    args.blockchains,
+                    args.fetch_strategy,
+                    args.log_filter,
+                    chunking=args.chunking,
+                    decode_workers=args.decode_workers,
                 )
+                start_time = time.time()
+                extractor.extract_data(args.start_block, args.end_block)
+
+            elapsed = time.time() - start_time
+            events = extractor.metrics.get("events")
+
+            log_to_cli(
+                f"[{bridge.value}] [{blockchain}] Benchmark: {events} events extracted in "
+                f"{elapsed:.2f} seconds ({events / max(elapsed, 1e-9):.1f} events/sec).",
+                CliColor.SUCCESS,
+            )
 
-    def extract_evm_data(idx, bridge, blockchain, start_block, end_block, blockchains):
+    def extract_evm_data(
+        idx,
+        bridge,
+        blockchain,
+        start_block,
+        end_block,
+        blockchains,
+        fetch_strategy=DEFAULT_TRANSACTION_FETCH_STRATEGY,
+        engine=DEFAULT_EXTRACTION_ENGINE,
+        log_filter=DEFAULT_LOG_FILTER_MODE,
+        max_threads=None,
+        resume=False,
+        chunking=DEFAULT_CHUNKING_MODE,
+        decode_workers=DEFAULT_DECODE_WORKERS,
+    ) -> EvmExtractor | None:
         log_to_cli(
             build_log_message_2(
                 start_block,
@@ -79,10 +421,18 @@ class Cli:
                     "Loading contracts and ABIs...",
                 )
             )
-            extractor = EvmExtractor(bridge, blockchain, blockchains)
-
-            if idx == len(blockchains) - 1:
-                extractor.post_processing()
+            extractor_class = EVM_EXTRACTORS[engine]
+            extractor = extractor_class(
+                bridge,
+                blockchain,
+                blockchains,
+                fetch_strategy,
+                log_filter,
+                max_threads,
+                resume,
+                chunking,
+                decode_workers,
+            )
 
         except Exception as e:
             log_to_cli(
@@ -95,18 +445,24 @@ class Cli:
                 ),
                 CliColor.ERROR,
             )
-            return
+            return None
 
         extractor.extract_data(
             start_block,
             end_block,
         )
 
-    def extract_solana_data(idx, bridge, blockchain, signature_ranges, blockchains):
+        return extractor
+
+    def extract_solana_data(
+        idx, bridge, blockchain, signature_ranges, blockchains
+    ) -> SolanaExtractor:
         extractor = SolanaExtractor(bridge, blockchain, blockchains)
 
         extractor.extract_data(signature_ranges)
 
+        return extractor
+
     def generate_data(args):
         bridge = get_enum_instance(Bridge, args.bridge)
 
@@ -116,6 +472,28 @@ class Cli:
 
         generator.generate_data()
 
+    def build_abi_bundle(args):
+        """
+        Precompiles the event layouts of the ABIs of the bridge into its ABI bundle in
+        ABI_BUNDLE_DIR, so that its decoders do not parse the ABIs. Replaces the previous bundle.
+        """
+        func_name = "build_abi_bundle"
+        bridge = get_enum_instance(Bridge, args.bridge)
+
+        bundle_dir = load_abi_bundle_dir()
+        if not bundle_dir:
+            raise CustomException(Cli.CLASS_NAME, func_name, "ABI_BUNDLE_DIR is not set.")
+
+        abi_bundle = AbiBundle(bridge, bundle_dir, load=False)
+        BridgeDecoder(bridge).build_abi_bundle(abi_bundle)
+        abi_bundle.save()
+
+        log_to_cli(
+            f"{bridge.value} - ABI bundle of {len(abi_bundle)} ABI files written to "
+            f"{abi_bundle.bundle_file}.",
+            CliColor.SUCCESS,
+        )
+
     def cli():
         parser = argparse.ArgumentParser(description="Cross-chain Data Extraction Tool")
         subparsers = parser.add_subparsers(
@@ -154,6 +532,74 @@ class Cli:
             help="List of blockchains to extract data from",
         )
 
+        extract_parser.add_argument(
+            "--fetch_strategy",
+            choices=TRANSACTION_FETCH_STRATEGIES,
+            default=DEFAULT_TRANSACTION_FETCH_STRATEGY,
+            help=(
+                "How transaction receipts are fetched: one call per transaction, one "
+                "eth_getBlockReceipts call per block, or per block only for dense blocks (auto)"
+            ),
+        )
+
+        extract_parser.add_argument(
+            "--engine",
+            choices=EXTRACTION_ENGINES,
+            default=DEFAULT_EXTRACTION_ENGINE,
+            help=(
+                "How block ranges of EVM blockchains are processed: by worker threads, as "
+                "asyncio tasks on a single event loop (async), or streamed through stages "
+                "connected by bounded queues (pipeline)"
+            ),
+        )
+
+        extract_parser.add_argument(
+            "--log_filter",
+            choices=LOG_FILTER_MODES,
+            default=DEFAULT_LOG_FILTER_MODE,
+            help=(
+                "How eth_getLogs requests are built: one per contract, or grouping the contracts "
+                "of the bridge on each blockchain in address arrays (grouped)"
+            ),
+        )
+
+        extract_parser.add_argument(
+            "--parallel_blockchains",
+            type=int,
+            default=MAX_PARALLEL_BLOCKCHAINS,
+            help="Number of blockchains extracted at the same time",
+        )
+
+        extract_parser.add_argument(
+            "--chunking",
+            choices=CHUNKING_MODES,
+            default=DEFAULT_CHUNKING_MODE,
+            help=(
+                "How block ranges are sized by the threads engine: all of the same size (static), "
+                "or from the log density of previous runs and of the ranges already fetched "
+                "(adaptive)"
+            ),
+        )
+
+        extract_parser.add_argument(
+            "--decode_workers",
+            type=int,
+            default=DEFAULT_DECODE_WORKERS,
+            help=(
+                "Number of worker processes decoding the logs of EVM blockchains (0 to decode "
+                "them in the extraction threads)"
+            ),
+        )
+
+        extract_parser.add_argument(
+            "--resume",
+            action="store_true",
+            help=(
+                "Only extract the block ranges of EVM blockchains that were not completed by "
+                "previous runs with the same log filter mode"
+            ),
+        )
+
         # Custom argument group for Solana-specific arguments
         solana_group = extract_parser.add_argument_group(
             "Solana-specific arguments", "Required if 'solana' is included in --blockchains"
@@ -182,6 +628,203 @@ class Cli:
 
         extract_parser.set_defaults(func=Cli.extract_data)
 
+        # Benchmark action
+        benchmark_parser = subparsers.add_parser(
+            "benchmark",
+            help=(
+                "Measure the extraction throughput of a block range with the current RPC "
+                "configuration, e.g. against the mock RPC node"
+            ),
+        )
+        benchmark_parser.add_argument(
+            "--bridge",
+            choices=[bridge.value for bridge in Bridge],
+            required=True,
+            help="Name of the bridge to analyze",
+        )
+        benchmark_parser.add_argument(
+            "--blockchains", nargs="+", required=True, help="Blockchains to extract data from"
+        )
+        benchmark_parser.add_argument("--start_block", type=int, help="First block (EVM)")
+        benchmark_parser.add_argument("--end_block", type=int, help="Last block (EVM)")
+        benchmark_parser.add_argument(
+            "--solana-range",
+            nargs="+",
+            help="List of solana ranges in the format program:start_signature:end_signature",
+        )
+        benchmark_parser.add_argument(
+            "--fetch_strategy",
+            choices=TRANSACTION_FETCH_STRATEGIES,
+            default=DEFAULT_TRANSACTION_FETCH_STRATEGY,
+        )
+        benchmark_parser.add_argument(
+            "--engine", choices=EXTRACTION_ENGINES, default=DEFAULT_EXTRACTION_ENGINE
+        )
+        benchmark_parser.add_argument(
+            "--log_filter", choices=LOG_FILTER_MODES, default=DEFAULT_LOG_FILTER_MODE
+        )
+        benchmark_parser.add_argument(
+            "--chunking", choices=CHUNKING_MODES, default=DEFAULT_CHUNKING_MODE
+        )
+        benchmark_parser.add_argument(
+            "--decode_workers",
+            type=int,
+            default=DEFAULT_DECODE_WORKERS,
+            help=(
+                "Number of worker processes decoding the logs of EVM blockchains (0 to decode "
+                "them in the extraction threads)"
+            ),
+        )
+        benchmark_parser.set_defaults(func=Cli.benchmark)
+
+        # Retry failed action
+        retry_parser = subparsers.add_parser(
+            "retry-failed", help="Extract again the block ranges that failed in previous runs"
+        )
+        retry_parser.add_argument(
+            "--bridge",
+            choices=[bridge.value for bridge in Bridge],
+            required=True,
+            help="Name of the bridge",
+        )
+        retry_parser.add_argument(
+            "--blockchains",
+            nargs="+",
+            help="Blockchains to retry (all the blockchains with failed block ranges by default)",
+        )
+        retry_parser.add_argument(
+            "--fetch_strategy",
+            choices=TRANSACTION_FETCH_STRATEGIES,
+            default=DEFAULT_TRANSACTION_FETCH_STRATEGY,
+        )
+        retry_parser.set_defaults(func=Cli.retry_failed)
+
+        # Follow action
+        follow_parser = subparsers.add_parser(
+            "follow",
+            help="Keep extracting the new blocks of each blockchain, a number of blocks behind",
+        )
+        follow_parser.add_argument(
+            "--bridge",
+            choices=[bridge.value for bridge in Bridge],
+            required=True,
+            help="Name of the bridge to analyze",
+        )
+        follow_parser.add_argument(
+            "--blockchains",
+            nargs="+",
+            required=True,
+            help="List of (EVM) blockchains to follow",
+        )
+        follow_parser.add_argument(
+            "--start_ts",
+            help=(
+                "Timestamp to start from, for blockchains that were never followed (their "
+                "confirmed head by default)"
+            ),
+        )
+        follow_parser.add_argument(
+            "--confirmations",
+            type=int,
+            help=(
+                "Number of blocks to stay behind the latest block of each blockchain "
+                "(RPC_CACHE_FINALITY_BLOCKS of the blockchain by default)"
+            ),
+        )
+        follow_parser.add_argument(
+            "--generate_interval",
+            type=int,
+            default=FOLLOW_GENERATE_SECONDS,
+            help=(
+                "Seconds between generations of the cross-chain transactions, when new events "
+                "were extracted (0 to disable)"
+            ),
+        )
+        follow_parser.add_argument(
+            "--fetch_strategy",
+            choices=TRANSACTION_FETCH_STRATEGIES,
+            default=DEFAULT_TRANSACTION_FETCH_STRATEGY,
+        )
+        follow_parser.add_argument(
+            "--log_filter", choices=LOG_FILTER_MODES, default=DEFAULT_LOG_FILTER_MODE
+        )
+        follow_parser.add_argument(
+            "--chunking", choices=CHUNKING_MODES, default=DEFAULT_CHUNKING_MODE
+        )
+        follow_parser.add_argument(
+            "--decode_workers",
+            type=int,
+            default=DEFAULT_DECODE_WORKERS,
+            help=(
+                "Number of worker processes decoding the logs of EVM blockchains (0 to decode "
+                "them in the extraction threads)"
+            ),
+        )
+        follow_parser.set_defaults(func=Cli.follow)
+
+        # Enqueue action
+        enqueue_parser = subparsers.add_parser(
+            "enqueue",
+            help="Add the block ranges of an extraction to the work queue shared by workers",
+        )
+        enqueue_parser.add_argument(
+            "--bridge",
+            choices=[bridge.value for bridge in Bridge],
+            required=True,
+            help="Name of the bridge to analyze",
+        )
+        enqueue_parser.add_argument(
+            "--start_ts", required=True, help="Start timestamp for extraction"
+        )
+        enqueue_parser.add_argument("--end_ts", required=True, help="End timestamp for extraction")
+        enqueue_parser.add_argument(
+            "--blockchains",
+            nargs="+",
+            required=True,
+            help="List of (EVM) blockchains to extract data from",
+        )
+        enqueue_parser.add_argument(
+            "--log_filter", choices=LOG_FILTER_MODES, default=DEFAULT_LOG_FILTER_MODE
+        )
+        enqueue_parser.add_argument(
+            "--chunk_size",
+            type=int,
+            default=WORK_QUEUE_CHUNK_SIZE,
+            help="Number of blocks of each block range",
+        )
+        enqueue_parser.set_defaults(func=Cli.enqueue)
+
+        # Worker action
+        worker_parser = subparsers.add_parser(
+            "worker", help="Extract the block ranges of the work queue until it is empty"
+        )
+        worker_parser.add_argument(
+            "--bridge",
+            choices=[bridge.value for bridge in Bridge],
+            required=True,
+            help="Name of the bridge",
+        )
+        worker_parser.add_argument(
+            "--blockchains",
+            nargs="+",
+            help="Only extract the block ranges of these blockchains (all by default)",
+        )
+        worker_parser.add_argument(
+            "--processes", type=int, default=1, help="Number of local worker processes"
+        )
+        worker_parser.add_argument(
+            "--threads",
+            type=int,
+            default=MAX_NUM_THREADS_EXTRACTOR,
+            help="Number of threads of each worker process",
+        )
+        worker_parser.add_argument(
+            "--fetch_strategy",
+            choices=TRANSACTION_FETCH_STRATEGIES,
+            default=DEFAULT_TRANSACTION_FETCH_STRATEGY,
+        )
+        worker_parser.set_defaults(func=Cli.worker)
+
         # Generate action
         generate_parser = subparsers.add_parser(
             "generate", help="Generate cross-chain transactions"
@@ -194,6 +837,19 @@ class Cli:
         )
         generate_parser.set_defaults(func=Cli.generate_data)
 
+        # Build ABI bundle action
+        bundle_parser = subparsers.add_parser(
+            "build-abi-bundle",
+            help="Precompile the event layouts of the ABIs of a bridge, for a faster startup",
+        )
+        bundle_parser.add_argument(
+            "--bridge",
+            choices=[bridge.value for bridge in Bridge],
+            required=True,
+            help="Name of the bridge",
+        )
+        bundle_parser.set_defaults(func=Cli.build_abi_bundle)
+
         args = parser.parse_args()
         if args.action:
             args.func(args)
@@ -212,4 +868,4 @@ class Cli:
         except Exception as e:
             raise CustomException(
                 Cli.CLASS_NAME, func_name, f"Bridge {bridge_name} not supported"
-            ) from e
\ No newline at end of file
+            ) from e
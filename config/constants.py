@@ -75,7 +75,7 @@ BLOCKCHAIN_IDS = {
         "name": "ronin",
         "native_token": "AXS",
     },
-    "5eykt4UsFv8P8NJdTREpY1vzqKqZKvdpKuc147dw2N9d": { # genesis hash for Solana
+    "5eykt4UsFv8P8NJdTREpY1vzqKqZKvdpKuc147dw2N9d": {  # genesis hash for Solana
         "name": "solana",
         "native_token": "SOL",
     },
@@ -131,3 +131,232 @@ BRIDGE_NEEDS_TRANSACTION_BY_HASH_RPC_METHOD = {
 RPCS_CONFIG_FILE = "config/rpcs_config.yaml"
 
 MAX_NUM_THREADS_EXTRACTOR = 10
+
+# Blockchains are extracted concurrently (up to MAX_PARALLEL_BLOCKCHAINS at once), sharing a budget
+# of MAX_NUM_THREADS_TOTAL worker threads, which matches the size of the database connection pool
+MAX_PARALLEL_BLOCKCHAINS = 4
+MAX_NUM_THREADS_TOTAL = 30
+
+# Default maximum number of calls packed in a single JSON-RPC batch request. It can be overridden
+# per blockchain (`max_batch_size`) or per endpoint (`endpoint_settings`) in the RPC config file.
+MAX_RPC_BATCH_SIZE = 50
+
+# HTTP connections to each RPC endpoint are pooled and kept alive. The pool is sized to the maximum
+# number of extractor threads (twice the number of threads per blockchain) sending requests to it.
+HTTP_POOL_SIZE = MAX_NUM_THREADS_EXTRACTOR * 2
+
+# Timeouts (in seconds) of the requests to RPC endpoints. The read timeout of single calls and
+# batches can be overridden per blockchain (`timeout`) or per endpoint (`endpoint_settings`) in the
+# RPC config file.
+RPC_CONNECT_TIMEOUT = 5
+RPC_READ_TIMEOUT = 10
+RPC_BATCH_READ_TIMEOUT = 30
+
+# Requests sent to each RPC endpoint are paced by a token bucket shared by all extractor threads:
+# up to RPC_BURST requests at once, refilled at RPC_REQUESTS_PER_SECOND. Both can be overridden per
+# blockchain (`requests_per_second`, `burst`) or per endpoint (`endpoint_settings`) in the RPC
+# config file. Endpoints that rate limit us are paused for the time given in their Retry-After
+# header or error message (RATE_LIMIT_DEFAULT_PAUSE seconds if missing, up to RATE_LIMIT_MAX_PAUSE).
+RPC_REQUESTS_PER_SECOND = 25
+RPC_BURST = 50
+RATE_LIMIT_DEFAULT_PAUSE = 1
+RATE_LIMIT_MAX_PAUSE = 60
+
+# Fragments (in lowercase) of the error messages returned by RPC providers when rate limiting us
+RATE_LIMIT_ERRORS = [
+    "rate limit",
+    "too many requests",
+    "exceeded its compute units",
+    "request limit",
+]
+
+# Endpoint selection: weight of the latest request in the EWMA latency and error rate of each
+# endpoint, number of consecutive failures after which an endpoint is ejected, and initial and
+# maximum ejection periods (in seconds). The ejection period doubles on each consecutive ejection.
+ENDPOINT_EWMA_ALPHA = 0.2
+ENDPOINT_FAILURE_THRESHOLD = 3
+ENDPOINT_EJECTION_SECONDS = 5
+ENDPOINT_MAX_EJECTION_SECONDS = 300
+
+# RPC methods whose responses are cached on disk (when RPC_CACHE_DIR is set), as their results never
+# change once their block is final. A block is considered final once it is at least
+# RPC_CACHE_FINALITY_BLOCKS[blockchain] blocks behind the latest block, which is refreshed every
+# RPC_CACHE_HEAD_REFRESH_SECONDS.
+RPC_CACHE_METHODS = [
+    "eth_getLogs",
+    "eth_getTransactionReceipt",
+    "eth_getTransactionByHash",
+    "eth_getBlockByNumber",
+    "eth_getBlockReceipts",
+    "trace_transaction",
+]
+RPC_CACHE_FINALITY_BLOCKS = {
+    "ethereum": 64,
+    "arbitrum": 2_400,
+    "optimism": 1_800,
+    "base": 1_800,
+    "polygon": 256,
+    "bnb": 30,
+    "avalanche": 10,
+    "gnosis": 20,
+    "scroll": 1_800,
+    "linea": 3_600,
+    "ronin": 30,
+}
+RPC_CACHE_DEFAULT_FINALITY_BLOCKS = 1_000
+RPC_CACHE_HEAD_REFRESH_SECONDS = 60
+
+# Fragments (in lowercase) of the error messages returned by RPC providers when an eth_getLogs
+# request covers too many blocks or returns too many logs. Such requests are sent to the other
+# endpoints of the blockchain, and their block range is split in half once all of them refused it.
+# Other errors about block ranges (e.g. beyond the current head) are retried as usual.
+GET_LOGS_LIMIT_ERRORS = [
+    "query returned more than",
+    "query exceeds max block range",
+    "exceed maximum block range",
+    "block range is too wide",
+    "block range greater than",
+    "block range limit exceeded",
+    "range too large",
+    "range is too large",
+    "is limited to a",
+    "too many results",
+    "too many logs",
+    "response size exceeded",
+    "response size should not",
+    "exceeds max results",
+]
+
+# Fragments (in lowercase) of the error messages returned by RPC providers when a JSON-RPC batch is
+# larger than they accept, or batches are not supported at all. Together with HTTP 413 replies,
+# they halve the batch size of the endpoint. Other failed batches (e.g. a 502 reply of a proxy)
+# are sent again as single calls, keeping the batch size of the endpoint.
+BATCH_SIZE_LIMIT_ERRORS = [
+    "batch too large",
+    "batch is too large",
+    "batch size",
+    "batch limit",
+    "batch request limit",
+    "maximum batch",
+    "max batch",
+    "too many requests in batch",
+    "batch requests are not supported",
+    "batch request not supported",
+    "batch requests not supported",
+    "batching is not supported",
+]
+
+# Maximum number of (block number -> timestamp) entries kept in memory for each blockchain
+BLOCK_TIMESTAMP_CACHE_SIZE = 500_000
+
+# Blocks are resolved from timestamps with an interpolation search over block timestamps. After
+# BLOCK_RESOLVER_INTERPOLATION_PROBES probes, interpolation and bisection steps alternate, so skewed
+# block times never need more than about twice the probes of a binary search.
+BLOCK_RESOLVER_INTERPOLATION_PROBES = 8
+
+# Index of the hashes of the stored transactions of a bridge on a blockchain, used to skip the
+# transactions of logs that were already stored without querying the database. The hashes are
+# loaded in batches of TRANSACTION_INDEX_PRELOAD_BATCH_SIZE rows. In the "set" mode every hash is
+# kept in memory, while in the "bloom" mode they are kept in a Bloom filter (sized for twice the
+# stored transactions, and at least TRANSACTION_INDEX_BLOOM_MIN_CAPACITY) whose positives are
+# checked against the database.
+TRANSACTION_INDEX_MODES = ["set", "bloom"]
+TRANSACTION_INDEX_MODE = "set"
+TRANSACTION_INDEX_PRELOAD_BATCH_SIZE = 10_000
+TRANSACTION_INDEX_BLOOM_ERROR_RATE = 0.001
+TRANSACTION_INDEX_BLOOM_MIN_CAPACITY = 1_000_000
+
+# Strategies to fetch the receipts of the transactions that emitted the extracted events:
+# - "transaction": one eth_getTransactionReceipt call per transaction
+# - "block": one eth_getBlockReceipts call per block, whenever the endpoints support it
+# - "auto": eth_getBlockReceipts only for blocks with at least BLOCK_RECEIPTS_MIN_TRANSACTIONS
+#   transactions of interest, eth_getTransactionReceipt otherwise
+TRANSACTION_FETCH_STRATEGIES = ["transaction", "block", "auto"]
+DEFAULT_TRANSACTION_FETCH_STRATEGY = "auto"
+BLOCK_RECEIPTS_MIN_TRANSACTIONS = 5
+
+# Extraction engines of EVM blockchains:
+# - "threads": worker threads (twice the number of RPC endpoints, up to MAX_NUM_THREADS_EXTRACTOR
+#   each) processing block ranges with blocking requests
+# - "async": a single event loop processing up to ASYNC_MAX_CONCURRENT_RANGES block ranges at once,
+#   with up to ASYNC_MAX_REQUESTS_PER_ENDPOINT in-flight requests per RPC endpoint. Decoded logs and
+#   transactions are written to the database by ASYNC_DB_WRITER_THREADS threads
+# - "pipeline": block ranges streamed through fetch, decode, persist, transaction fetch and write
+#   stages, each with its own worker threads, connected by bounded queues
+EXTRACTION_ENGINES = ["threads", "async", "pipeline"]
+DEFAULT_EXTRACTION_ENGINE = "threads"
+ASYNC_MAX_CONCURRENT_RANGES = 200
+ASYNC_MAX_REQUESTS_PER_ENDPOINT = 16
+ASYNC_DB_WRITER_THREADS = 4
+
+# Pipeline engine of EVM blockchains: stages connected by queues of at most PIPELINE_QUEUE_SIZE
+# items. The log and transaction fetching stages have as many workers as the threads engine, the
+# decode, persist (bridge handler) and write (transactions, in batches of up to
+# PIPELINE_WRITER_BATCH_SIZE block ranges) stages have PIPELINE_*_WORKERS workers each
+PIPELINE_QUEUE_SIZE = 64
+PIPELINE_DECODE_WORKERS = 2
+PIPELINE_PERSIST_WORKERS = 4
+PIPELINE_WRITER_WORKERS = 2
+PIPELINE_WRITER_BATCH_SIZE = 16
+
+# How eth_getLogs filters are built for the contracts of a bridge on a blockchain:
+# - "contract": one filter (and block range scan) per contract
+# - "grouped": filters over up to GET_LOGS_MAX_ADDRESSES contracts at once, with the union of their
+#   topics, whose logs are routed back to the contract (and topics) they belong to
+LOG_FILTER_MODES = ["contract", "grouped"]
+DEFAULT_LOG_FILTER_MODE = "contract"
+GET_LOGS_MAX_ADDRESSES = 50
+
+# How the block range of each log filter is split by the threads engine:
+# - "static": ranges of the same size (the range divided by the number of threads, up to 1000
+#   blocks), assigned up front
+# - "adaptive": ranges handed out one at a time by the worker threads, sized to hold about
+#   ADAPTIVE_CHUNK_TARGET_LOGS logs from the log density of previous runs (checkpoints) or of the
+#   ranges already fetched (an EWMA, starting with ADAPTIVE_CHUNK_INITIAL_BLOCKS blocks), between
+#   ADAPTIVE_CHUNK_MIN_BLOCKS and ADAPTIVE_CHUNK_MAX_BLOCKS. The logs of ranges with more than
+#   ADAPTIVE_CHUNK_SPLIT_LOGS logs are split into sub-ranges processed by any idle thread.
+CHUNKING_MODES = ["static", "adaptive"]
+DEFAULT_CHUNKING_MODE = "static"
+ADAPTIVE_CHUNK_TARGET_LOGS = 500
+ADAPTIVE_CHUNK_SPLIT_LOGS = 1_000
+ADAPTIVE_CHUNK_INITIAL_BLOCKS = 2_000
+ADAPTIVE_CHUNK_MIN_BLOCKS = 10
+ADAPTIVE_CHUNK_MAX_BLOCKS = 50_000
+ADAPTIVE_CHUNK_EWMA_ALPHA = 0.3
+
+# Logs of EVM blockchains are decoded by the extraction threads, or with --decode_workers N by a
+# pool of N worker processes (shared by the blockchains of the bridge), each with its own decoder,
+# in batches of up to DECODE_POOL_BATCH_SIZE logs. ABI decoding is CPU-bound, so the threads are
+# limited to a single core by the GIL.
+DEFAULT_DECODE_WORKERS = 0
+DECODE_POOL_BATCH_SIZE = 250
+
+# Events whose inputs are all static elementary types (fixed-size words) are decoded in bulk, one
+# column at a time with NumPy, when at least BULK_DECODE_MIN_LOGS logs of the event (and contract)
+# are decoded together
+BULK_DECODE_MIN_LOGS = 32
+
+# Distributed extraction: block ranges of WORK_QUEUE_CHUNK_SIZE blocks are stored as tasks in the
+# database and claimed by workers (possibly on several machines) for WORK_QUEUE_LEASE_SECONDS,
+# renewed every WORK_QUEUE_HEARTBEAT_SECONDS while they are processed. Tasks whose lease expires go
+# back to the queue, and tasks are given up after WORK_QUEUE_MAX_ATTEMPTS failed attempts. Idle
+# workers poll the queue every WORK_QUEUE_POLL_SECONDS until all tasks are done.
+WORK_QUEUE_CHUNK_SIZE = 1000
+WORK_QUEUE_LEASE_SECONDS = 300
+WORK_QUEUE_HEARTBEAT_SECONDS = 60
+WORK_QUEUE_MAX_ATTEMPTS = 3
+WORK_QUEUE_POLL_SECONDS = 10
+
+# Follow mode: each blockchain is extracted up to a number of confirmations behind its latest
+# block (RPC_CACHE_FINALITY_BLOCKS[blockchain] by default), in ranges of up to
+# FOLLOW_MAX_RANGE_BLOCKS blocks, polling for new blocks every FOLLOW_POLL_SECONDS. The hashes of
+# the last blocks of the last FOLLOW_HASH_HISTORY extracted ranges are checked to detect reorgs and
+# find the last block shared with the new chain. Cross-chain transactions are generated every
+# FOLLOW_GENERATE_SECONDS, when new events were extracted.
+FOLLOW_POLL_SECONDS = 30
+FOLLOW_MAX_RANGE_BLOCKS = 10_000
+FOLLOW_HASH_HISTORY = 64
+FOLLOW_GENERATE_SECONDS = 3_600
+
+# port of the mock JSON-RPC node replaying recorded RPC calls (see rpcs/mock_rpc_node.py)
+MOCK_RPC_NODE_PORT = 8545
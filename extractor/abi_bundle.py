@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+import threading
+
+from config.constants import Bridge
+from utils.utils import CustomException, load_abi_bundle_dir
+
+
+def hash_abi_file(abi_path: str) -> str:
+    with open(abi_path, "rb") as abi_file:
+        return hashlib.sha256(abi_file.read()).hexdigest()
+
+
+class AbiBundle:
+    """
+    Precompiled event layouts of the ABIs of a bridge: for each ABI file, identified by the sha256
+    of its content, the ordered input names and types of each event selector (see
+    `BridgeDecoder.get_event_layouts`). Decoders use it to skip parsing ABIs and hashing event
+    signatures at startup. ABI files that changed since the bundle was built are simply not found.
+
+    The bundle of a bridge is stored in `<bundle_dir>/<bridge>.json`, and built by the
+    `build-abi-bundle` command.
+    """
+
+    CLASS_NAME = "AbiBundle"
+
+    def __init__(self, bridge: Bridge, bundle_dir: str, load: bool = True):
+        self.bundle_file = os.path.join(bundle_dir, f"{bridge.value}.json")
+        # abi hash -> {selector: (names, types)}
+        self.entries = {}
+        if load:
+            self.load()
+
+    def load(self):
+        func_name = "load"
+        if not os.path.exists(self.bundle_file):
+            return
+
+        try:
+            with open(self.bundle_file, "r") as bundle_file:
+                bundle = json.load(bundle_file)
+        except json.JSONDecodeError as e:
+            raise CustomException(
+                self.CLASS_NAME, func_name, f"Failed to parse ABI bundle {self.bundle_file}: {e}"
+            ) from e
+
+        self.entries = {
+            abi_hash: {
+                bytes.fromhex(selector): (names, types)
+                for selector, (names, types) in layouts.items()
+            }
+            for abi_hash, layouts in bundle.items()
+        }
+
+    def get(self, abi_hash: str) -> dict | None:
+        """Returns the {selector: (names, types)} event layouts of an ABI file, if bundled."""
+        return self.entries.get(abi_hash)
+
+    def put(self, abi_hash: str, layouts: dict):
+        self.entries[abi_hash] = layouts
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.bundle_file), exist_ok=True)
+        bundle = {
+            abi_hash: {
+                selector.hex(): [names, types] for selector, (names, types) in layouts.items()
+            }
+            for abi_hash, layouts in self.entries.items()
+        }
+
+        # written to a temporary file first, so that readers never see a partial bundle
+        tmp_file = f"{self.bundle_file}.tmp"
+        with open(tmp_file, "w") as bundle_file:
+            json.dump(bundle, bundle_file, sort_keys=True)
+        os.replace(tmp_file, self.bundle_file)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+_bundles = {}
+_bundles_lock = threading.Lock()
+
+
+def get_abi_bundle(bridge: Bridge) -> AbiBundle | None:
+    """Returns the process-wide ABI bundle of a bridge, or None if ABI_BUNDLE_DIR is not set."""
+    bundle_dir = load_abi_bundle_dir()
+    if not bundle_dir:
+        return None
+
+    with _bundles_lock:
+        if bridge not in _bundles:
+            _bundles[bridge] = AbiBundle(bridge, bundle_dir)
+        return _bundles[bridge]
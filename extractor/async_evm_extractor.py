@@ -0,0 +1,223 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config.constants import (
+    ASYNC_DB_WRITER_THREADS,
+    ASYNC_MAX_CONCURRENT_RANGES,
+    DEFAULT_CHUNKING_MODE,
+    DEFAULT_DECODE_WORKERS,
+    DEFAULT_LOG_FILTER_MODE,
+    DEFAULT_TRANSACTION_FETCH_STRATEGY,
+    Bridge,
+)
+from extractor.evm_extractor import EvmExtractor
+from rpcs.async_evm_rpc_client import AsyncEvmRPCClient
+from utils.utils import (
+    CliColor,
+    build_log_message,
+    log_error,
+    log_to_cli,
+)
+
+
+class AsyncEvmExtractor(EvmExtractor):
+    """
+    Extractor that processes block ranges as asyncio tasks on a single event loop instead of
+    worker threads. Logs and transactions are fetched with an AsyncEvmRPCClient, while decoding and
+    the (blocking) bridge handler calls run on a small pool of DB writer threads.
+    """
+
+    CLASS_NAME = "AsyncEvmExtractor"
+
+    def __init__(
+        self,
+        bridge: Bridge,
+        blockchain: str,
+        blockchains: list,
+        fetch_strategy: str = DEFAULT_TRANSACTION_FETCH_STRATEGY,
+        log_filter_mode: str = DEFAULT_LOG_FILTER_MODE,
+        max_threads: int | None = None,
+        resume: bool = False,
+        chunking: str = DEFAULT_CHUNKING_MODE,
+        decode_workers: int = DEFAULT_DECODE_WORKERS,
+    ):
+        super().__init__(
+            bridge,
+            blockchain,
+            blockchains,
+            fetch_strategy,
+            log_filter_mode,
+            max_threads,
+            resume,
+            chunking,
+            decode_workers,
+        )
+        self.async_rpc_client = AsyncEvmRPCClient(bridge)
+
+    async def work_async(
+        self,
+        db_writer: ThreadPoolExecutor,
+        contract: str,
+        topics: list,
+        start_block: int,
+        end_block: int,
+    ) -> int:
+        """asyncio version of `EvmExtractor.work`. Returns the number of logs of the range."""
+        loop = asyncio.get_running_loop()
+
+        log_to_cli(
+            build_log_message(
+                start_block,
+                end_block,
+                contract,
+                self.bridge,
+                self.blockchain,
+                "Processing logs and transactions...",
+            )
+        )
+
+        logs = await self.async_rpc_client.get_logs_emitted_by_contract(
+            self.blockchain, contract, topics, start_block, end_block
+        )
+
+        if len(logs) == 0:
+            return 0
+
+        pending_txs = await loop.run_in_executor(
+            db_writer, self.handle_logs, contract, topics, start_block, end_block, logs
+        )
+
+        if len(pending_txs) == 0:
+            return len(logs)
+
+        # a failure to fetch the transactions fails the whole block range, so that it can be
+        # retried later
+        fetched_txs = await self.async_rpc_client.process_transactions(
+            self.blockchain, list(pending_txs.items())
+        )
+
+        await loop.run_in_executor(
+            db_writer,
+            self.handle_fetched_transactions,
+            contract,
+            topics,
+            start_block,
+            end_block,
+            fetched_txs,
+        )
+
+        return len(logs)
+
+    async def extract_contract_data(
+        self,
+        db_writer: ThreadPoolExecutor,
+        contract: str,
+        topics: list,
+        start_block: int,
+        end_block: int,
+    ):
+        loop = asyncio.get_running_loop()
+        chunk_size = max(
+            1,
+            min(
+                (end_block - start_block + ASYNC_MAX_CONCURRENT_RANGES - 1)
+                // ASYNC_MAX_CONCURRENT_RANGES,
+                1000,
+            ),
+        )
+
+        if start_block == end_block:
+            # a single block is not covered by divide_range
+            block_ranges = [(start_block, end_block)]
+        else:
+            block_ranges = self.divide_range(start_block, end_block - 1, chunk_size)
+
+        if self.resume:
+            # ranges are fetched including their end block, as recorded in the checkpoints
+            block_ranges = await loop.run_in_executor(
+                db_writer, self.checkpoints.missing_ranges, contract, topics, block_ranges
+            )
+
+        semaphore = asyncio.Semaphore(ASYNC_MAX_CONCURRENT_RANGES)
+
+        async def process_range(start: int, end: int):
+            async with semaphore:
+                try:
+                    num_logs = await self.work_async(db_writer, contract, topics, start, end)
+                except Exception as e:
+                    request_desc = (
+                        f"Error processing request: {self.bridge}, {self.blockchain}, {start}, "
+                        f"{end}, {contract}, {topics}. Error: {e}"
+                    )
+                    log_error(self.bridge, request_desc)
+                    await loop.run_in_executor(
+                        db_writer, self.checkpoints.fail, contract, topics, start, end, e
+                    )
+                else:
+                    await loop.run_in_executor(
+                        db_writer,
+                        self.checkpoints.complete,
+                        contract,
+                        topics,
+                        start,
+                        end,
+                        num_logs,
+                    )
+
+        log_to_cli(
+            build_log_message(
+                start_block,
+                end_block,
+                contract,
+                self.bridge,
+                self.blockchain,
+                (
+                    f"Launching {len(block_ranges)} tasks to process block ranges "
+                    f"({ASYNC_MAX_CONCURRENT_RANGES} at a time)..."
+                ),
+            )
+        )
+
+        await asyncio.gather(*(process_range(start, end) for start, end in block_ranges))
+
+    async def extract_data_async(self, start_block: int, end_block: int):
+        bridge_blockchain_pairs = self.handler.get_bridge_contracts_and_topics(
+            self.bridge, self.blockchain
+        )
+
+        with ThreadPoolExecutor(
+            max_workers=ASYNC_DB_WRITER_THREADS, thread_name_prefix="db_writer"
+        ) as db_writer:
+            try:
+                for contract, topics in self.build_log_filters(bridge_blockchain_pairs):
+                    start_time = time.time()
+
+                    await self.extract_contract_data(
+                        db_writer, contract, topics, start_block, end_block
+                    )
+
+                    end_time = time.time()
+
+                    log_to_cli(
+                        build_log_message(
+                            start_block,
+                            end_block,
+                            contract,
+                            self.bridge,
+                            self.blockchain,
+                            (
+                                f"Finished processing logs and transactions. Time taken: "
+                                f"{end_time - start_time} seconds."
+                            ),
+                        ),
+                        CliColor.SUCCESS,
+                    )
+            finally:
+                await self.async_rpc_client.close()
+
+    def extract_data(self, start_block: int, end_block: int):
+        """Main extraction logic."""
+        asyncio.run(self.extract_data_async(start_block, end_block))
+
+        self.log_endpoint_stats(self.async_rpc_client, start_block, end_block)
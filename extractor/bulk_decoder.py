@@ -0,0 +1,180 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+from eth_utils import to_checksum_address
+
+from utils.utils import CustomException
+
+WORD_SIZE = 32
+STATIC_TYPE_PATTERN = re.compile(r"^(uint|int|bytes)(\d+)$")
+
+# checksumming (a keccak hash) dominates the bulk decoding of addresses, which repeat across logs
+# (tokens, routers, relayers)
+checksum_address = lru_cache(maxsize=65_536)(to_checksum_address)
+
+
+class StaticEventLayout:
+    """
+    Layout of an event whose (ordered) inputs are all static elementary types, i.e. each input is
+    a single 32-byte word of the topics and data of its logs. The logs of such an event are decoded
+    in bulk: their topics and data are concatenated into one buffer, viewed as a NumPy array of
+    (logs, inputs, 32) bytes, and each input is decoded for all logs at once (uint256 as 4 uint64
+    limbs, addresses and bytesN as byte slices).
+
+    Values are validated as strictly as eth_abi does (e.g. zero padding), and the logs that fail the
+    validation are left for the generic decoder, so that both return the same results.
+    """
+
+    CLASS_NAME = "StaticEventLayout"
+
+    def __init__(self, names: list, types: list):
+        func_name = "__init__"
+        if not types or not all(self.is_static(abi_type) for abi_type in types):
+            raise CustomException(
+                self.CLASS_NAME, func_name, f"Types {types} are not static elementary types."
+            )
+
+        self.names = names
+        self.types = types
+
+    @staticmethod
+    def is_static(abi_type: str) -> bool:
+        if abi_type in ("address", "bool"):
+            return True
+
+        match = STATIC_TYPE_PATTERN.match(abi_type)
+        if match is None:
+            return False
+
+        base, size = match.group(1), int(match.group(2))
+        if base == "bytes":
+            return 1 <= size <= 32
+        return size % 8 == 0 and 8 <= size <= 256
+
+    @classmethod
+    def from_types(cls, names: list, types: list) -> "StaticEventLayout | None":
+        """Returns the layout of the inputs, or None if they are not all static elementary types."""
+        if not types or not all(cls.is_static(abi_type) for abi_type in types):
+            return None
+        return cls(names, types)
+
+    def decode_columns(self, logs: list) -> tuple:
+        """
+        Decodes the logs of the event into columns. Returns the {name: values} columns of the
+        decoded logs, the indexes (in `logs`) of the decoded logs, and the indexes of the logs that
+        must be decoded by the generic decoder instead.
+        """
+        num_words = len(self.types)
+        row_size = 2 * WORD_SIZE * num_words
+
+        rows = []
+        row_idxs = []
+        invalid_idxs = []
+        for idx, log in enumerate(logs):
+            row = "".join(topic[2:] for topic in log["topics"][1:]) + log["data"][2:]
+            if len(row) == row_size:
+                rows.append(row)
+                row_idxs.append(idx)
+            else:
+                invalid_idxs.append(idx)
+
+        if not rows:
+            return {name: [] for name in self.names}, [], invalid_idxs
+
+        try:
+            buffer = bytes.fromhex("".join(rows))
+        except ValueError:
+            # a log with invalid hex, leave them all to the generic decoder
+            return {name: [] for name in self.names}, [], sorted(invalid_idxs + row_idxs)
+
+        words = np.frombuffer(buffer, dtype=np.uint8).reshape(len(rows), num_words, WORD_SIZE)
+
+        valid = np.ones(len(rows), dtype=bool)
+        for idx, abi_type in enumerate(self.types):
+            valid &= self.validate_word(abi_type, words[:, idx, :])
+
+        if not valid.all():
+            invalid_idxs = sorted(
+                invalid_idxs + [row_idxs[idx] for idx in np.flatnonzero(~valid).tolist()]
+            )
+            row_idxs = [row_idxs[idx] for idx in np.flatnonzero(valid).tolist()]
+            words = words[valid]
+
+        columns = {
+            name: self.decode_word(abi_type, words[:, idx, :])
+            for idx, (name, abi_type) in enumerate(zip(self.names, self.types))
+        }
+
+        return columns, row_idxs, invalid_idxs
+
+    def decode_rows(self, logs: list) -> tuple:
+        """
+        Decodes the logs of the event into one dict per log, as the generic decoder does. Returns
+        the {index in `logs`: decoded log} of the decoded logs, and the indexes of the logs that
+        must be decoded by the generic decoder instead.
+        """
+        columns, row_idxs, invalid_idxs = self.decode_columns(logs)
+        values = [columns[name] for name in self.names]
+
+        decoded_logs = {
+            idx: dict(zip(self.names, row_values))
+            for idx, row_values in zip(row_idxs, zip(*values))
+        }
+
+        return decoded_logs, invalid_idxs
+
+    @staticmethod
+    def validate_word(abi_type: str, words: np.ndarray) -> np.ndarray:
+        """Returns whether each (32-byte) word is a valid encoding of the type, as a mask."""
+        if abi_type == "address":
+            return ~words[:, :12].any(axis=1)
+        if abi_type == "bool":
+            return ~words[:, :31].any(axis=1) & (words[:, 31] <= 1)
+
+        base, size = STATIC_TYPE_PATTERN.match(abi_type).groups()
+        size = int(size)
+
+        if base == "bytes":
+            return ~words[:, size:].any(axis=1)
+
+        padding = WORD_SIZE - size // 8
+        if base == "uint":
+            return ~words[:, :padding].any(axis=1)
+
+        # signed integers are sign extended
+        if padding == 0:
+            return np.ones(len(words), dtype=bool)
+        fill = np.where(words[:, padding] & 0x80, 0xFF, 0x00).astype(np.uint8)
+        return (words[:, :padding] == fill[:, None]).all(axis=1)
+
+    @staticmethod
+    def decode_word(abi_type: str, words: np.ndarray) -> list:
+        """Decodes the (valid) words of an input of the event, for all logs."""
+        if abi_type == "address":
+            addresses = words[:, 12:].tobytes().hex()
+            return [
+                checksum_address("0x" + addresses[idx : idx + 40])
+                for idx in range(0, len(addresses), 40)
+            ]
+        if abi_type == "bool":
+            return (words[:, 31] == 1).tolist()
+
+        base, size = STATIC_TYPE_PATTERN.match(abi_type).groups()
+        size = int(size)
+
+        if base == "bytes":
+            values = words[:, :size].tobytes().hex()
+            return [values[idx : idx + 2 * size] for idx in range(0, len(values), 2 * size)]
+
+        if size <= 64:
+            limb = np.ascontiguousarray(words[:, 24:]).view(">u8" if base == "uint" else ">i8")
+            return limb.ravel().tolist()
+
+        limbs = np.ascontiguousarray(words).view(">u8").reshape(len(words), 4)
+        values = [(a << 192) | (b << 128) | (c << 64) | d for a, b, c, d in limbs.tolist()]
+
+        if base == "int":
+            values = [value - (1 << 256) if value >> 255 else value for value in values]
+
+        return values
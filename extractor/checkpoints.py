@@ -0,0 +1,146 @@
+import json
+
+from config.constants import Bridge
+from repository.common.repository import ExtractionCheckpointRepository
+from repository.database import DBSession
+from utils.utils import CustomException, log_error
+
+
+class Checkpoints:
+    """
+    Records which (inclusive) block ranges of each log filter of a bridge on a blockchain were
+    extracted or failed, so that interrupted runs can be resumed and failed ranges retried.
+    Filters are identified by their contract (or tuple of contracts) and topics, so ranges are
+    only matched across runs with the same log filter mode.
+    """
+
+    CLASS_NAME = "Checkpoints"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    def __init__(self, bridge: Bridge, blockchain: str, repository=None):
+        self.bridge = bridge
+        self.blockchain = blockchain
+        self.repository = repository or ExtractionCheckpointRepository(DBSession)
+
+    @staticmethod
+    def filter_key(contract: str | tuple, topics: list) -> tuple:
+        contracts = contract if isinstance(contract, str) else list(contract)
+        return json.dumps(contracts), json.dumps(list(topics))
+
+    @staticmethod
+    def parse_filter_key(contract: str, topics: str) -> tuple:
+        contracts = json.loads(contract)
+        return (contracts if isinstance(contracts, str) else tuple(contracts)), json.loads(topics)
+
+    def save(
+        self,
+        contract,
+        topics: list,
+        start_block: int,
+        end_block: int,
+        status: str,
+        error=None,
+        num_logs: int | None = None,
+    ):
+        """Records the status of a range. Failing to do so must not stop the extraction."""
+        try:
+            self.repository.save_range(
+                self.bridge.value,
+                self.blockchain,
+                *self.filter_key(contract, topics),
+                start_block,
+                end_block,
+                status,
+                str(error) if error is not None else None,
+                num_logs,
+            )
+        except Exception as e:
+            log_error(
+                self.bridge,
+                f"Failed to save checkpoint of {self.blockchain}, {start_block}, {end_block}, "
+                f"{contract}: {e}",
+            )
+
+    def complete(
+        self, contract, topics: list, start_block: int, end_block: int, num_logs: int | None = None
+    ):
+        self.save(contract, topics, start_block, end_block, self.COMPLETED, num_logs=num_logs)
+
+    def fail(self, contract, topics: list, start_block: int, end_block: int, error: Exception):
+        self.save(contract, topics, start_block, end_block, self.FAILED, error)
+
+    def get_ranges(self, status: str) -> dict:
+        """Returns the ranges with the given status, as {(contract, topics) key: [(start, end)]}."""
+        ranges = {}
+        for row in self.repository.get_ranges(self.bridge.value, self.blockchain, status):
+            ranges.setdefault((row.contract, row.topics), []).append(
+                (row.start_block, row.end_block)
+            )
+        return ranges
+
+    def get_history(self, contract, topics: list) -> list:
+        """
+        Returns the (start_block, end_block, num_logs) of the completed ranges of a filter whose
+        number of logs is known, used to estimate the log density of its blocks.
+        """
+        try:
+            rows = self.repository.get_ranges(self.bridge.value, self.blockchain, self.COMPLETED)
+        except Exception as e:
+            log_error(self.bridge, f"Failed to load checkpoints of {self.blockchain}: {e}")
+            return []
+
+        key = self.filter_key(contract, topics)
+        return [
+            (row.start_block, row.end_block, row.num_logs)
+            for row in rows
+            if (row.contract, row.topics) == key and row.num_logs is not None
+        ]
+
+    def missing_ranges(self, contract, topics: list, block_ranges: list) -> list:
+        """Returns the parts of the (inclusive) block ranges that were not completed yet."""
+        completed = self.get_ranges(self.COMPLETED).get(self.filter_key(contract, topics), [])
+        return self.subtract(block_ranges, completed)
+
+    def failed_ranges(self) -> list:
+        """
+        Returns the (contract, topics, start_block, end_block) ranges that failed and were not
+        completed since (e.g. by a later run with different block ranges).
+        """
+        func_name = "failed_ranges"
+        completed = self.get_ranges(self.COMPLETED)
+        tasks = []
+
+        for key, ranges in self.get_ranges(self.FAILED).items():
+            try:
+                contract, topics = self.parse_filter_key(*key)
+            except ValueError as e:
+                raise CustomException(
+                    self.CLASS_NAME, func_name, f"Invalid checkpoint filter {key}"
+                ) from e
+
+            for start_block, end_block in self.subtract(ranges, completed.get(key, [])):
+                tasks.append((contract, topics, start_block, end_block))
+
+        return tasks
+
+    @staticmethod
+    def subtract(block_ranges: list, completed: list) -> list:
+        """Removes the `completed` (inclusive) ranges from the (inclusive) `block_ranges`."""
+        completed = sorted(completed)
+        missing = []
+
+        for start_block, end_block in block_ranges:
+            start = start_block
+            for completed_start, completed_end in completed:
+                if completed_end < start or completed_start > end_block:
+                    continue
+                if completed_start > start:
+                    missing.append((start, completed_start - 1))
+                start = max(start, completed_end + 1)
+                if start > end_block:
+                    break
+            if start <= end_block:
+                missing.append((start, end_block))
+
+        return missing
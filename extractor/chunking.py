@@ -0,0 +1,216 @@
+import threading
+from collections import deque
+
+from config.constants import (
+    ADAPTIVE_CHUNK_EWMA_ALPHA,
+    ADAPTIVE_CHUNK_INITIAL_BLOCKS,
+    ADAPTIVE_CHUNK_MAX_BLOCKS,
+    ADAPTIVE_CHUNK_MIN_BLOCKS,
+    ADAPTIVE_CHUNK_SPLIT_LOGS,
+    ADAPTIVE_CHUNK_TARGET_LOGS,
+)
+
+
+class AdaptiveRangeSplitter:
+    """
+    Hands out the (inclusive) block ranges of a log filter to the worker threads one at a time,
+    sized to hold about ADAPTIVE_CHUNK_TARGET_LOGS logs each. The log density (logs per block) is
+    estimated from the logs of completed ranges of previous runs (`history`, a list of
+    (start_block, end_block, num_logs)) and, where there is none, from an EWMA of the ranges already
+    fetched by this run. Stretches known to be empty are thus covered by a few large ranges, while
+    dense stretches get small ones.
+
+    Ranges are never larger than the remaining blocks divided by the number of workers, so the
+    last ranges are shared by all workers instead of leaving one of them with a large range.
+    """
+
+    def __init__(
+        self,
+        block_ranges: list,
+        num_workers: int,
+        history: list = None,
+        target_logs: int = ADAPTIVE_CHUNK_TARGET_LOGS,
+        min_blocks: int = ADAPTIVE_CHUNK_MIN_BLOCKS,
+        max_blocks: int = ADAPTIVE_CHUNK_MAX_BLOCKS,
+    ):
+        # (inclusive) block ranges to hand out, in order
+        self.block_ranges = sorted(block_ranges)
+        self.range_idx = 0
+        self.next_block = self.block_ranges[0][0] if self.block_ranges else None
+        self.remaining_blocks = sum(end - start + 1 for start, end in self.block_ranges)
+        self.num_workers = max(1, num_workers)
+        self.history = sorted(history or [])
+        self.target_logs = target_logs
+        self.min_blocks = min_blocks
+        self.max_blocks = max_blocks
+        # EWMA of the logs per block of the ranges fetched so far
+        self.density = None
+        self.lock = threading.Lock()
+
+    def next_range(self) -> tuple | None:
+        """Returns the next block range to fetch, or None once all ranges were handed out."""
+        with self.lock:
+            while (
+                self.range_idx < len(self.block_ranges)
+                and self.next_block > self.block_ranges[self.range_idx][1]
+            ):
+                self.range_idx += 1
+                if self.range_idx < len(self.block_ranges):
+                    self.next_block = self.block_ranges[self.range_idx][0]
+
+            if self.range_idx >= len(self.block_ranges):
+                return None
+
+            size = self.history_size(self.next_block)
+            if size is None:
+                if self.density is None:
+                    size = ADAPTIVE_CHUNK_INITIAL_BLOCKS
+                elif self.density == 0:
+                    size = self.max_blocks
+                else:
+                    size = int(self.target_logs / self.density)
+
+            tail_size = (self.remaining_blocks + self.num_workers - 1) // self.num_workers
+            size = max(self.min_blocks, min(size, tail_size, self.max_blocks))
+
+            start = self.next_block
+            end = min(start + size - 1, self.block_ranges[self.range_idx][1])
+            self.next_block = end + 1
+            self.remaining_blocks -= end - start + 1
+
+            return start, end
+
+    def record(self, start_block: int, end_block: int, num_logs: int):
+        """Updates the log density estimate with the logs returned for a block range."""
+        density = num_logs / (end_block - start_block + 1)
+
+        with self.lock:
+            if self.density is None:
+                self.density = density
+            else:
+                self.density += ADAPTIVE_CHUNK_EWMA_ALPHA * (density - self.density)
+
+    def history_size(self, start_block: int) -> int | None:
+        """
+        Returns the number of blocks from `start_block` expected to hold `target_logs` logs
+        according to the history, stopping at the first stretch without history. Returns None if
+        there is no history for `start_block`.
+        """
+        blocks = 0
+        logs = 0.0
+
+        for range_start, range_end, range_logs in self.history:
+            position = start_block + blocks
+            if range_end < position:
+                continue
+            if range_start > position:
+                break
+
+            density = range_logs / (range_end - range_start + 1)
+            available = range_end - position + 1
+
+            if density > 0 and logs + density * available > self.target_logs:
+                return blocks + max(1, int((self.target_logs - logs) / density))
+
+            blocks += available
+            logs += density * available
+            if blocks >= self.max_blocks:
+                break
+
+        return blocks or None
+
+
+def split_logs(start_block: int, end_block: int, logs: list) -> list:
+    """
+    Splits the logs of a dense (inclusive) block range into consecutive sub-ranges of about
+    ADAPTIVE_CHUNK_TARGET_LOGS logs, cut at block boundaries, as [(start_block, end_block, logs)].
+    Ranges with up to ADAPTIVE_CHUNK_SPLIT_LOGS logs are not split.
+    """
+    if len(logs) <= ADAPTIVE_CHUNK_SPLIT_LOGS:
+        return [(start_block, end_block, logs)]
+
+    logs = sorted(logs, key=lambda log: int(log["blockNumber"], 0))
+    parts = []
+    part_start = start_block
+    part_logs = []
+
+    for log in logs:
+        block_number = int(log["blockNumber"], 0)
+
+        # logs of the same block stay in the same sub-range
+        if len(part_logs) >= ADAPTIVE_CHUNK_TARGET_LOGS and block_number > int(
+            part_logs[-1]["blockNumber"], 0
+        ):
+            parts.append((part_start, block_number - 1, part_logs))
+            part_start = block_number
+            part_logs = []
+
+        part_logs.append(log)
+
+    parts.append((part_start, end_block, part_logs))
+
+    return parts
+
+
+class RangeProgress:
+    """Counts the sub-ranges of a block range still being processed, and the first error."""
+
+    def __init__(self, parts: int, num_logs: int):
+        self.remaining = parts
+        self.num_logs = num_logs
+        self.error = None
+        self.lock = threading.Lock()
+
+    def done(self, error: Exception | None = None) -> bool:
+        """Marks a sub-range as processed. Returns True for the last one."""
+        with self.lock:
+            self.remaining -= 1
+            if error is not None and self.error is None:
+                self.error = error
+            return self.remaining == 0
+
+
+class AdaptiveJobs:
+    """
+    Sub-ranges of dense block ranges left by the worker that fetched them, to be processed by any
+    idle worker. The ranges being fetched are counted, as they may still add sub-ranges: idle
+    workers wait for them instead of exiting, so that the tail of an extraction, usually its
+    densest part, is not left to a few workers.
+    """
+
+    def __init__(self):
+        self.jobs = deque()
+        self.fetching = 0
+        self.condition = threading.Condition()
+
+    def put(self, job: tuple):
+        with self.condition:
+            self.jobs.append(job)
+            self.condition.notify()
+
+    def get(self, splitter: AdaptiveRangeSplitter) -> tuple:
+        """
+        Returns the next (job, None) to process, or (None, block_range) to fetch, in which case
+        `fetched` must be called once it was fetched. Waits while there are neither but ranges are
+        still being fetched, and returns (None, None) once everything was handed out.
+        """
+        with self.condition:
+            while True:
+                if self.jobs:
+                    return self.jobs.popleft(), None
+
+                block_range = splitter.next_range()
+                if block_range is not None:
+                    self.fetching += 1
+                    return None, block_range
+
+                if self.fetching == 0:
+                    return None, None
+
+                self.condition.wait()
+
+    def fetched(self):
+        """Marks a range handed out by `get` as fetched, with its sub-ranges already put."""
+        with self.condition:
+            self.fetching -= 1
+            self.condition.notify_all()
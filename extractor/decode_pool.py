@@ -0,0 +1,112 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from config.constants import DECODE_POOL_BATCH_SIZE, Bridge
+from extractor.decoder import BridgeDecoder
+from utils.metrics import Metrics
+from utils.utils import CustomException
+
+# decoder of the bridge in each worker process, built once by `init_worker`
+_worker_decoder = None
+
+
+def init_worker(bridge: Bridge):
+    global _worker_decoder
+    _worker_decoder = BridgeDecoder(bridge)
+
+
+def decode_batch(contract: str, blockchain: str, logs: list) -> tuple:
+    """
+    Decodes a batch of logs in a worker process. Returns the decoded logs, the decoder counters of
+    the batch and, if a log could not be decoded, the error instead of the logs (exceptions of the
+    repo cannot be unpickled by the parent process).
+    """
+    before = _worker_decoder.metrics.snapshot()
+
+    try:
+        decoded_logs = _worker_decoder.decode_logs(contract, blockchain, logs)
+        error = None
+    except Exception as e:
+        decoded_logs = None
+        error = str(e)
+
+    counters = {
+        name: value - before.get(name, 0)
+        for name, value in _worker_decoder.metrics.snapshot().items()
+    }
+
+    return decoded_logs, counters, error
+
+
+class DecodePool:
+    """
+    Pool of worker processes decoding the logs of a bridge, so that ABI decoding (CPU-bound pure
+    Python) runs on several cores instead of sharing the GIL with the extraction threads. Each
+    worker has its own decoder of the bridge, which loads the ABIs of the contracts on first use.
+    """
+
+    CLASS_NAME = "DecodePool"
+
+    def __init__(self, bridge: Bridge, num_workers: int):
+        # workers are spawned rather than forked, as the parent has running threads and open
+        # database connections
+        self.executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(bridge,),
+        )
+        self.num_workers = num_workers
+
+    def decode(self, contract: str, blockchain: str, logs: list, metrics: Metrics = None) -> list:
+        """
+        Decodes the logs of a contract in batches of up to DECODE_POOL_BATCH_SIZE logs, decoded in
+        parallel by the workers. Returns the decoded logs in the order of `logs`, adding the
+        decoder counters of the workers to `metrics`.
+        """
+        func_name = "decode"
+
+        futures = [
+            self.executor.submit(
+                decode_batch, contract, blockchain, logs[idx : idx + DECODE_POOL_BATCH_SIZE]
+            )
+            for idx in range(0, len(logs), DECODE_POOL_BATCH_SIZE)
+        ]
+
+        decoded_logs = []
+        errors = []
+        for future in futures:
+            batch, counters, error = future.result()
+
+            if metrics is not None:
+                for name, value in counters.items():
+                    metrics.increment(name, value)
+
+            if error is not None:
+                errors.append(error)
+            else:
+                decoded_logs.extend(batch)
+
+        if errors:
+            raise CustomException(self.CLASS_NAME, func_name, errors[0])
+
+        return decoded_logs
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_decode_pool(bridge: Bridge, num_workers: int) -> DecodePool:
+    """
+    Returns the process-wide decode pool of a bridge, started on first use with `num_workers`
+    workers (the decoder of a bridge covers all its blockchains).
+    """
+    with _pools_lock:
+        if bridge not in _pools:
+            _pools[bridge] = DecodePool(bridge, num_workers)
+        return _pools[bridge]
@@ -1,54 +1,129 @@
 import os
+import threading
 from typing import Any, Dict, Union
 
+from eth_abi.grammar import ABIType, TupleType, parse
 from eth_typing import HexStr
-from eth_utils import event_abi_to_log_topic
+from eth_utils import event_abi_to_log_topic, to_checksum_address
 from hexbytes import HexBytes
 from web3 import Web3
 from web3._utils.abi import map_abi_data
 from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
 from web3.contract import Contract
 
-from config.constants import Bridge
+from config.constants import BULK_DECODE_MIN_LOGS, Bridge
+from extractor.abi_bundle import AbiBundle, get_abi_bundle, hash_abi_file
 from extractor.base_decoder import BaseDecoder
+from extractor.bulk_decoder import StaticEventLayout
+from utils.metrics import Metrics
 from utils.utils import (
     CustomException,
     convert_bin_to_hex,
-    load_abi,
+    get_abi_path,
+    load_abi_file,
     load_bridge_config,
     load_module,
 )
 
 
+class EventDecodingPlan:
+    """
+    Precompiled decoding of the logs of an event: the eth_abi decoder of its (ordered) input types
+    and, for each input, the conversion of the decoded value to the output of
+    `BridgeDecoder.decode_event_input` (bytes as hex strings, checksummed addresses, and lists
+    instead of tuples). Decoding a log is then a single codec call on its raw topics and data.
+    """
+
+    def __init__(self, codec, names: list, types: list):
+        self.names = names
+        self.types = types
+        self.decoder = codec._registry.get_tuple_decoder(*types)
+        self.stream_class = codec.stream_class
+        self.converters = [self.build_converter(parse(abi_type)) for abi_type in types]
+
+    @classmethod
+    def build_converter(cls, abi_type: ABIType):
+        if abi_type.is_array:
+            convert_item = cls.build_converter(abi_type.item_type)
+            return lambda values: [convert_item(value) for value in values]
+
+        if isinstance(abi_type, TupleType):
+            converters = [cls.build_converter(component) for component in abi_type.components]
+            return lambda values: [convert(value) for convert, value in zip(converters, values)]
+
+        if abi_type.base == "address":
+            return to_checksum_address
+
+        return lambda value: convert_bin_to_hex(value) if isinstance(value, bytes) else value
+
+    def decode(self, log: dict) -> dict:
+        # the indexed inputs (topics after the selector) precede the data, as in the ordered types
+        params = b"".join(bytes.fromhex(topic[2:]) for topic in log["topics"][1:])
+        params += bytes.fromhex(log["data"][2:])
+
+        values = self.decoder(self.stream_class(params))
+
+        return {
+            name: convert(value)
+            for name, convert, value in zip(self.names, self.converters, values)
+        }
+
+
 class BridgeDecoder:
+    """
+    Decodes the logs of the contracts of a bridge, in the given blockchains (all by default).
+
+    Contracts are only indexed at startup (address and ABI file). Their ABIs are parsed the first
+    time one of their logs is decoded, and their web3 contracts only built for the custom decoder
+    of the bridge. The event layouts of an ABI file can also be read from the precompiled ABI
+    bundle of the bridge (see `AbiBundle`), which skips parsing the ABI altogether.
+    """
+
     CLASS_NAME = "BridgeDecoder"
 
-    def __init__(self, bridge: Bridge, rpc_url: str):
-        self.w3 = Web3(provider=Web3.HTTPProvider(rpc_url))
+    def __init__(self, bridge: Bridge, blockchains: list | None = None):
+        # decoding does not make RPC calls
+        self.w3 = Web3()
         self.bridge = bridge
-        self.contracts = {}
+        # (contract, blockchain) -> path of the ABI file, for the contracts of the configuration
+        self.contract_abi_files = {}
+        # (contract, blockchain) -> ABI, web3 contract, and {selector: event ABI}, loaded on use
         self.contracts_abi = {}
-        self.event_abis = {}
+        self.contracts = {}
         self.sign_abis = {}
+        # (contract, blockchain) -> {selector: (ordered input names, ordered input types)}
+        self.event_layouts = {}
         self.ordered_input_types_and_names = {}
-
-        self.load_contracts_and_abis(bridge)
-
-    def load_contracts_and_abis(self, bridge: Bridge):
+        # (contract, blockchain, selector) -> EventDecodingPlan, or None for the events that are
+        # only decoded by the custom decoder of the bridge
+        self.decoding_plans = {}
+        # (contract, blockchain, selector) of the events whose logs failed the generic decoding and
+        # were decoded by the custom decoder, to which their next logs are sent directly
+        self.custom_routes = set()
+        # (contract, blockchain, selector) -> StaticEventLayout of the events decoded in bulk, or
+        # None for the other events
+        self.bulk_layouts = {}
+        self.custom_decoder = None
+        self.abi_bundle = get_abi_bundle(bridge)
+        self.lock = threading.Lock()
+        self.metrics = Metrics()
+
+        self.load_contracts_and_abis(bridge, blockchains)
+
+    def load_contracts_and_abis(self, bridge: Bridge, blockchains: list | None = None):
+        """Indexes the ABI files of the contracts of the bridge, in the given blockchains."""
         blockchains_config = load_bridge_config(bridge.value)
 
         for blockchain in blockchains_config["blockchains"]:
+            if blockchains is not None and blockchain not in blockchains:
+                continue
+
             for object in blockchains_config["blockchains"][blockchain]:
+                abi_path = get_abi_path(
+                    os.path.dirname(__file__), bridge, blockchain, object["abi"]
+                )
                 for contract_addr in object["contracts"]:
-                    abi_filename = object["abi"]
-                    abi = load_abi(os.path.dirname(__file__), bridge, blockchain, abi_filename)
-                    self.contracts_abi[(contract_addr, blockchain)] = abi
-
-                    self.register_contract(
-                        contract_addr,
-                        blockchain,
-                        self.contracts_abi[(contract_addr, blockchain)],
-                    )
+                    self.contract_abi_files[(contract_addr, blockchain)] = abi_path
 
     def load_bridge_decoder(self, bridge) -> BaseDecoder:
         """Dynamically loads the decoder for the specified bridge."""
@@ -66,27 +141,124 @@ class BridgeDecoder:
                 self.CLASS_NAME, func_name, f"Bridge {bridge_name} not supported"
             ) from e
 
-    def register_contract(self, contract_addr: str, blockchain: str, contract_abi: str):
-        func_name = "register_contract"
-        try:
-            contract = self.w3.eth.contract(
-                address=Web3.to_checksum_address(contract_addr), abi=contract_abi
-            )
-            self.contracts[(contract_addr, blockchain)] = contract
-            self.contracts_abi[(contract_addr, blockchain)] = contract_abi
+    def register_contract(self, contract_addr: str, blockchain: str, contract_abi: list):
+        """Adds a contract with its ABI, besides the contracts of the bridge configuration."""
+        key = (contract_addr, blockchain)
+
+        self.contracts_abi[key] = contract_abi
+        for cache in (self.contracts, self.sign_abis, self.event_layouts):
+            cache.pop(key, None)
+        self.ordered_input_types_and_names = {
+            cache_key: value
+            for cache_key, value in self.ordered_input_types_and_names.items()
+            if cache_key[:2] != key
+        }
+
+    def has_contract(self, contract_addr: str, blockchain: str) -> bool:
+        key = (contract_addr, blockchain)
+        return key in self.contract_abi_files or key in self.contracts_abi
+
+    def get_contract_abi(self, contract_addr: str, blockchain: str) -> list:
+        func_name = "get_contract_abi"
+        key = (contract_addr, blockchain)
+
+        if key not in self.contracts_abi:
+            if key not in self.contract_abi_files:
+                raise CustomException(
+                    self.CLASS_NAME,
+                    func_name,
+                    f"Contract {contract_addr} not found in contracts list.",
+                )
+            self.contracts_abi[key] = load_abi_file(self.contract_abi_files[key])
+
+        return self.contracts_abi[key]
+
+    def get_contract(self, contract_addr: str, blockchain: str) -> Contract:
+        """Returns the web3 contract of a contract, built on first use (for the custom decoder)."""
+        func_name = "get_contract"
+        key = (contract_addr, blockchain)
 
-            self.event_abis[contract] = [abi for abi in contract.abi if abi["type"] == "event"]
-            self.sign_abis[contract] = {
-                event_abi_to_log_topic(abi): abi for abi in self.event_abis[contract]
+        with self.lock:
+            if key not in self.contracts:
+                try:
+                    self.contracts[key] = self.w3.eth.contract(
+                        address=Web3.to_checksum_address(contract_addr),
+                        abi=self.get_contract_abi(contract_addr, blockchain),
+                    )
+                except Exception as e:
+                    raise CustomException(
+                        self.CLASS_NAME,
+                        func_name,
+                        f"Error registering contract {contract_addr}: {e}",
+                    ) from e
+
+            return self.contracts[key]
+
+    def get_event_abis(self, contract_addr: str, blockchain: str) -> dict:
+        """Returns the {selector: event ABI} of the events of a contract."""
+        key = (contract_addr, blockchain)
+
+        if key not in self.sign_abis:
+            self.sign_abis[key] = {
+                event_abi_to_log_topic(abi): abi
+                for abi in self.get_contract_abi(contract_addr, blockchain)
+                if abi["type"] == "event"
             }
-        except Exception as e:
+
+        return self.sign_abis[key]
+
+    def get_event_layouts(self, contract_addr: str, blockchain: str) -> dict:
+        """
+        Returns the {selector: (names, types)} ordered input names and types of the events of a
+        contract, from the ABI bundle of the bridge when it has its ABI file.
+        """
+        key = (contract_addr, blockchain)
+
+        if key not in self.event_layouts:
+            layouts = None
+            abi_path = self.contract_abi_files.get(key)
+
+            if (
+                self.abi_bundle is not None
+                and abi_path is not None
+                and key not in self.contracts_abi
+            ):
+                layouts = self.abi_bundle.get(hash_abi_file(abi_path))
+
+            if layouts is None:
+                layouts = self.compile_event_layouts(contract_addr, blockchain)
+
+            self.event_layouts[key] = layouts
+
+        return self.event_layouts[key]
+
+    def compile_event_layouts(self, contract_addr: str, blockchain: str) -> dict:
+        return {
+            selector: tuple(
+                self.get_abi_input_types_custom(event_abi, (contract_addr, blockchain, selector))
+            )
+            for selector, event_abi in self.get_event_abis(contract_addr, blockchain).items()
+        }
+
+    def build_abi_bundle(self, abi_bundle: AbiBundle):
+        """Adds the event layouts of the ABI files of the indexed contracts to an ABI bundle."""
+        for (contract_addr, blockchain), abi_path in self.contract_abi_files.items():
+            abi_bundle.put(
+                hash_abi_file(abi_path), self.compile_event_layouts(contract_addr, blockchain)
+            )
+
+    def get_event_layout(self, contract_addr: str, blockchain: str, selector: bytes) -> tuple:
+        func_name = "get_event_layout"
+        try:
+            return self.get_event_layouts(contract_addr, blockchain)[selector]
+        except KeyError as e:
             raise CustomException(
                 self.CLASS_NAME,
                 func_name,
-                f"Error registering contract {contract_addr}: {e}",
+                f"Event with selector {selector.hex()} is not presented in contract ABI.",
             ) from e
 
-    def decode_log(self, contract: Contract, result: Dict[str, Any]):
+    def decode_log(self, contract_addr: str, blockchain: str, result: Dict[str, Any]):
         """
         whenever possible we try to use the default (and general) decoder. Whenever events
         are too complex and fail the decoding process, we relay to the individual decoders
@@ -97,12 +269,44 @@ class BridgeDecoder:
             data += [result["data"][2:]]
             data = "0x" + "".join(data)
 
-            return self.decode_event_input(contract, data)
+            return self.decode_event_input(contract_addr, blockchain, data)
         except Exception:
+            return self.decode_custom(contract_addr, blockchain, result)
+
+    def decode_custom(self, contract_addr: str, blockchain: str, result: Dict[str, Any]):
+        if self.custom_decoder is None:
             self.custom_decoder = self.load_bridge_decoder(self.bridge)
+
+        try:
+            contract = self.get_contract(contract_addr, blockchain)
             decoded_log = self.custom_decoder.decode_event(contract, result)
-            decoded_log = self.convert_bytes_to_hex(decoded_log)
-            return decoded_log
+        except Exception:
+            self.metrics.increment("custom_failures")
+            raise
+
+        self.metrics.increment("custom")
+        return self.convert_bytes_to_hex(decoded_log)
+
+    def get_decoding_plan(
+        self, contract_addr: str, blockchain: str, selector: str
+    ) -> EventDecodingPlan | None:
+        """
+        Returns the decoding plan of an event of a contract, compiled on first use. Events that
+        the generic decoder cannot decode (e.g. unknown selectors or unsupported types) have no
+        plan.
+        """
+        key = (contract_addr, blockchain, selector.lower())
+
+        if key not in self.decoding_plans:
+            try:
+                names, types = self.get_event_layout(
+                    contract_addr, blockchain, bytes.fromhex(selector[2:])
+                )
+                self.decoding_plans[key] = EventDecodingPlan(self.w3.codec, names, types)
+            except Exception:
+                self.decoding_plans[key] = None
+
+        return self.decoding_plans[key]
 
     def convert_bytes_to_hex(self, data: Any) -> Any:
         if isinstance(data, dict):
@@ -115,17 +319,16 @@ class BridgeDecoder:
             return data
 
     def decode_event_input(
-        self, contract: Contract, event_data: Union[HexStr, str]
+        self, contract_addr: str, blockchain: str, event_data: Union[HexStr, str]
     ) -> Dict[str, Any]:
         func_name = "decode_event_input"
 
         try:
             data = HexBytes(event_data)
-            selector, params = data[:32], data[32:]
+            selector, params = bytes(data[:32]), data[32:]
 
-            func_abi = self._get_event_abi_by_selector(contract, selector)
-            [names, types] = self.get_abi_input_types_custom(func_abi, selector)
-            decoded = contract.w3.codec.decode(types, params)
+            names, types = self.get_event_layout(contract_addr, blockchain, selector)
+            decoded = self.w3.codec.decode(types, params)
 
             # convert all fields from binary to hex
             decoded = self.convert_bytes_to_hex(decoded)
@@ -137,34 +340,99 @@ class BridgeDecoder:
             raise CustomException(
                 self.CLASS_NAME,
                 func_name,
-                f"Error decoding event input in contract: {contract}; and data: {event_data}; {e}",
-            ) from e
-
-    def _get_event_abi_by_selector(self, contract: Contract, selector: HexBytes) -> Dict[str, Any]:
-        func_name = "_get_event_abi_by_selector"
-        try:
-            return self.sign_abis[contract][selector]
-        except KeyError as e:
-            raise CustomException(
-                self.CLASS_NAME,
-                func_name,
-                f"Event with selector {selector.hex()} is not presented in contract ABI.",
+                f"Error decoding event input in contract: {contract_addr}; and data: "
+                f"{event_data}; {e}",
             ) from e
 
     def decode(self, contract_addr: str, blockchain: str, log_data: dict) -> dict:
         func_name = "decode"
-        if (contract_addr, blockchain) not in self.contracts.keys():
+        if not self.has_contract(contract_addr, blockchain):
             raise CustomException(
                 self.CLASS_NAME,
                 func_name,
                 f"Contract {contract_addr} not found in contracts list.",
             )
 
-        event = self.decode_log(self.contracts[(contract_addr, blockchain)], log_data)
+        if not log_data["topics"]:
+            return self.decode_custom(contract_addr, blockchain, log_data)
+
+        key = (contract_addr, blockchain, log_data["topics"][0].lower())
+        plan = self.get_decoding_plan(contract_addr, blockchain, key[2])
+
+        if key in self.custom_routes or plan is None:
+            try:
+                return self.decode_custom(contract_addr, blockchain, log_data)
+            except Exception:
+                if plan is None:
+                    raise
+                # the custom decoder does not handle every log of the event, retry the generic one
+                self.custom_routes.discard(key)
+
+        try:
+            decoded_log = plan.decode(log_data)
+            self.metrics.increment("generic")
+            return decoded_log
+        except Exception:
+            # some logs of an event fail the generic decoding (e.g. invalid pointers)
+            self.metrics.increment("generic_failures")
+
+        decoded_log = self.decode_custom(contract_addr, blockchain, log_data)
+        self.custom_routes.add(key)
+        return decoded_log
+
+    def decode_logs(self, contract_addr: str, blockchain: str, logs: list) -> list:
+        """
+        Decodes the logs of a contract, in the order of `logs`. The logs of events with static
+        layouts are decoded in bulk when there are at least BULK_DECODE_MIN_LOGS of them, and the
+        others one at a time with `decode`.
+        """
+        decoded_logs = [None] * len(logs)
+
+        by_selector = {}
+        for idx, log in enumerate(logs):
+            if log["topics"]:
+                by_selector.setdefault(log["topics"][0].lower(), []).append(idx)
+
+        for selector, idxs in by_selector.items():
+            if len(idxs) < BULK_DECODE_MIN_LOGS:
+                continue
+
+            layout = self.get_bulk_layout(contract_addr, blockchain, selector)
+            if layout is None:
+                continue
+
+            rows, _ = layout.decode_rows([logs[idx] for idx in idxs])
+            for row_idx, decoded_log in rows.items():
+                decoded_logs[idxs[row_idx]] = decoded_log
+            self.metrics.increment("bulk", len(rows))
+
+        for idx, log in enumerate(logs):
+            if decoded_logs[idx] is None:
+                decoded_logs[idx] = self.decode(contract_addr, blockchain, log)
+
+        return decoded_logs
+
+    def get_bulk_layout(
+        self, contract_addr: str, blockchain: str, selector: str
+    ) -> StaticEventLayout | None:
+        """Returns the static layout of an event of a contract, if it can be decoded in bulk."""
+        key = (contract_addr, blockchain, selector)
+
+        if key in self.custom_routes:
+            return None
+
+        if key not in self.bulk_layouts:
+            plan = None
+            if self.has_contract(contract_addr, blockchain):
+                plan = self.get_decoding_plan(contract_addr, blockchain, selector)
+
+            self.bulk_layouts[key] = (
+                StaticEventLayout.from_types(plan.names, plan.types) if plan is not None else None
+            )
 
-        return event
+        return self.bulk_layouts[key]
 
-    def get_abi_input_types_custom(self, abi_element, selector):
+    def get_abi_input_types_custom(self, abi_element, cache_key):
         """
         Extracts and orders the input names and types from an ABI element, ensuring that indexed
         and non-indexed inputs are separated and ordered correctly -- i.e., consistent with the
@@ -178,6 +446,8 @@ class BridgeDecoder:
 
         Args:
             abi_element (dict): The ABI element containing input definitions.
+            cache_key: Key of the event in the cache of ordered names and types, unique across
+              contracts (selectors are only unique within a contract).
 
         Returns:
             tuple: A tuple containing two lists:
@@ -187,8 +457,8 @@ class BridgeDecoder:
               types.
         """
 
-        if self.ordered_input_types_and_names.get(selector):
-            return self.ordered_input_types_and_names[selector]
+        if self.ordered_input_types_and_names.get(cache_key):
+            return self.ordered_input_types_and_names[cache_key]
 
         inputs = abi_element["inputs"]
 
@@ -253,7 +523,7 @@ class BridgeDecoder:
             ):
                 ordered_input_types[i] = "bytes32"
 
-        self.ordered_input_types_and_names[selector] = [
+        self.ordered_input_types_and_names[cache_key] = [
             ordered_input_names,
             ordered_input_types,
         ]
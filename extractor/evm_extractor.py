@@ -1,7 +1,19 @@
 import threading
 import time
 
-from config.constants import Bridge
+from config.constants import (
+    CHUNKING_MODES,
+    DEFAULT_CHUNKING_MODE,
+    DEFAULT_DECODE_WORKERS,
+    DEFAULT_LOG_FILTER_MODE,
+    DEFAULT_TRANSACTION_FETCH_STRATEGY,
+    GET_LOGS_MAX_ADDRESSES,
+    LOG_FILTER_MODES,
+    Bridge,
+)
+from extractor.checkpoints import Checkpoints
+from extractor.chunking import AdaptiveJobs, AdaptiveRangeSplitter, RangeProgress, split_logs
+from extractor.decode_pool import get_decode_pool
 from extractor.decoder import BridgeDecoder
 from extractor.extractor import Extractor
 from rpcs.evm_rpc_client import EvmRPCClient
@@ -9,6 +21,7 @@ from utils.utils import (
     CliColor,
     CustomException,
     build_log_message,
+    build_log_message_2,
     log_error,
     log_to_cli,
 )
@@ -17,31 +30,130 @@ from utils.utils import (
 class EvmExtractor(Extractor):
     CLASS_NAME = "EvmExtractor"
 
-    def __init__(self, bridge: Bridge, blockchain: str, blockchains: list):
-        self.rpc_client = EvmRPCClient(bridge)
-        # fetch a random rpc to initialize the decoder for the bridge
-        self.decoder = BridgeDecoder(bridge, self.rpc_client.get_random_rpc(blockchain))
+    def __init__(
+        self,
+        bridge: Bridge,
+        blockchain: str,
+        blockchains: list,
+        fetch_strategy: str = DEFAULT_TRANSACTION_FETCH_STRATEGY,
+        log_filter_mode: str = DEFAULT_LOG_FILTER_MODE,
+        max_threads: int | None = None,
+        resume: bool = False,
+        chunking: str = DEFAULT_CHUNKING_MODE,
+        decode_workers: int = DEFAULT_DECODE_WORKERS,
+    ):
+        func_name = "__init__"
+        if log_filter_mode not in LOG_FILTER_MODES:
+            raise CustomException(
+                self.CLASS_NAME, func_name, f"Unknown log filter mode {log_filter_mode}."
+            )
+        if chunking not in CHUNKING_MODES:
+            raise CustomException(self.CLASS_NAME, func_name, f"Unknown chunking mode {chunking}.")
+
+        self.rpc_client = EvmRPCClient(bridge, fetch_strategy=fetch_strategy)
+        # only the contracts of this blockchain are decoded
+        self.decoder = BridgeDecoder(bridge, [blockchain])
+        # worker processes decoding the logs, instead of the extraction threads
+        self.decode_pool = None
+        if decode_workers > 0:
+            self.decode_pool = get_decode_pool(bridge, decode_workers)
+        self.log_filter_mode = log_filter_mode
+        # share of the worker threads of the run, when several blockchains are extracted at once
+        self.max_threads = max_threads
+        # lowercase address -> [(contract, topics)] of the contracts queried by grouped filters
+        self.grouped_contracts = {}
+        # completed and failed block ranges are recorded, and only the missing ones are extracted
+        # when resuming a previous run
+        self.checkpoints = Checkpoints(bridge, blockchain)
+        self.resume = resume
+        self.chunking = chunking
 
         super().__init__(bridge, blockchain, blockchains)
 
+    def build_log_filters(self, bridge_blockchain_pairs: list) -> list:
+        """
+        Builds the (contract, topics) eth_getLogs filters of the contracts of the bridge. In the
+        "grouped" mode, `contract` is a tuple of up to GET_LOGS_MAX_ADDRESSES contracts and `topics`
+        the union of their topics, and the logs are routed back to their contract by `handle_logs`.
+        """
+        members = self.group_contracts(bridge_blockchain_pairs)
+
+        if self.log_filter_mode == "contract":
+            return members
+
+        # addresses are case-insensitive, so each contract is only queried once
+        addresses = {}
+        for contract, _ in members:
+            addresses.setdefault(contract.lower(), contract)
+        addresses = list(addresses.values())
+        log_filters = []
+
+        for idx in range(0, len(addresses), GET_LOGS_MAX_ADDRESSES):
+            group = tuple(addresses[idx : idx + GET_LOGS_MAX_ADDRESSES])
+            topics = list(
+                dict.fromkeys(
+                    topic
+                    for contract in group
+                    for _, contract_topics in self.grouped_contracts[contract.lower()]
+                    for topic in contract_topics
+                )
+            )
+            log_filters.append((group, topics))
+
+        return log_filters
+
+    def group_contracts(self, bridge_blockchain_pairs: list) -> list:
+        """
+        Returns the (contract, topics) pairs of the contracts of the bridge, indexing them by
+        address so that the logs of grouped filters can be routed back to them.
+        """
+        members = [
+            (contract, pair["topics"])
+            for pair in bridge_blockchain_pairs
+            for contract in pair["contracts"]
+        ]
+
+        self.grouped_contracts = {}
+        for contract, topics in members:
+            self.grouped_contracts.setdefault(contract.lower(), []).append((contract, topics))
+
+        return members
+
+    def route_logs(self, logs: list) -> list:
+        """
+        Splits the logs of a grouped filter into the (contract, topics, logs) of each contract
+        that asked for them, dropping the logs of topics that their contract did not ask for.
+        """
+        routed = {}
+
+        for log in logs:
+            for contract, topics in self.grouped_contracts.get(log["address"].lower(), []):
+                if log["topics"][0].lower() in (topic.lower() for topic in topics):
+                    key = (contract, tuple(topics))
+                    routed.setdefault(key, []).append(log)
+
+        return [(contract, list(topics), logs) for (contract, topics), logs in routed.items()]
+
     def worker(self):
         """Worker function for threads to process block ranges."""
         while not self.task_queue.empty():
             try:
                 contract, topics, start_block, end_block = self.task_queue.get()
 
-                self.work(
+                num_logs = self.work(
                     contract,
                     topics,
                     start_block,
                     end_block,
                 )
-            except CustomException as e:
+                self.checkpoints.complete(contract, topics, start_block, end_block, num_logs)
+            except Exception as e:
                 request_desc = (
                     f"Error processing request: {self.bridge}, {self.blockchain}, {start_block}, "
                     f"{end_block}, {contract}, {topics}. Error: {e}"
                 )
                 log_error(self.bridge, request_desc)
+                self.checkpoints.fail(contract, topics, start_block, end_block, e)
             finally:
                 self.task_queue.task_done()
 
@@ -51,7 +163,8 @@ class EvmExtractor(Extractor):
         topics: list,
         start_block: int,
         end_block: int,
-    ):
+    ) -> int:
+        """Extracts the logs of a block range and their transactions. Returns the number of logs."""
         log_to_cli(
             build_log_message(
                 start_block,
@@ -67,15 +180,69 @@ class EvmExtractor(Extractor):
             self.blockchain, contract, topics, start_block, end_block
         )
 
+        self.process_logs(contract, topics, start_block, end_block, logs)
+
+        return len(logs)
+
+    def process_logs(
+        self,
+        contract: str,
+        topics: list,
+        start_block: int,
+        end_block: int,
+        logs: list,
+    ):
+        """Handles the logs of a block range, and fetches and stores their transactions."""
         if len(logs) == 0:
             return
 
-        decoded_logs = []
-        txs = {}
+        pending_txs = self.handle_logs(contract, topics, start_block, end_block, logs)
 
-        for log in logs:
-            decoded_log = self.decoder.decode(contract, self.blockchain, log)
+        if len(pending_txs) > 0:
+            # a failure to fetch the transactions fails the whole block range, so that it can be
+            # retried later
+            fetched_txs = self.rpc_client.process_transactions(
+                self.blockchain, list(pending_txs.items())
+            )
+
+            self.handle_fetched_transactions(contract, topics, start_block, end_block, fetched_txs)
+
+    def handle_logs(
+        self,
+        contract: str,
+        topics: list,
+        start_block: int,
+        end_block: int,
+        logs: list,
+    ) -> dict:
+        """
+        Decodes the logs of a block range and hands them to the bridge handler. Returns the
+        transactions (tx_hash -> block_number) of the included logs that are not in the repository
+        yet, which must be fetched. The logs of grouped filters are handled per contract.
+        """
+        if isinstance(contract, tuple):
+            pending_txs = {}
+            for member, member_topics, member_logs in self.route_logs(logs):
+                pending_txs.update(
+                    self.handle_logs(member, member_topics, start_block, end_block, member_logs)
+                )
+            return pending_txs
+
+        decoded_logs = self.decode_logs(contract, logs)
 
+        return self.persist_logs(contract, topics, start_block, end_block, decoded_logs)
+
+    def decode_logs(self, contract: str, logs: list) -> list:
+        """Decodes the logs of a contract, adding the data the handler needs to store them."""
+        self.metrics.increment("events", len(logs))
+        if self.decode_pool is not None:
+            decoded = self.decode_pool.decode(contract, self.blockchain, logs, self.decoder.metrics)
+        else:
+            decoded = self.decoder.decode_logs(contract, self.blockchain, logs)
+
+        decoded_logs = []
+
+        for log, decoded_log in zip(logs, decoded):
             # we take the decoded log and append more data to it, such that the handler can insert
             #  in the right DB table
             decoded_log["transaction_hash"] = log["transactionHash"]
@@ -84,46 +251,99 @@ class EvmExtractor(Extractor):
             decoded_log["topic"] = log["topics"][0]
             decoded_logs.append(decoded_log)
 
+        return decoded_logs
+
+    def persist_logs(
+        self,
+        contract: str,
+        topics: list,
+        start_block: int,
+        end_block: int,
+        decoded_logs: list,
+    ) -> dict:
+        """
+        Hands the decoded logs of a contract to the bridge handler. Returns the transactions
+        (tx_hash -> block_number) of the included logs that are not in the repository yet.
+        """
         included_logs = self.handler.handle_events(
             self.blockchain, start_block, end_block, contract, topics, decoded_logs
         )
 
+        # to avoid processing the same transaction multiple times we ignore the ones already in
+        #  the repository, and fetch the remaining ones in batch
+        pending_txs = {}
         for log in included_logs:
             tx_hash = log["transaction_hash"]
 
-            # to avoid processing the same transaction multiple times we ignore if already in the
-            #  repository
             try:
-                if self.handler.does_transaction_exist_by_hash(tx_hash):
+                if tx_hash in pending_txs or self.transaction_index.contains(tx_hash):
                     continue
 
-                tx, block = self.rpc_client.process_transaction(
-                    self.blockchain, log["transaction_hash"], log["block_number"]
+                pending_txs[tx_hash] = log["block_number"]
+            except Exception as e:
+                request_desc = (
+                    f"Error processing request: {self.blockchain}, {start_block}, {end_block}, "
+                    f"{contract}, {topics}. Error: {e}"
                 )
+                log_error(self.bridge, request_desc)
+
+        return pending_txs
+
+    def handle_fetched_transactions(
+        self,
+        contract: str,
+        topics: list,
+        start_block: int,
+        end_block: int,
+        fetched_txs: dict,
+    ):
+        """
+        Builds the transaction objects from the fetched (receipt, block) pairs, indexed by tx_hash,
+        and stores them through the bridge handler. Transactions already stored (e.g. by the
+        concurrent call that fetched them) are skipped, and the others stored here, so that the
+        block range is only complete once all its transactions are stored.
+        """
+        txs = {}
+
+        for tx_hash, (tx, block) in fetched_txs.items():
+            try:
+                if self.transaction_index.contains(tx_hash):
+                    continue
 
-                if tx is None or block is None:
-                    raise Exception(tx_hash)
+                if not tx or not block:
+                    raise CustomException(
+                        self.CLASS_NAME,
+                        "handle_fetched_transactions",
+                        f"Missing receipt or block for {tx_hash}",
+                    )
 
                 txs[tx_hash] = self.handler.create_transaction_object(
                     self.blockchain, tx, block["timestamp"]
                 )
-
             except CustomException as e:
                 request_desc = (
-                    f"Error processing request: {self.blockchain}, {start_block}, {end_block}, "
-                    f"{contract}, {topics}. Error: {e}"
+                    f"Error processing request: {self.blockchain}, {start_block}, "
+                    f"{end_block}, {contract}, {topics}. Error: {e}"
                 )
                 log_error(self.bridge, request_desc)
 
         if len(txs) > 0:
             try:
                 self.handler.handle_transactions(txs.values())
+                self.transaction_index.add(txs.keys())
             except CustomException:
                 # if there is an error while handling transactions in batch, we handle them one
                 # by one to avoid the entire batch failing
-                for tx in txs.values():
+                for tx_hash, tx in txs.items():
                     try:
+                        # it may have been stored by a concurrent call meanwhile
+                        if self.transaction_index.contains(tx_hash):
+                            continue
+                        # or by another process after the index was loaded, making the batch fail
+                        if self.transaction_index.check_stored(tx_hash):
+                            continue
                         self.handler.handle_transaction(tx)
+                        self.transaction_index.add([tx_hash])
                     except CustomException as e:
                         request_desc = (
                             f"Error processing transaction: {self.blockchain}, "
@@ -139,64 +359,311 @@ class EvmExtractor(Extractor):
             self.bridge, self.blockchain
         )
 
-        for pair in bridge_blockchain_pairs:
-            for contract in pair["contracts"]:
-                threads = []
+        num_threads = self.num_threads()
 
-                start_time = time.time()
-                topics = pair["topics"]
+        for contract, topics in self.build_log_filters(bridge_blockchain_pairs):
+            start_time = time.time()
 
-                num_threads = self.rpc_client.max_threads_per_blockchain(self.blockchain) * 2
+            if self.chunking == "adaptive":
+                self.extract_filter_adaptive(contract, topics, start_block, end_block, num_threads)
+            else:
+                self.extract_filter_static(contract, topics, start_block, end_block, num_threads)
 
-                chunk_size = max(
-                    1, min((end_block - start_block + num_threads - 1) // num_threads, 1000)
-                )
+            end_time = time.time()
 
-                block_ranges = self.divide_range(start_block, end_block - 1, chunk_size)
-
-                # Populate the task queue
-                for start, end in block_ranges:
-                    self.task_queue.put((contract, topics, start, end))
-
-                # Create and start threads
-                log_to_cli(
-                    build_log_message(
-                        start_block,
-                        end_block,
-                        contract,
-                        self.bridge,
-                        self.blockchain,
-                        (
-                            f"Launching {num_threads} threads to process {len(block_ranges)} block "
-                            f"ranges...",
-                        ),
-                    )
-                )
-                for i in range(num_threads):
-                    thread = threading.Thread(target=self.worker, name=f"thread_id_{i}")
-                    thread.start()
-                    threads.append(thread)
-
-                # Wait for all threads to complete
-                self.task_queue.join()
-                for thread in threads:
-                    thread.join()
-
-                threads.clear()
-
-                end_time = time.time()
-
-                log_to_cli(
-                    build_log_message(
-                        start_block,
-                        end_block,
-                        contract,
-                        self.bridge,
-                        self.blockchain,
-                        (
-                            f"Finished processing logs and transactions. Time taken: "
-                            f"{end_time - start_time} seconds.",
-                        ),
+            log_to_cli(
+                build_log_message(
+                    start_block,
+                    end_block,
+                    contract,
+                    self.bridge,
+                    self.blockchain,
+                    (
+                        f"Finished processing logs and transactions. Time taken: "
+                        f"{end_time - start_time} seconds.",
                     ),
-                    CliColor.SUCCESS,
-                )
+                ),
+                CliColor.SUCCESS,
+            )
+
+        log_to_cli(
+            build_log_message_2(
+                start_block,
+                end_block,
+                self.bridge,
+                self.blockchain,
+                f"RPC calls to fetch transactions -- {self.rpc_client.metrics.summary()}",
+            ),
+            CliColor.SUCCESS,
+        )
+
+        log_to_cli(
+            build_log_message_2(
+                start_block,
+                end_block,
+                self.bridge,
+                self.blockchain,
+                f"Decoded logs -- {self.decoder.metrics.summary()}",
+            ),
+            CliColor.SUCCESS,
+        )
+
+        self.log_endpoint_stats(self.rpc_client, start_block, end_block)
+
+    def extract_filter_static(
+        self, contract, topics: list, start_block: int, end_block: int, num_threads: int
+    ):
+        """Extracts the logs of a filter in block ranges of the same size, assigned up front."""
+        chunk_size = max(1, min((end_block - start_block + num_threads - 1) // num_threads, 1000))
+
+        if start_block == end_block:
+            # a single block, e.g. polled by the follower, is not covered by divide_range
+            block_ranges = [(start_block, end_block)]
+        else:
+            block_ranges = self.divide_range(start_block, end_block - 1, chunk_size)
+
+        if self.resume:
+            # ranges are fetched including their end block, as recorded in the checkpoints
+            block_ranges = self.checkpoints.missing_ranges(contract, topics, block_ranges)
+
+        # Create and start threads
+        log_to_cli(
+            build_log_message(
+                start_block,
+                end_block,
+                contract,
+                self.bridge,
+                self.blockchain,
+                (
+                    f"Launching {num_threads} threads to process {len(block_ranges)} block "
+                    f"ranges...",
+                ),
+            )
+        )
+
+        self.process_tasks(
+            [(contract, topics, start, end) for start, end in block_ranges], num_threads
+        )
+
+    def extract_filter_adaptive(
+        self, contract, topics: list, start_block: int, end_block: int, num_threads: int
+    ):
+        """
+        Extracts the logs of a filter in block ranges sized by their expected number of logs (see
+        AdaptiveRangeSplitter), handed out to the worker threads as they become idle.
+        """
+        block_ranges = [(start_block, end_block)]
+        if self.resume:
+            block_ranges = self.checkpoints.missing_ranges(contract, topics, block_ranges)
+
+        splitter = AdaptiveRangeSplitter(
+            block_ranges, num_threads, self.checkpoints.get_history(contract, topics)
+        )
+        # sub-ranges of dense block ranges, processed by any idle thread
+        jobs = AdaptiveJobs()
+
+        log_to_cli(
+            build_log_message(
+                start_block,
+                end_block,
+                contract,
+                self.bridge,
+                self.blockchain,
+                f"Launching {num_threads} threads to process adaptive block ranges...",
+            )
+        )
+
+        threads = []
+        for i in range(num_threads):
+            thread = threading.Thread(
+                target=self.adaptive_worker,
+                args=(contract, topics, splitter, jobs),
+                name=f"thread_id_{i}",
+            )
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+    def adaptive_worker(
+        self, contract, topics: list, splitter: AdaptiveRangeSplitter, jobs: AdaptiveJobs
+    ):
+        """
+        Worker function for threads to process adaptive block ranges. Sub-ranges of dense ranges
+        left by other threads are processed before fetching a new range, and threads only exit
+        once no other thread is fetching a range that may still leave sub-ranges.
+        """
+        while True:
+            job, block_range = jobs.get(splitter)
+            if job is None and block_range is None:
+                return
+
+            if block_range is not None:
+                try:
+                    job = self.fetch_range(contract, topics, *block_range, splitter, jobs)
+                finally:
+                    jobs.fetched()
+                if job is None:
+                    continue
+
+            self.process_job(contract, topics, job)
+
+    def fetch_range(
+        self,
+        contract,
+        topics: list,
+        start_block: int,
+        end_block: int,
+        splitter: AdaptiveRangeSplitter,
+        jobs: AdaptiveJobs,
+    ) -> tuple | None:
+        """
+        Fetches the logs of a block range and splits them in sub-ranges, leaving all but the first
+        one to other threads. Returns the (start_block, end_block, progress, sub-range) job of the
+        first one, or None if there is nothing to process.
+        """
+        log_to_cli(
+            build_log_message(
+                start_block,
+                end_block,
+                contract,
+                self.bridge,
+                self.blockchain,
+                "Processing logs and transactions...",
+            )
+        )
+
+        try:
+            logs = self.rpc_client.get_logs_emitted_by_contract(
+                self.blockchain, contract, topics, start_block, end_block
+            )
+        except Exception as e:
+            request_desc = (
+                f"Error processing request: {self.bridge}, {self.blockchain}, {start_block}, "
+                f"{end_block}, {contract}, {topics}. Error: {e}"
+            )
+            log_error(self.bridge, request_desc)
+            self.checkpoints.fail(contract, topics, start_block, end_block, e)
+            return None
+
+        splitter.record(start_block, end_block, len(logs))
+
+        if len(logs) == 0:
+            self.checkpoints.complete(contract, topics, start_block, end_block, 0)
+            return None
+
+        parts = split_logs(start_block, end_block, logs)
+        progress = RangeProgress(len(parts), len(logs))
+        for part in parts[1:]:
+            jobs.put((start_block, end_block, progress, part))
+
+        return start_block, end_block, progress, parts[0]
+
+    def process_job(self, contract, topics: list, job: tuple):
+        """Processes a sub-range, and checkpoints its block range once all sub-ranges are done."""
+        range_start, range_end, progress, (start_block, end_block, logs) = job
+        error = None
+
+        try:
+            self.process_logs(contract, topics, start_block, end_block, logs)
+        except Exception as e:
+            request_desc = (
+                f"Error processing request: {self.bridge}, {self.blockchain}, {start_block}, "
+                f"{end_block}, {contract}, {topics}. Error: {e}"
+            )
+            log_error(self.bridge, request_desc)
+            error = e
+
+        if not progress.done(error):
+            return
+
+        if progress.error is None:
+            self.checkpoints.complete(contract, topics, range_start, range_end, progress.num_logs)
+        else:
+            self.checkpoints.fail(contract, topics, range_start, range_end, progress.error)
+
+    def num_threads(self) -> int:
+        num_threads = self.rpc_client.max_threads_per_blockchain(self.blockchain) * 2
+        if self.max_threads is not None:
+            num_threads = min(num_threads, self.max_threads)
+        return num_threads
+
+    def process_tasks(self, tasks: list, num_threads: int):
+        """Processes the (contract, topics, start_block, end_block) tasks with worker threads."""
+        threads = []
+
+        # Populate the task queue
+        for task in tasks:
+            self.task_queue.put(task)
+
+        for i in range(num_threads):
+            thread = threading.Thread(target=self.worker, name=f"thread_id_{i}")
+            thread.start()
+            threads.append(thread)
+
+        # Wait for all threads to complete
+        self.task_queue.join()
+        for thread in threads:
+            thread.join()
+
+    def extract_ranges(self, tasks: list):
+        """
+        Extracts the given (contract, topics, start_block, end_block) block ranges, e.g. the ones
+        that failed in previous runs. Contracts may be grouped filters of any log filter mode.
+        """
+        if len(tasks) == 0:
+            return
+
+        bridge_blockchain_pairs = self.handler.get_bridge_contracts_and_topics(
+            self.bridge, self.blockchain
+        )
+        self.group_contracts(bridge_blockchain_pairs)
+
+        start_block = min(task[2] for task in tasks)
+        end_block = max(task[3] for task in tasks)
+        num_threads = self.num_threads()
+
+        log_to_cli(
+            build_log_message_2(
+                start_block,
+                end_block,
+                self.bridge,
+                self.blockchain,
+                f"Launching {num_threads} threads to retry {len(tasks)} block ranges...",
+            )
+        )
+
+        start_time = time.time()
+        self.process_tasks(tasks, num_threads)
+        end_time = time.time()
+
+        log_to_cli(
+            build_log_message_2(
+                start_block,
+                end_block,
+                self.bridge,
+                self.blockchain,
+                (
+                    f"Finished processing logs and transactions. Time taken: "
+                    f"{end_time - start_time} seconds."
+                ),
+            ),
+            CliColor.SUCCESS,
+        )
+
+        self.log_endpoint_stats(self.rpc_client, start_block, end_block)
+
+    def log_endpoint_stats(self, rpc_client, start_block: int, end_block: int):
+        """Logs the health statistics of each RPC endpoint used by `rpc_client`."""
+        for rpc, stats in rpc_client.get_endpoint_stats(self.blockchain).items():
+            log_to_cli(
+                build_log_message_2(
+                    start_block,
+                    end_block,
+                    self.bridge,
+                    self.blockchain,
+                    f"RPC endpoint {rpc} -- {stats}",
+                ),
+                CliColor.INFO,
+            )
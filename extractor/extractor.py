@@ -4,6 +4,8 @@ from queue import Queue
 from urllib.request import BaseHandler
 
 from config.constants import Bridge
+from extractor.transaction_index import get_transaction_hash_index
+from utils.metrics import Metrics
 from utils.utils import (
     CliColor,
     CustomException,
@@ -29,6 +31,7 @@ class Extractor(ABC):
         rpc_client (RPCClient): Client for interacting with blockchain RPC endpoints.
         decoder (BridgeDecoder): Decoder for parsing logs specific to the bridge.
         handler (BaseHandler): Handler for processing and storing extracted data.
+        metrics (Metrics): Counters of the extracted events.
 
     Methods:
         __init__(self, bridge: Bridge, blockchain: str):
@@ -60,9 +63,15 @@ class Extractor(ABC):
         self.threads = []
         self.blockchain = blockchain
         self.bridge = bridge
+        # counters of the extracted events, reported by benchmarks
+        self.metrics = Metrics()
 
         # load the bridge handler and initiate a DB session
         self.handler = self.load_handler(blockchains)
+        # hashes of the stored transactions, to skip the ones already stored without a DB query
+        self.transaction_index = get_transaction_hash_index(
+            bridge, blockchain, self.handler.blockchain_transaction_repo
+        )
 
     def load_handler(self, blockchains: list) -> BaseHandler:
         """Dynamically loads the handler for the specified bridge."""
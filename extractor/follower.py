@@ -0,0 +1,212 @@
+import json
+import threading
+
+from config.constants import (
+    FOLLOW_HASH_HISTORY,
+    FOLLOW_MAX_RANGE_BLOCKS,
+    FOLLOW_POLL_SECONDS,
+    RPC_CACHE_DEFAULT_FINALITY_BLOCKS,
+    RPC_CACHE_FINALITY_BLOCKS,
+)
+from extractor.evm_extractor import EvmExtractor
+from repository.common.repository import ExtractionCheckpointRepository, FollowStateRepository
+from repository.database import DBSession
+from utils.metrics import Metrics
+from utils.utils import (
+    CliColor,
+    CustomException,
+    build_log_message_2,
+    log_error,
+    log_to_cli,
+)
+
+
+class ChainFollower:
+    """
+    Keeps the extraction of a bridge on a blockchain up to date, `confirmations` blocks behind the
+    latest block. On each poll, the blocks confirmed since the last poll are extracted and the hash
+    of the last one is recorded.
+
+    Before extracting, the recorded hashes are checked against the current chain. When they differ
+    (a reorg deeper than `confirmations`), the rows extracted after the last block still in the
+    chain are deleted, and those blocks are extracted again.
+    """
+
+    CLASS_NAME = "ChainFollower"
+
+    def __init__(
+        self,
+        extractor: EvmExtractor,
+        confirmations: int | None = None,
+        start_block: int | None = None,
+        repository=None,
+        checkpoint_repository=None,
+    ):
+        self.extractor = extractor
+        self.bridge = extractor.bridge
+        self.blockchain = extractor.blockchain
+        self.rpc_client = extractor.rpc_client
+        if confirmations is None:
+            confirmations = RPC_CACHE_FINALITY_BLOCKS.get(
+                self.blockchain, RPC_CACHE_DEFAULT_FINALITY_BLOCKS
+            )
+        self.confirmations = confirmations
+        # first block extracted when the blockchain was never followed (the confirmed head if None)
+        self.start_block = start_block
+        self.repository = repository or FollowStateRepository(DBSession)
+        self.checkpoint_repository = checkpoint_repository or ExtractionCheckpointRepository(
+            DBSession
+        )
+        self.metrics = Metrics()
+
+    def load_state(self) -> tuple:
+        """Returns the last extracted block (None if never followed) and the recorded hashes."""
+        state = self.repository.get_state(self.bridge.value, self.blockchain)
+        if state is None:
+            return None, []
+
+        return state.last_block, [tuple(item) for item in json.loads(state.block_hashes)]
+
+    def save_state(self, last_block: int, block_hashes: list):
+        self.repository.save_state(
+            self.bridge.value,
+            self.blockchain,
+            last_block,
+            json.dumps([list(item) for item in block_hashes[-FOLLOW_HASH_HISTORY:]]),
+        )
+
+    def get_block_hash(self, block: int) -> str:
+        func_name = "get_block_hash"
+
+        block_hash = self.rpc_client.get_block_hash(self.blockchain, block)
+        if block_hash is None:
+            raise CustomException(
+                self.CLASS_NAME, func_name, f"Block {block} of {self.blockchain} not found"
+            )
+
+        return block_hash
+
+    def poll(self) -> int:
+        """
+        Extracts (up to FOLLOW_MAX_RANGE_BLOCKS of) the blocks confirmed since the last poll, after
+        handling reorgs. Returns the number of blocks extracted.
+        """
+        safe_block = self.rpc_client.get_latest_block_number(self.blockchain) - self.confirmations
+        last_block, block_hashes = self.load_state()
+
+        if last_block is None:
+            if self.start_block is None:
+                # nothing to catch up with: start following from the confirmed head
+                self.save_state(safe_block, [(safe_block, self.get_block_hash(safe_block))])
+                return 0
+            last_block = self.start_block - 1
+        else:
+            last_block, block_hashes = self.handle_reorgs(last_block, block_hashes)
+
+        if safe_block <= last_block:
+            return 0
+
+        end_block = min(safe_block, last_block + FOLLOW_MAX_RANGE_BLOCKS)
+
+        self.extractor.extract_data(last_block + 1, end_block)
+        self.retry_failed_ranges(last_block + 1, end_block)
+
+        block_hashes.append((end_block, self.get_block_hash(end_block)))
+        self.save_state(end_block, block_hashes)
+        self.metrics.increment("blocks", end_block - last_block)
+
+        return end_block - last_block
+
+    def get_failed_ranges(self, start_block: int, end_block: int) -> list:
+        """Returns the parts of the failed (contract, topics, start, end) ranges in the blocks."""
+        failed_ranges = self.extractor.checkpoints.failed_ranges()
+        return [
+            (contract, topics, max(range_start, start_block), min(range_end, end_block))
+            for contract, topics, range_start, range_end in failed_ranges
+            if range_start <= end_block and range_end >= start_block
+        ]
+
+    def retry_failed_ranges(self, start_block: int, end_block: int):
+        """
+        Extracts again the ranges of the polled blocks that failed. If some still fail, the poll
+        fails too, so that the state is not moved past them and the blocks are polled again.
+        """
+        func_name = "retry_failed_ranges"
+
+        failed_ranges = self.get_failed_ranges(start_block, end_block)
+        if not failed_ranges:
+            return
+
+        self.metrics.increment("retried_ranges", len(failed_ranges))
+        self.extractor.extract_ranges(failed_ranges)
+
+        failed_ranges = self.get_failed_ranges(start_block, end_block)
+        if failed_ranges:
+            raise CustomException(
+                self.CLASS_NAME,
+                func_name,
+                f"{len(failed_ranges)} ranges of blocks {start_block}-{end_block} of "
+                f"{self.blockchain} failed, they will be extracted again",
+            )
+
+    def handle_reorgs(self, last_block: int, block_hashes: list) -> tuple:
+        """
+        Finds the last recorded block still in the chain, and rolls back the blocks after it.
+        Returns the last block to keep and its recorded hashes.
+        """
+        if not block_hashes:
+            return last_block, block_hashes
+
+        kept = 0
+        for idx in range(len(block_hashes) - 1, -1, -1):
+            block, block_hash = block_hashes[idx]
+            if self.get_block_hash(block) == block_hash:
+                kept = idx + 1
+                break
+
+        if kept == len(block_hashes):
+            return last_block, block_hashes
+
+        if kept > 0:
+            fork_block = block_hashes[kept - 1][0]
+        else:
+            # none of the recorded blocks is in the chain anymore
+            fork_block = block_hashes[0][0] - self.confirmations
+
+        self.rollback(fork_block, last_block)
+        block_hashes = block_hashes[:kept]
+        self.save_state(fork_block, block_hashes)
+
+        return fork_block, block_hashes
+
+    def rollback(self, fork_block: int, last_block: int):
+        deleted = self.repository.rollback_blocks(self.bridge.value, self.blockchain, fork_block)
+        # the hashes of the deleted transactions are loaded again without them
+        self.extractor.transaction_index.invalidate()
+        self.checkpoint_repository.delete_ranges_after(
+            self.bridge.value, self.blockchain, fork_block
+        )
+        self.metrics.increment("reorgs")
+
+        log_to_cli(
+            build_log_message_2(
+                fork_block + 1,
+                last_block,
+                self.bridge,
+                self.blockchain,
+                f"Reorg detected: {deleted} rows rolled back, blocks will be extracted again.",
+            ),
+            CliColor.WARNING,
+        )
+
+    def run(self, stop: threading.Event):
+        """Polls the blockchain until `stop` is set. Catching up is done without waiting."""
+        while not stop.is_set():
+            try:
+                blocks = self.poll()
+            except Exception as e:
+                log_error(self.bridge, f"Error following {self.blockchain}. Error: {e}")
+                blocks = 0
+
+            if blocks < FOLLOW_MAX_RANGE_BLOCKS:
+                stop.wait(FOLLOW_POLL_SECONDS)
@@ -0,0 +1,110 @@
+import threading
+from queue import Empty, Queue
+
+from utils.metrics import Metrics
+
+# marks the end of the items of a stage
+_DONE = object()
+
+
+class PipelineStage:
+    def __init__(self, name: str, func, workers: int, batch_size: int | None = None):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.running_workers = 0
+        self.lock = threading.Lock()
+
+
+class Pipeline:
+    """
+    Chain of stages run by their own worker threads and connected by bounded queues, so that a
+    slow stage blocks the stages feeding it (backpressure) instead of accumulating items in memory.
+
+    Each stage function receives an item (or a list of up to `batch_size` items, for batched
+    stages) and returns the items passed on to the next stage (or None). Exceptions raised by a
+    stage function are passed to `on_error` and only drop the item that raised them.
+    """
+
+    def __init__(self, queue_size: int, on_error=None):
+        self.queue_size = queue_size
+        self.on_error = on_error
+        self.stages = []
+        self.metrics = Metrics()
+
+    def add_stage(self, name: str, func, workers: int = 1, batch_size: int | None = None):
+        self.stages.append(PipelineStage(name, func, workers, batch_size))
+        return self
+
+    def run(self, items):
+        """Feeds the items to the first stage, and returns once all stages processed them."""
+        queues = [Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = []
+
+        for idx, stage in enumerate(self.stages):
+            stage.running_workers = stage.workers
+            output = queues[idx + 1] if idx + 1 < len(queues) else None
+            next_stage = self.stages[idx + 1] if idx + 1 < len(self.stages) else None
+
+            for worker in range(stage.workers):
+                thread = threading.Thread(
+                    target=self.work,
+                    args=(stage, queues[idx], output, next_stage),
+                    name=f"{stage.name}_{worker}",
+                )
+                thread.start()
+                threads.append(thread)
+
+        for item in items:
+            queues[0].put(item)
+
+        for _ in range(self.stages[0].workers):
+            queues[0].put(_DONE)
+
+        for thread in threads:
+            thread.join()
+
+    def work(self, stage: PipelineStage, input: Queue, output: Queue | None, next_stage):
+        done = False
+
+        while not done:
+            item = input.get()
+            if item is _DONE:
+                break
+
+            if stage.batch_size:
+                batch = [item]
+                while len(batch) < stage.batch_size:
+                    try:
+                        item = input.get_nowait()
+                    except Empty:
+                        break
+                    if item is _DONE:
+                        done = True
+                        break
+                    batch.append(item)
+                item = batch
+
+            try:
+                results = stage.func(item)
+            except Exception as e:
+                self.metrics.increment(f"{stage.name}_errors")
+                if self.on_error is not None:
+                    self.on_error(stage.name, item, e)
+                continue
+
+            self.metrics.increment(stage.name, len(item) if stage.batch_size else 1)
+
+            if output is not None:
+                for result in results or ():
+                    output.put(result)
+
+        # the last worker of the stage to finish tells the workers of the next stage to stop
+        with stage.lock:
+            stage.running_workers -= 1
+            last_worker = stage.running_workers == 0
+
+        if last_worker and output is not None:
+            for _ in range(next_stage.workers):
+                output.put(_DONE)
@@ -0,0 +1,281 @@
+import threading
+import time
+
+from config.constants import (
+    DEFAULT_CHUNKING_MODE,
+    DEFAULT_DECODE_WORKERS,
+    DEFAULT_LOG_FILTER_MODE,
+    DEFAULT_TRANSACTION_FETCH_STRATEGY,
+    PIPELINE_DECODE_WORKERS,
+    PIPELINE_PERSIST_WORKERS,
+    PIPELINE_QUEUE_SIZE,
+    PIPELINE_WRITER_BATCH_SIZE,
+    PIPELINE_WRITER_WORKERS,
+    Bridge,
+)
+from extractor.evm_extractor import EvmExtractor
+from extractor.pipeline import Pipeline
+from utils.utils import (
+    CliColor,
+    build_log_message_2,
+    log_error,
+    log_to_cli,
+)
+
+
+class PipelineEvmExtractor(EvmExtractor):
+    """
+    Extractor that streams the block ranges of all contracts through a pipeline of stages, so that
+    the RPC requests of some ranges overlap with the database writes of others:
+
+    1. fetch_logs: fetches the logs of a block range
+    2. decode: decodes the logs (routed to their contract, for grouped filters)
+    3. persist: stores the decoded logs through the bridge handler, keeping the transactions that
+       are not in the repository yet
+    4. fetch_transactions: fetches the receipts and blocks of those transactions
+    5. write: stores the transactions, in batches of up to PIPELINE_WRITER_BATCH_SIZE ranges
+
+    Stages are connected by queues of at most PIPELINE_QUEUE_SIZE items, so the slowest stage sets
+    the pace of the others and memory stays bounded. The RPC stages use as many workers as the
+    threads engine, and the others PIPELINE_*_WORKERS.
+    """
+
+    CLASS_NAME = "PipelineEvmExtractor"
+
+    def __init__(
+        self,
+        bridge: Bridge,
+        blockchain: str,
+        blockchains: list,
+        fetch_strategy: str = DEFAULT_TRANSACTION_FETCH_STRATEGY,
+        log_filter_mode: str = DEFAULT_LOG_FILTER_MODE,
+        max_threads: int | None = None,
+        resume: bool = False,
+        chunking: str = DEFAULT_CHUNKING_MODE,
+        decode_workers: int = DEFAULT_DECODE_WORKERS,
+    ):
+        super().__init__(
+            bridge,
+            blockchain,
+            blockchains,
+            fetch_strategy,
+            log_filter_mode,
+            max_threads,
+            resume,
+            chunking,
+            decode_workers,
+        )
+        # task -> number of its items still in the pipeline, task -> number of its logs, and
+        # task -> error of failed tasks
+        self.pending_items = {}
+        self.task_logs = {}
+        self.task_errors = {}
+        self.tasks_lock = threading.Lock()
+
+    def build_pipeline(self, rpc_workers: int) -> Pipeline:
+        return (
+            Pipeline(PIPELINE_QUEUE_SIZE, on_error=self.log_stage_error)
+            .add_stage("fetch_logs", self.tracked(self.fetch_logs_stage), rpc_workers)
+            .add_stage("decode", self.tracked(self.decode_stage), PIPELINE_DECODE_WORKERS)
+            .add_stage("persist", self.tracked(self.persist_stage), PIPELINE_PERSIST_WORKERS)
+            .add_stage(
+                "fetch_transactions", self.tracked(self.fetch_transactions_stage), rpc_workers
+            )
+            .add_stage(
+                "write",
+                self.tracked(self.write_stage, batched=True),
+                PIPELINE_WRITER_WORKERS,
+                batch_size=PIPELINE_WRITER_BATCH_SIZE,
+            )
+        )
+
+    def tracked(self, func, batched: bool = False):
+        """Wraps a stage function to keep count of the items of each task in the pipeline."""
+
+        def run(item):
+            results = func(item) or []
+
+            if batched:
+                for batch_item in item:
+                    self.update_task(batch_item[5], 0)
+            else:
+                # items derive from a single item, so they belong to its task
+                self.update_task(item[5], len(results))
+
+            return results
+
+        return run
+
+    def start_task(self, task: tuple) -> tuple:
+        contract, topics, start_block, end_block = task
+        with self.tasks_lock:
+            self.pending_items[task] = 1
+        return contract, list(topics), start_block, end_block, None, task
+
+    def update_task(self, task: tuple, produced_items: int, error: Exception | None = None):
+        """
+        Replaces an item of the task by the `produced_items` items derived from it, and records
+        the status of the task once none of its items are left.
+        """
+        with self.tasks_lock:
+            self.pending_items[task] += produced_items - 1
+            if error is not None:
+                self.task_errors.setdefault(task, error)
+
+            if self.pending_items[task] > 0:
+                return
+
+            del self.pending_items[task]
+            num_logs = self.task_logs.pop(task, 0)
+            error = self.task_errors.pop(task, None)
+
+        contract, topics, start_block, end_block = task
+        if error is None:
+            self.checkpoints.complete(contract, list(topics), start_block, end_block, num_logs)
+        else:
+            self.checkpoints.fail(contract, list(topics), start_block, end_block, error)
+
+    def fetch_logs_stage(self, item: tuple) -> list:
+        contract, topics, start_block, end_block, _, task = item
+
+        logs = self.rpc_client.get_logs_emitted_by_contract(
+            self.blockchain, contract, topics, start_block, end_block
+        )
+        with self.tasks_lock:
+            self.task_logs[task] = self.task_logs.get(task, 0) + len(logs)
+
+        return [(contract, topics, start_block, end_block, logs, task)] if logs else []
+
+    def decode_stage(self, item: tuple) -> list:
+        contract, topics, start_block, end_block, logs, task = item
+
+        if isinstance(contract, tuple):
+            routed_logs = self.route_logs(logs)
+        else:
+            routed_logs = [(contract, topics, logs)]
+
+        return [
+            (
+                member,
+                member_topics,
+                start_block,
+                end_block,
+                self.decode_logs(member, member_logs),
+                task,
+            )
+            for member, member_topics, member_logs in routed_logs
+        ]
+
+    def persist_stage(self, item: tuple) -> list:
+        contract, topics, start_block, end_block, decoded_logs, task = item
+
+        pending_txs = self.persist_logs(contract, topics, start_block, end_block, decoded_logs)
+
+        if not pending_txs:
+            return []
+
+        return [(contract, topics, start_block, end_block, pending_txs, task)]
+
+    def fetch_transactions_stage(self, item: tuple) -> list:
+        contract, topics, start_block, end_block, pending_txs, task = item
+
+        fetched_txs = self.rpc_client.process_transactions(
+            self.blockchain, list(pending_txs.items())
+        )
+
+        return [(contract, topics, start_block, end_block, fetched_txs, task)]
+
+    def write_stage(self, items: list):
+        fetched_txs = {}
+        for _, _, _, _, range_txs, _ in items:
+            fetched_txs.update(range_txs)
+
+        contracts = list(dict.fromkeys(str(item[0]) for item in items))
+        topics = list(dict.fromkeys(topic for item in items for topic in item[1]))
+
+        self.handle_fetched_transactions(
+            ", ".join(contracts),
+            topics,
+            min(item[2] for item in items),
+            max(item[3] for item in items),
+            fetched_txs,
+        )
+
+    def log_stage_error(self, stage: str, item, error: Exception):
+        items = item if isinstance(item, list) else [item]
+        for contract, topics, start_block, end_block, _, task in items:
+            request_desc = (
+                f"Error processing request in stage {stage}: {self.bridge}, {self.blockchain}, "
+                f"{start_block}, {end_block}, {contract}, {topics}. Error: {error}"
+            )
+            log_error(self.bridge, request_desc)
+            self.update_task(task, 0, error)
+
+    def extract_data(self, start_block: int, end_block: int):
+        """Main extraction logic."""
+        bridge_blockchain_pairs = self.handler.get_bridge_contracts_and_topics(
+            self.bridge, self.blockchain
+        )
+
+        rpc_workers = self.num_threads()
+
+        chunk_size = max(1, min((end_block - start_block + rpc_workers - 1) // rpc_workers, 1000))
+        # inclusive block ranges covering [start_block, end_block]
+        block_ranges = [
+            (start, end - 1) for start, end in self.divide_range(start_block, end_block, chunk_size)
+        ]
+
+        tasks = []
+        for contract, topics in self.build_log_filters(bridge_blockchain_pairs):
+            filter_ranges = block_ranges
+            if self.resume:
+                filter_ranges = self.checkpoints.missing_ranges(contract, topics, block_ranges)
+
+            tasks.extend((contract, tuple(topics), start, end) for start, end in filter_ranges)
+
+        # the ranges of all contracts go through the same pipeline, without waiting for the
+        # ranges of a contract to finish before starting with the next one
+        items = (self.start_task(task) for task in tasks)
+
+        log_to_cli(
+            build_log_message_2(
+                start_block,
+                end_block,
+                self.bridge,
+                self.blockchain,
+                f"Launching pipeline to process {len(tasks)} block ranges...",
+            )
+        )
+
+        start_time = time.time()
+        pipeline = self.build_pipeline(rpc_workers)
+        pipeline.run(items)
+        end_time = time.time()
+
+        log_to_cli(
+            build_log_message_2(
+                start_block,
+                end_block,
+                self.bridge,
+                self.blockchain,
+                (
+                    f"Finished processing logs and transactions. Time taken: "
+                    f"{end_time - start_time} seconds. Items per stage -- "
+                    f"{pipeline.metrics.summary()}"
+                ),
+            ),
+            CliColor.SUCCESS,
+        )
+
+        log_to_cli(
+            build_log_message_2(
+                start_block,
+                end_block,
+                self.bridge,
+                self.blockchain,
+                f"RPC calls to fetch transactions -- {self.rpc_client.metrics.summary()}",
+            ),
+            CliColor.SUCCESS,
+        )
+
+        self.log_endpoint_stats(self.rpc_client, start_block, end_block)
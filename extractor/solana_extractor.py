@@ -56,6 +56,7 @@ class SolanaExtractor(Extractor):
             )
         )
 
+        self.metrics.increment("events", len(signatures))
         decoded_instructions = []
         for signature in signatures:
             try:
@@ -77,7 +78,7 @@ class SolanaExtractor(Extractor):
         transactions = []
 
         for decoded_tx in included_txs:
-            if self.handler.does_transaction_exist_by_hash(
+            if self.transaction_index.contains(
                 decoded_tx["transaction"]["transaction"]["signatures"][0]
             ):
                 continue
@@ -92,6 +93,7 @@ class SolanaExtractor(Extractor):
 
         if len(transactions) > 0:
             self.handler.handle_transactions(transactions)
+            self.transaction_index.add(tx["transaction_hash"] for tx in transactions)
 
     def extract_data(self, signature_ranges: dict):
         """Main extraction logic."""
@@ -0,0 +1,155 @@
+import hashlib
+import math
+import threading
+
+from config.constants import (
+    TRANSACTION_INDEX_BLOOM_ERROR_RATE,
+    TRANSACTION_INDEX_BLOOM_MIN_CAPACITY,
+    TRANSACTION_INDEX_MODE,
+    TRANSACTION_INDEX_MODES,
+    TRANSACTION_INDEX_PRELOAD_BATCH_SIZE,
+    Bridge,
+)
+from utils.metrics import Metrics
+from utils.utils import CustomException
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter of strings, sized for `capacity` items at a false positive rate of
+    `error_rate`. The bit positions of an item are derived from a single 128-bit digest with
+    double hashing.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(item)
+        )
+
+
+class TransactionHashIndex:
+    """
+    In-memory index of the hashes of the transactions of a blockchain stored in the
+    `*_blockchain_transactions` table of a bridge, shared by the extractors of the blockchain (see
+    `get_transaction_hash_index`), so that checking whether the transaction of a log was already
+    stored does not query the database.
+
+    The hashes are loaded on first use with a streaming query, and added as transactions are
+    stored. In the "set" mode, every hash is kept in a set. In the "bloom" mode, they are kept in a
+    Bloom filter instead, which uses a fraction of the memory but can return false positives, so
+    the hashes it contains are checked against the database.
+
+    Transactions stored by other processes after the hashes were loaded are not in the index:
+    storing them again fails, and `check_stored` then finds them in the database.
+    """
+
+    CLASS_NAME = "TransactionHashIndex"
+
+    def __init__(
+        self, repository, mode: str = TRANSACTION_INDEX_MODE, blockchain: str | None = None
+    ):
+        func_name = "__init__"
+        if mode not in TRANSACTION_INDEX_MODES:
+            raise CustomException(
+                self.CLASS_NAME, func_name, f"Unknown transaction index mode {mode}."
+            )
+
+        self.repository = repository
+        self.mode = mode
+        # only the transactions of this blockchain are indexed (all of them if None)
+        self.filters = {"blockchain": blockchain} if blockchain is not None else {}
+        self.hashes = None
+        self.lock = threading.Lock()
+        self.metrics = Metrics()
+
+    def load(self):
+        """Loads the hashes of the stored transactions, unless they were already loaded."""
+        with self.lock:
+            if self.hashes is not None:
+                return
+
+            if self.mode == "bloom":
+                capacity = max(
+                    2 * self.repository.count(**self.filters), TRANSACTION_INDEX_BLOOM_MIN_CAPACITY
+                )
+                hashes = BloomFilter(capacity, TRANSACTION_INDEX_BLOOM_ERROR_RATE)
+            else:
+                hashes = set()
+
+            for tx_hash in self.repository.stream_column(
+                "transaction_hash", TRANSACTION_INDEX_PRELOAD_BATCH_SIZE, **self.filters
+            ):
+                hashes.add(tx_hash)
+
+            self.hashes = hashes
+
+    def contains(self, tx_hash: str) -> bool:
+        """Whether a transaction with this hash is stored in the database."""
+        self.load()
+
+        with self.lock:
+            found = tx_hash in self.hashes
+
+        if not found or self.mode == "set":
+            self.metrics.increment("hits" if found else "misses")
+            return found
+
+        # the Bloom filter may return false positives
+        self.metrics.increment("db_lookups")
+        return self.repository.get_transaction_by_hash(tx_hash) is not None
+
+    def add(self, tx_hashes):
+        """Records the hashes of transactions just stored in the database."""
+        with self.lock:
+            if self.hashes is None:
+                # they are loaded with the rest on first use
+                return
+            for tx_hash in tx_hashes:
+                self.hashes.add(tx_hash)
+
+    def check_stored(self, tx_hash: str) -> bool:
+        """
+        Whether a transaction missing from the index (e.g. stored by another process) is stored in
+        the database, in which case it is added to the index.
+        """
+        self.metrics.increment("db_lookups")
+        if self.repository.get_transaction_by_hash(tx_hash) is None:
+            return False
+
+        self.metrics.increment("conflicts")
+        self.add([tx_hash])
+        return True
+
+    def invalidate(self):
+        """Drops the loaded hashes (e.g. after rows were deleted), to be loaded again on use."""
+        with self.lock:
+            self.hashes = None
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_transaction_hash_index(bridge: Bridge, blockchain: str, repository) -> TransactionHashIndex:
+    """Returns the process-wide transaction hash index of a bridge on a blockchain."""
+    with _indexes_lock:
+        if (bridge, blockchain) not in _indexes:
+            _indexes[(bridge, blockchain)] = TransactionHashIndex(repository, blockchain=blockchain)
+        return _indexes[(bridge, blockchain)]
@@ -0,0 +1,235 @@
+import threading
+import time
+
+from config.constants import (
+    DEFAULT_TRANSACTION_FETCH_STRATEGY,
+    WORK_QUEUE_CHUNK_SIZE,
+    WORK_QUEUE_HEARTBEAT_SECONDS,
+    WORK_QUEUE_LEASE_SECONDS,
+    WORK_QUEUE_MAX_ATTEMPTS,
+    WORK_QUEUE_POLL_SECONDS,
+    Bridge,
+)
+from extractor.checkpoints import Checkpoints
+from extractor.evm_extractor import EvmExtractor
+from extractor.extractor import Extractor
+from repository.common.repository import ExtractionTaskRepository
+from repository.database import DBSession
+from utils.metrics import Metrics
+from utils.utils import CliColor, log_error, log_to_cli
+
+
+class WorkQueue:
+    """
+    Queue of the block ranges of a bridge stored in the database, so that the extraction can be
+    shared by workers running in several processes or machines pointed at the same database.
+    """
+
+    CLASS_NAME = "WorkQueue"
+
+    def __init__(self, bridge: Bridge, repository=None):
+        self.bridge = bridge
+        self.repository = repository or ExtractionTaskRepository(DBSession)
+
+    def enqueue(
+        self,
+        blockchain: str,
+        log_filters: list,
+        start_block: int,
+        end_block: int,
+        chunk_size: int = WORK_QUEUE_CHUNK_SIZE,
+    ) -> int:
+        """
+        Adds the (inclusive) block ranges of [start_block, end_block] of each (contract, topics)
+        log filter to the queue. Returns the number of tasks added.
+        """
+        block_ranges = [
+            (start, end - 1)
+            for start, end in Extractor.divide_range(start_block, end_block, chunk_size)
+        ]
+
+        tasks = [
+            (*Checkpoints.filter_key(contract, topics), start, end)
+            for contract, topics in log_filters
+            for start, end in block_ranges
+        ]
+
+        return self.repository.add_tasks(self.bridge.value, blockchain, tasks)
+
+
+class QueueWorker:
+    """
+    Claims block ranges of a bridge from the WorkQueue and extracts them with `num_threads` threads
+    until none is left. The leases of the claimed ranges are renewed by a heartbeat thread, so the
+    ranges of workers that die go back to the queue once their lease expires. Failed ranges are
+    retried up to WORK_QUEUE_MAX_ATTEMPTS times, and given up if the last attempt failed or its
+    lease expired.
+    """
+
+    CLASS_NAME = "QueueWorker"
+
+    def __init__(
+        self,
+        bridge: Bridge,
+        owner: str,
+        num_threads: int,
+        fetch_strategy: str = DEFAULT_TRANSACTION_FETCH_STRATEGY,
+        blockchains: list = None,
+        repository=None,
+    ):
+        self.bridge = bridge
+        self.owner = owner
+        self.num_threads = max(1, num_threads)
+        self.fetch_strategy = fetch_strategy
+        # only the ranges of these blockchains are claimed (all blockchains if None)
+        self.blockchains = blockchains
+        self.repository = repository or ExtractionTaskRepository(DBSession)
+        self.metrics = Metrics()
+
+        # blockchain -> extractor, shared by the threads of the worker
+        self.extractors = {}
+        self.extractors_lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def create_extractor(self, blockchain: str) -> EvmExtractor:
+        # events are filtered by the blockchains of the whole extraction, not only the ones
+        # claimed by this worker
+        extractor = EvmExtractor(
+            self.bridge,
+            blockchain,
+            self.repository.get_blockchains(self.bridge.value),
+            self.fetch_strategy,
+        )
+        extractor.group_contracts(
+            extractor.handler.get_bridge_contracts_and_topics(self.bridge, blockchain)
+        )
+        return extractor
+
+    def get_extractor(self, blockchain: str) -> EvmExtractor:
+        with self.extractors_lock:
+            if blockchain not in self.extractors:
+                self.extractors[blockchain] = self.create_extractor(blockchain)
+            return self.extractors[blockchain]
+
+    def run(self):
+        heartbeat = threading.Thread(target=self.heartbeat, name="heartbeat", daemon=True)
+        heartbeat.start()
+
+        threads = []
+        for i in range(self.num_threads):
+            thread = threading.Thread(target=self.work_loop, name=f"queue_worker_{i}")
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+        self.stopped.set()
+        heartbeat.join()
+
+        log_to_cli(
+            f"{self.bridge.value} - Worker {self.owner} finished. Tasks -- "
+            f"{self.metrics.summary()}",
+            CliColor.SUCCESS,
+        )
+
+    def heartbeat(self):
+        while not self.stopped.wait(WORK_QUEUE_HEARTBEAT_SECONDS):
+            try:
+                self.repository.renew_leases(self.owner, WORK_QUEUE_LEASE_SECONDS)
+            except Exception as e:
+                log_error(self.bridge, f"Failed to renew the leases of {self.owner}: {e}")
+
+    def work_loop(self):
+        while True:
+            tasks = self.repository.claim_tasks(
+                self.bridge.value,
+                self.owner,
+                1,
+                WORK_QUEUE_LEASE_SECONDS,
+                WORK_QUEUE_MAX_ATTEMPTS,
+                self.blockchains,
+            )
+
+            if not tasks:
+                # ranges of dead workers that cannot be retried are given up
+                self.fail_expired_tasks()
+
+                # ranges being processed by other workers may still fail and be retried
+                if not self.repository.has_active_tasks(
+                    self.bridge.value, WORK_QUEUE_MAX_ATTEMPTS, self.blockchains
+                ):
+                    return
+                time.sleep(WORK_QUEUE_POLL_SECONDS)
+                continue
+
+            for task in tasks:
+                self.process(task)
+
+    def fail_expired_tasks(self):
+        tasks = self.repository.fail_expired_tasks(
+            self.bridge.value, WORK_QUEUE_MAX_ATTEMPTS, self.blockchains
+        )
+
+        for task in tasks:
+            contract, topics = Checkpoints.parse_filter_key(task.contract, task.topics)
+            log_error(
+                self.bridge,
+                f"Giving up request: {self.bridge}, {task.blockchain}, {task.start_block}, "
+                f"{task.end_block}, {contract}, {topics}. Error: {task.error}",
+            )
+            try:
+                self.get_extractor(task.blockchain).checkpoints.fail(
+                    contract, topics, task.start_block, task.end_block, task.error
+                )
+            except Exception as e:
+                log_error(self.bridge, f"Failed to record the failed range {task.id}: {e}")
+            self.metrics.increment(ExtractionTaskRepository.FAILED)
+
+    def finish_task(self, task, status: str, error=None) -> bool:
+        """Sets the status of a task, unless its lease was lost in the meantime."""
+        if self.repository.finish_task(task.id, self.owner, status, error):
+            return True
+
+        log_error(
+            self.bridge,
+            f"Lost the lease of task {task.id} ({task.blockchain}, {task.start_block}, "
+            f"{task.end_block}) of {self.owner} before it was {status}",
+        )
+        self.metrics.increment("lost_leases")
+        return False
+
+    def process(self, task):
+        contract, topics = Checkpoints.parse_filter_key(task.contract, task.topics)
+
+        try:
+            extractor = self.get_extractor(task.blockchain)
+            num_logs = extractor.work(contract, topics, task.start_block, task.end_block)
+        except Exception as e:
+            request_desc = (
+                f"Error processing request: {self.bridge}, {task.blockchain}, {task.start_block}, "
+                f"{task.end_block}, {contract}, {topics} (attempt {task.attempts}). Error: {e}"
+            )
+            log_error(self.bridge, request_desc)
+
+            if task.attempts < WORK_QUEUE_MAX_ATTEMPTS:
+                status = ExtractionTaskRepository.PENDING
+            else:
+                status = ExtractionTaskRepository.FAILED
+
+            # the task is now owned by another worker, which records its outcome
+            if not self.finish_task(task, status, str(e)):
+                return
+
+            # given up ranges can still be retried with the retry-failed action
+            if status == ExtractionTaskRepository.FAILED and task.blockchain in self.extractors:
+                self.extractors[task.blockchain].checkpoints.fail(
+                    contract, topics, task.start_block, task.end_block, e
+                )
+            self.metrics.increment(status)
+            return
+
+        # the range was extracted even if the lease was lost, so it is still checkpointed
+        if self.finish_task(task, ExtractionTaskRepository.COMPLETED):
+            self.metrics.increment(ExtractionTaskRepository.COMPLETED)
+        extractor.checkpoints.complete(contract, topics, task.start_block, task.end_block, num_logs)
@@ -1,6 +1,8 @@
 from abc import abstractmethod
 from contextlib import contextmanager
 
+from sqlalchemy import select
+
 from utils.utils import log_error
 
 
@@ -74,6 +76,28 @@ class BaseRepository:
         with self.get_session() as session:
             session.execute(query)
 
+    def count(self, **filters) -> int:
+        """Returns the number of records of the table, matching the column `filters` if any."""
+        with self.get_session() as session:
+            return session.query(self.model).filter_by(**filters).count()
+
+    def stream_column(self, column: str, batch_size: int, **filters):
+        """
+        Yields the values of a column of all records (matching the column `filters` if any),
+        fetched from the database in batches of `batch_size` rows instead of loading the whole
+        table in memory.
+        """
+        if self.model is None:
+            raise ValueError("Model is not defined for this repository.")
+
+        with self.get_session() as session:
+            query = (
+                select(getattr(self.model, column))
+                .filter_by(**filters)
+                .execution_options(yield_per=batch_size)
+            )
+            yield from session.scalars(query)
+
     def has_records(self) -> bool:
         """
         Check if the table has any records.
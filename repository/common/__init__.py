@@ -1,3 +1,17 @@
-from .repository import NativeTokenRepository, TokenMetadataRepository, TokenPriceRepository
+from .repository import (
+    ExtractionCheckpointRepository,
+    ExtractionTaskRepository,
+    FollowStateRepository,
+    NativeTokenRepository,
+    TokenMetadataRepository,
+    TokenPriceRepository,
+)
 
-__all__ = ["TokenPriceRepository", "TokenMetadataRepository", "NativeTokenRepository"]
+__all__ = [
+    "TokenPriceRepository",
+    "TokenMetadataRepository",
+    "NativeTokenRepository",
+    "ExtractionCheckpointRepository",
+    "ExtractionTaskRepository",
+    "FollowStateRepository",
+]
@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, Column, Date, Float, Integer, Numeric, String
+from sqlalchemy import BigInteger, Column, Date, Float, Integer, Numeric, String, Text
 
 from repository.database import Base
 
@@ -63,6 +63,148 @@ class NativeToken(Base):
         return f"<Token(symbol={self.symbol}, blockchain={self.blockchain})>"
 
 
+class ExtractionCheckpoint(Base):
+    """
+    Status ("completed" or "failed") of the extraction of a block range (inclusive) of a log filter,
+    i.e., a contract (or a JSON list of contracts, for grouped filters) and its JSON list of topics.
+    """
+
+    __tablename__ = "extraction_checkpoint"
+
+    id = Column(Integer, nullable=False, autoincrement=True, primary_key=True)
+    bridge = Column(String(20), nullable=False)
+    blockchain = Column(String(10), nullable=False)
+    contract = Column(Text, nullable=False)
+    topics = Column(Text, nullable=False)
+    start_block = Column(BigInteger, nullable=False)
+    end_block = Column(BigInteger, nullable=False)
+    status = Column(String(10), nullable=False)
+    error = Column(Text, nullable=True)
+    # number of logs of the range (when completed), used to size the ranges of later runs
+    num_logs = Column(Integer, nullable=True)
+    updated_at = Column(BigInteger, nullable=False)
+
+    def __init__(
+        self,
+        bridge,
+        blockchain,
+        contract,
+        topics,
+        start_block,
+        end_block,
+        status,
+        error,
+        num_logs,
+        updated_at,
+    ):
+        self.bridge = bridge
+        self.blockchain = blockchain
+        self.contract = contract
+        self.topics = topics
+        self.start_block = start_block
+        self.end_block = end_block
+        self.status = status
+        self.error = error
+        self.num_logs = num_logs
+        self.updated_at = updated_at
+
+    def __repr__(self):
+        return (
+            f"<ExtractionCheckpoint(bridge={self.bridge}, blockchain={self.blockchain}, "
+            f"contract={self.contract}, start_block={self.start_block}, "
+            f"end_block={self.end_block}, status={self.status})>"
+        )
+
+
+class ExtractionTask(Base):
+    """
+    Block range (inclusive) of a log filter to be extracted by any worker sharing the database.
+    Running tasks are leased by a worker until `lease_expires_at`, and go back to the queue if the
+    worker stops renewing the lease.
+    """
+
+    __tablename__ = "extraction_task"
+
+    id = Column(Integer, nullable=False, autoincrement=True, primary_key=True)
+    bridge = Column(String(20), nullable=False)
+    blockchain = Column(String(10), nullable=False)
+    contract = Column(Text, nullable=False)
+    topics = Column(Text, nullable=False)
+    start_block = Column(BigInteger, nullable=False)
+    end_block = Column(BigInteger, nullable=False)
+    status = Column(String(10), nullable=False)
+    attempts = Column(Integer, nullable=False)
+    lease_owner = Column(String(100), nullable=True)
+    lease_expires_at = Column(BigInteger, nullable=True)
+    error = Column(Text, nullable=True)
+    updated_at = Column(BigInteger, nullable=False)
+
+    def __init__(
+        self,
+        bridge,
+        blockchain,
+        contract,
+        topics,
+        start_block,
+        end_block,
+        status,
+        attempts,
+        lease_owner,
+        lease_expires_at,
+        error,
+        updated_at,
+    ):
+        self.bridge = bridge
+        self.blockchain = blockchain
+        self.contract = contract
+        self.topics = topics
+        self.start_block = start_block
+        self.end_block = end_block
+        self.status = status
+        self.attempts = attempts
+        self.lease_owner = lease_owner
+        self.lease_expires_at = lease_expires_at
+        self.error = error
+        self.updated_at = updated_at
+
+    def __repr__(self):
+        return (
+            f"<ExtractionTask(bridge={self.bridge}, blockchain={self.blockchain}, "
+            f"contract={self.contract}, start_block={self.start_block}, "
+            f"end_block={self.end_block}, status={self.status}, attempts={self.attempts})>"
+        )
+
+
+class FollowState(Base):
+    """
+    Last block of a blockchain extracted by the follow mode of a bridge, and a JSON list of the
+    [block_number, block_hash] of the last blocks of the recently extracted ranges, checked to
+    detect reorgs.
+    """
+
+    __tablename__ = "follow_state"
+
+    id = Column(Integer, nullable=False, autoincrement=True, primary_key=True)
+    bridge = Column(String(20), nullable=False)
+    blockchain = Column(String(10), nullable=False)
+    last_block = Column(BigInteger, nullable=False)
+    block_hashes = Column(Text, nullable=False)
+    updated_at = Column(BigInteger, nullable=False)
+
+    def __init__(self, bridge, blockchain, last_block, block_hashes, updated_at):
+        self.bridge = bridge
+        self.blockchain = blockchain
+        self.last_block = last_block
+        self.block_hashes = block_hashes
+        self.updated_at = updated_at
+
+    def __repr__(self):
+        return (
+            f"<FollowState(bridge={self.bridge}, blockchain={self.blockchain}, "
+            f"last_block={self.last_block})>"
+        )
+
+
 class BlockchainTransaction(Base):
     __abstract__ = True
 
@@ -1,10 +1,16 @@
+import time
 from datetime import datetime
 
-from sqlalchemy import Index, func
+from sqlalchemy import Index, and_, delete, func, or_, select
 
 from repository.base import BaseRepository
+from repository.database import Base
 
 from .models import (
+    BlockchainTransaction,
+    ExtractionCheckpoint,
+    ExtractionTask,
+    FollowState,
     NativeToken,
     TokenMetadata,
     TokenPrice,
@@ -106,9 +112,410 @@ class NativeTokenRepository(BaseRepository):
             return session.query(NativeToken).filter(NativeToken.blockchain == blockchain).first()
 
 
+class ExtractionCheckpointRepository(BaseRepository):
+    def __init__(self, session_factory):
+        super().__init__(ExtractionCheckpoint, session_factory)
+
+    def save_range(
+        self,
+        bridge: str,
+        blockchain: str,
+        contract: str,
+        topics: str,
+        start_block: int,
+        end_block: int,
+        status: str,
+        error: str = None,
+        num_logs: int = None,
+    ):
+        """Records the status of a block range, replacing any previous status of the same range."""
+        with self.get_session() as session:
+            session.query(ExtractionCheckpoint).filter(
+                ExtractionCheckpoint.bridge == bridge,
+                ExtractionCheckpoint.blockchain == blockchain,
+                ExtractionCheckpoint.contract == contract,
+                ExtractionCheckpoint.topics == topics,
+                ExtractionCheckpoint.start_block == start_block,
+                ExtractionCheckpoint.end_block == end_block,
+            ).delete()
+            session.add(
+                ExtractionCheckpoint(
+                    bridge,
+                    blockchain,
+                    contract,
+                    topics,
+                    start_block,
+                    end_block,
+                    status,
+                    error,
+                    num_logs,
+                    int(time.time()),
+                )
+            )
+
+    def get_ranges(self, bridge: str, blockchain: str, status: str) -> list:
+        with self.get_session() as session:
+            return (
+                session.query(ExtractionCheckpoint)
+                .filter(
+                    ExtractionCheckpoint.bridge == bridge,
+                    ExtractionCheckpoint.blockchain == blockchain,
+                    ExtractionCheckpoint.status == status,
+                )
+                .order_by(ExtractionCheckpoint.start_block)
+                .all()
+            )
+
+    def delete_ranges_after(self, bridge: str, blockchain: str, block: int) -> int:
+        """Deletes the checkpoints of the ranges ending after `block` (e.g. after a reorg)."""
+        with self.get_session() as session:
+            return (
+                session.query(ExtractionCheckpoint)
+                .filter(
+                    ExtractionCheckpoint.bridge == bridge,
+                    ExtractionCheckpoint.blockchain == blockchain,
+                    ExtractionCheckpoint.end_block > block,
+                )
+                .delete(synchronize_session=False)
+            )
+
+    def get_blockchains_with_status(self, bridge: str, status: str) -> list:
+        with self.get_session() as session:
+            rows = (
+                session.query(ExtractionCheckpoint.blockchain)
+                .filter(
+                    ExtractionCheckpoint.bridge == bridge,
+                    ExtractionCheckpoint.status == status,
+                )
+                .distinct()
+                .all()
+            )
+            return [row[0] for row in rows]
+
+
+class ExtractionTaskRepository(BaseRepository):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    def __init__(self, session_factory):
+        super().__init__(ExtractionTask, session_factory)
+
+    def add_tasks(self, bridge: str, blockchain: str, ranges: list) -> int:
+        """
+        Adds (contract, topics, start_block, end_block) tasks to the queue, skipping the ones that
+        were already added. Returns the number of tasks added.
+        """
+        now = int(time.time())
+
+        with self.get_session() as session:
+            existing = set(
+                session.query(
+                    ExtractionTask.contract,
+                    ExtractionTask.topics,
+                    ExtractionTask.start_block,
+                    ExtractionTask.end_block,
+                )
+                .filter(ExtractionTask.bridge == bridge, ExtractionTask.blockchain == blockchain)
+                .all()
+            )
+
+            tasks = [
+                ExtractionTask(
+                    bridge,
+                    blockchain,
+                    contract,
+                    topics,
+                    start_block,
+                    end_block,
+                    self.PENDING,
+                    0,
+                    None,
+                    None,
+                    None,
+                    now,
+                )
+                for contract, topics, start_block, end_block in dict.fromkeys(ranges)
+                if (contract, topics, start_block, end_block) not in existing
+            ]
+            session.add_all(tasks)
+            return len(tasks)
+
+    def claim_tasks(
+        self,
+        bridge: str,
+        owner: str,
+        limit: int,
+        lease_seconds: int,
+        max_attempts: int,
+        blockchains: list = None,
+    ) -> list:
+        """
+        Leases up to `limit` pending tasks (or running tasks whose lease expired) to `owner`. Rows
+        locked by other workers are skipped, so concurrent workers never claim the same task.
+        """
+        now = int(time.time())
+
+        with self.get_session() as session:
+            query = session.query(ExtractionTask).filter(
+                ExtractionTask.bridge == bridge,
+                ExtractionTask.attempts < max_attempts,
+                or_(
+                    ExtractionTask.status == self.PENDING,
+                    and_(
+                        ExtractionTask.status == self.RUNNING,
+                        ExtractionTask.lease_expires_at < now,
+                    ),
+                ),
+            )
+            if blockchains:
+                query = query.filter(ExtractionTask.blockchain.in_(blockchains))
+
+            tasks = (
+                query.order_by(ExtractionTask.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+
+            for task in tasks:
+                task.status = self.RUNNING
+                task.attempts += 1
+                task.lease_owner = owner
+                task.lease_expires_at = now + lease_seconds
+                task.updated_at = now
+
+            return tasks
+
+    def renew_leases(self, owner: str, lease_seconds: int) -> int:
+        """Extends the leases of the running tasks of `owner`. Returns the number of tasks."""
+        now = int(time.time())
+
+        with self.get_session() as session:
+            return (
+                session.query(ExtractionTask)
+                .filter(
+                    ExtractionTask.status == self.RUNNING,
+                    ExtractionTask.lease_owner == owner,
+                )
+                .update(
+                    {
+                        ExtractionTask.lease_expires_at: now + lease_seconds,
+                        ExtractionTask.updated_at: now,
+                    },
+                    synchronize_session=False,
+                )
+            )
+
+    def finish_task(self, task_id: int, owner: str, status: str, error: str = None) -> bool:
+        """
+        Sets the status of a task leased by `owner`. Returns False if the lease was lost (e.g. it
+        expired and the task was claimed by another worker).
+        """
+        now = int(time.time())
+
+        with self.get_session() as session:
+            updated = (
+                session.query(ExtractionTask)
+                .filter(
+                    ExtractionTask.id == task_id,
+                    ExtractionTask.status == self.RUNNING,
+                    ExtractionTask.lease_owner == owner,
+                )
+                .update(
+                    {
+                        ExtractionTask.status: status,
+                        ExtractionTask.lease_owner: None,
+                        ExtractionTask.lease_expires_at: None,
+                        ExtractionTask.error: error,
+                        ExtractionTask.updated_at: now,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            return updated > 0
+
+    def fail_expired_tasks(self, bridge: str, max_attempts: int, blockchains: list = None) -> list:
+        """
+        Marks as failed the running tasks whose lease expired after their last attempt (e.g. the
+        worker died), since they cannot be claimed again. Returns the failed tasks.
+        """
+        now = int(time.time())
+
+        with self.get_session() as session:
+            query = session.query(ExtractionTask).filter(
+                ExtractionTask.bridge == bridge,
+                ExtractionTask.status == self.RUNNING,
+                ExtractionTask.lease_expires_at < now,
+                ExtractionTask.attempts >= max_attempts,
+            )
+            if blockchains:
+                query = query.filter(ExtractionTask.blockchain.in_(blockchains))
+
+            tasks = query.order_by(ExtractionTask.id).with_for_update(skip_locked=True).all()
+
+            for task in tasks:
+                task.error = f"Lease of {task.lease_owner} expired after {task.attempts} attempts"
+                task.status = self.FAILED
+                task.lease_owner = None
+                task.lease_expires_at = None
+                task.updated_at = now
+
+            return tasks
+
+    def has_active_tasks(self, bridge: str, max_attempts: int, blockchains: list = None) -> bool:
+        """Whether tasks can still be claimed, or are being processed by a live worker."""
+        now = int(time.time())
+
+        with self.get_session() as session:
+            query = session.query(ExtractionTask.id).filter(
+                ExtractionTask.bridge == bridge,
+                or_(
+                    and_(
+                        ExtractionTask.status == self.PENDING,
+                        ExtractionTask.attempts < max_attempts,
+                    ),
+                    and_(
+                        ExtractionTask.status == self.RUNNING,
+                        or_(
+                            ExtractionTask.lease_expires_at >= now,
+                            ExtractionTask.attempts < max_attempts,
+                        ),
+                    ),
+                ),
+            )
+            if blockchains:
+                query = query.filter(ExtractionTask.blockchain.in_(blockchains))
+
+            return query.first() is not None
+
+    def count_by_status(self, bridge: str) -> dict:
+        with self.get_session() as session:
+            rows = (
+                session.query(ExtractionTask.status, func.count(ExtractionTask.id))
+                .filter(ExtractionTask.bridge == bridge)
+                .group_by(ExtractionTask.status)
+                .all()
+            )
+            return dict(rows)
+
+    def get_blockchains(self, bridge: str) -> list:
+        with self.get_session() as session:
+            rows = (
+                session.query(ExtractionTask.blockchain)
+                .filter(ExtractionTask.bridge == bridge)
+                .distinct()
+                .all()
+            )
+            return [row[0] for row in rows]
+
+
+class FollowStateRepository(BaseRepository):
+    def __init__(self, session_factory):
+        super().__init__(FollowState, session_factory)
+
+    def get_state(self, bridge: str, blockchain: str) -> FollowState | None:
+        with self.get_session() as session:
+            return (
+                session.query(FollowState)
+                .filter(FollowState.bridge == bridge, FollowState.blockchain == blockchain)
+                .first()
+            )
+
+    def save_state(self, bridge: str, blockchain: str, last_block: int, block_hashes: str):
+        with self.get_session() as session:
+            state = (
+                session.query(FollowState)
+                .filter(FollowState.bridge == bridge, FollowState.blockchain == blockchain)
+                .first()
+            )
+
+            if state is None:
+                session.add(
+                    FollowState(bridge, blockchain, last_block, block_hashes, int(time.time()))
+                )
+            else:
+                state.last_block = last_block
+                state.block_hashes = block_hashes
+                state.updated_at = int(time.time())
+
+    def rollback_blocks(self, bridge: str, blockchain: str, fork_block: int) -> int:
+        """
+        Deletes the rows of the bridge extracted from the blocks of `blockchain` after
+        `fork_block`: the rows of every table with a block number, by block number, and the events
+        of the deleted transactions in the tables without one. Returns the number of deleted rows.
+        """
+        tables = [
+            table
+            for name, table in Base.metadata.tables.items()
+            if name.startswith(f"{bridge}_") and "blockchain" in table.c
+        ]
+        tx_tables = [
+            model.__table__
+            for model in BlockchainTransaction.__subclasses__()
+            if model.__table__ in tables
+        ]
+        block_tables = [
+            table for table in tables if table not in tx_tables and "block_number" in table.c
+        ]
+        # events without a block number are only found through the transactions they belong to
+        event_tables = [
+            table
+            for table in tables
+            if table not in tx_tables
+            and table not in block_tables
+            and "transaction_hash" in table.c
+        ]
+        deleted = 0
+
+        with self.get_session() as session:
+            for table in block_tables:
+                deleted += session.execute(
+                    delete(table).where(
+                        table.c.blockchain == blockchain, table.c.block_number > fork_block
+                    )
+                ).rowcount
+
+            for tx_table in tx_tables:
+                tx_hashes = select(tx_table.c.transaction_hash).where(
+                    tx_table.c.blockchain == blockchain, tx_table.c.block_number > fork_block
+                )
+
+                for table in event_tables:
+                    deleted += session.execute(
+                        delete(table).where(
+                            table.c.blockchain == blockchain,
+                            table.c.transaction_hash.in_(tx_hashes),
+                        )
+                    ).rowcount
+
+                deleted += session.execute(
+                    delete(tx_table).where(
+                        tx_table.c.blockchain == blockchain, tx_table.c.block_number > fork_block
+                    )
+                ).rowcount
+
+        return deleted
+
+
 Index("ix_token_price_symbol", TokenPrice.symbol)
 Index("ix_token_price_symbol_date", TokenPrice.symbol, TokenPrice.date)
 Index("ix_token_metadata_symbol", TokenMetadata.symbol)
 Index("ix_token_metadata_blockchain_address", TokenMetadata.address, TokenMetadata.blockchain)
 
 Index("ix_native_token_blockchain", NativeToken.symbol, NativeToken.blockchain)
+
+Index(
+    "ix_extraction_checkpoint_filter",
+    ExtractionCheckpoint.bridge,
+    ExtractionCheckpoint.blockchain,
+    ExtractionCheckpoint.status,
+)
+Index(
+    "ix_extraction_task_claim",
+    ExtractionTask.bridge,
+    ExtractionTask.status,
+    ExtractionTask.id,
+)
+Index("ix_follow_state_bridge_blockchain", FollowState.bridge, FollowState.blockchain)
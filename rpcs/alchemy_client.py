@@ -2,6 +2,7 @@ import time
 
 import requests
 
+from rpcs import http_session
 from utils.utils import (
     CustomException,
     convert_blockchain_into_alchemy_id,
@@ -29,7 +30,7 @@ class AlchemyClient:
         }
         headers = {"accept": "application/json", "content-type": "application/json"}
 
-        response = requests.post(url, json=payload, headers=headers)
+        response = http_session.post(url, json=payload, headers=headers)
 
         if response.status_code != 200:
             raise CustomException(
@@ -95,14 +96,19 @@ class AlchemyClient:
             "content-type": "application/json",
         }
 
-        response = requests.post(url, json=payload, headers=headers)
-
         for i in range(5):
+            response = None
             try:
-                response = requests.post(url, json=payload, headers=headers)
+                response = http_session.post(url, json=payload, headers=headers)
                 response.raise_for_status()
                 return response.json() if response else {}
-            except requests.exceptions.RequestException:
+            except requests.exceptions.RequestException as e:
+                if response is None:
+                    # the request did not reach Alchemy
+                    log_error(bridge, e)
+                    time.sleep(2**i)
+                    continue
+
                 # if response.text contains "token not found" return {}
                 if "Token not found" in response.text:
                     return {}
@@ -124,6 +130,11 @@ class AlchemyClient:
                     # as the rate limit is only for token price fetching
                     return {}
 
+                if response.status_code == 429 and i < 4:
+                    # the requests per second limit was hit, and the rate limiter of the URL is
+                    # paused for the time asked by Alchemy (Retry-After), so we just try again
+                    continue
+
                 if i < 4:
                     time.sleep(2**i)  # Exponential backoff
                 else:
@@ -0,0 +1,533 @@
+import asyncio
+import json
+import time
+
+import aiohttp
+
+from config.constants import (
+    ASYNC_MAX_REQUESTS_PER_ENDPOINT,
+    RPC_BATCH_READ_TIMEOUT,
+    RPC_CACHE_DEFAULT_FINALITY_BLOCKS,
+    RPC_CACHE_FINALITY_BLOCKS,
+    RPC_CACHE_HEAD_REFRESH_SECONDS,
+    RPC_CONNECT_TIMEOUT,
+    RPC_READ_TIMEOUT,
+    RPCS_CONFIG_FILE,
+)
+from rpcs import rate_limiter
+from rpcs.block_timestamp_cache import get_block_timestamp_cache
+from rpcs.evm_rpc_client import EvmRPCClient
+from rpcs.response_cache import ResponseCache
+from rpcs.rpc_client import RPCClient
+from rpcs.singleflight import get_single_flight
+from utils.utils import CustomException, ProviderLimitException, log_error
+
+
+class AsyncEvmRPCClient(RPCClient):
+    """
+    asyncio version of the EvmRPCClient methods used to extract logs and transactions. All requests
+    share a single aiohttp session (with keep-alive connections), and each endpoint accepts at most
+    `max_requests_per_endpoint` in-flight requests, so hundreds of requests can be in flight on a
+    single event loop without overloading any endpoint. Receipts are always fetched with
+    eth_getTransactionReceipt.
+    """
+
+    CLASS_NAME = "AsyncEvmRPCClient"
+
+    def __init__(
+        self,
+        bridge,
+        config_file: str = RPCS_CONFIG_FILE,
+        max_requests_per_endpoint: int = ASYNC_MAX_REQUESTS_PER_ENDPOINT,
+    ):
+        super().__init__(bridge, config_file)
+        self.max_requests_per_endpoint = max_requests_per_endpoint
+        self.semaphores = {}
+        self.session = None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        # the session must be created inside the event loop that uses it
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0))
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def get_semaphore(self, rpc_url: str) -> asyncio.Semaphore:
+        if rpc_url not in self.semaphores:
+            self.semaphores[rpc_url] = asyncio.Semaphore(self.max_requests_per_endpoint)
+        return self.semaphores[rpc_url]
+
+    async def post(self, rpc_url: str, blockchain_name: str, payload, timeout: float):
+        """
+        Sends a JSON-RPC payload, once the rate limiter of the endpoint allows it, and returns the
+        HTTP status code, the decoded body and, when the endpoint is rate limiting us, how long to
+        wait before sending it more requests (None otherwise).
+        """
+        session = await self.get_session()
+
+        delay = rate_limiter.get_bucket(rpc_url).reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        async with self.get_semaphore(rpc_url):
+            async with session.post(
+                rpc_url,
+                json=payload,
+                headers=self.build_headers(blockchain_name),
+                timeout=aiohttp.ClientTimeout(total=timeout, sock_connect=RPC_CONNECT_TIMEOUT),
+            ) as response:
+                text = await response.text()
+                try:
+                    body = json.loads(text)
+                except ValueError:
+                    body = None
+
+                retry_after = None
+                if self.is_rate_limit_error(response.status, body):
+                    retry_after = rate_limiter.get_retry_delay(
+                        response.headers.get("Retry-After"), text
+                    )
+                    rate_limiter.pause(rpc_url, retry_after)
+
+                return response.status, body, retry_after
+
+    async def make_request(
+        self, rpc_url: str, blockchain_name: str, method: str, params: list
+    ) -> dict:
+        """Make an RPC request, trying every endpoint of the blockchain until one answers."""
+        func_name = "make_request"
+        num_rpcs = self.rpc_sizes[blockchain_name]
+
+        cached_response = await self.get_cached_response(blockchain_name, method, params)
+        if cached_response is not None:
+            return cached_response
+
+        payload = {"id": 1, "jsonrpc": "2.0", "method": method, "params": params}
+
+        try:
+            backoff = 1
+            while True:
+                tried_rpcs = {}
+                while len(tried_rpcs) < num_rpcs:
+                    retry_after = None
+                    try:
+                        start_time = time.monotonic()
+                        status, body, retry_after = await self.post(
+                            rpc_url,
+                            blockchain_name,
+                            payload,
+                            self.timeouts.get(rpc_url, RPC_READ_TIMEOUT),
+                        )
+
+                        if method == "eth_getLogs" and self.is_provider_limit_error(body):
+                            raise ProviderLimitException(
+                                self.CLASS_NAME,
+                                func_name,
+                                f"{rpc_url} refused {method} with params {params}: {body}",
+                                rpc_url,
+                            )
+
+                        if status != 200 or body is None or body.get("result") is None:
+                            raise Exception(f"status {status}, response {body}")
+
+                        self.scheduler.record_success(
+                            blockchain_name, rpc_url, time.monotonic() - start_time
+                        )
+                        await self.cache_response(blockchain_name, method, params, body)
+                        return body
+                    except ProviderLimitException:
+                        raise
+                    except Exception as e:
+                        tried_rpcs[rpc_url] = e
+                        self.scheduler.record_failure(
+                            blockchain_name, rpc_url, retry_after is not None, retry_after
+                        )
+                        rpc_url = self.get_next_rpc(blockchain_name, exclude=tried_rpcs)
+
+                # if we have tried all RPC endpoints and none of them worked, back off
+                # exponentially and try again all endpoints
+                log_error(
+                    self.bridge,
+                    (
+                        f"Failed to make RPC request to {blockchain_name}, method {method}, "
+                        f"params {params}. Tried RPCs: {tried_rpcs}. Retrying with backoff "
+                        f"{backoff} seconds."
+                    ),
+                )
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+        except ProviderLimitException:
+            raise
+        except Exception as e:
+            raise CustomException(
+                self.CLASS_NAME,
+                func_name,
+                (
+                    f"Failed to make RPC request to {blockchain_name}, method {method}, "
+                    f"params {params}. Error: {e}"
+                ),
+            ) from e
+
+    async def make_batch_request(self, blockchain_name: str, calls: list) -> list:
+        """
+        asyncio version of `RPCClient.make_batch_request`. The batches of a call list are sent
+        concurrently, each one to the endpoint picked by the scheduler.
+        """
+
+        async def send(chunk: list):
+            while True:
+                rpc_url = self.get_next_rpc(blockchain_name)
+                batch_size = self.batch_sizes.get(rpc_url, 1)
+
+                if len(chunk) > batch_size:
+                    # the endpoint handles smaller batches than the ones we are sending
+                    await asyncio.gather(
+                        *(send(chunk[i : i + batch_size]) for i in range(0, len(chunk), batch_size))
+                    )
+                    return
+
+                if batch_size == 1:
+                    for idx in chunk:
+                        method, params = calls[idx]
+                        responses[idx] = await self.make_request(
+                            rpc_url, blockchain_name, method, params
+                        )
+                    return
+
+                payload = [
+                    {"id": idx, "jsonrpc": "2.0", "method": calls[idx][0], "params": calls[idx][1]}
+                    for idx in chunk
+                ]
+
+                try:
+                    status, body, retry_after = await self.post(
+                        rpc_url,
+                        blockchain_name,
+                        payload,
+                        self.timeouts.get(rpc_url, RPC_BATCH_READ_TIMEOUT),
+                    )
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    self.scheduler.record_failure(blockchain_name, rpc_url)
+                    # the endpoint is unreachable, so the calls are retried one by one across the
+                    # remaining endpoints
+                    for idx in chunk:
+                        method, params = calls[idx]
+                        responses[idx] = await self.make_request(
+                            rpc_url, blockchain_name, method, params
+                        )
+                    return
+
+                if status != 200 or not isinstance(body, list):
+                    self.scheduler.record_failure(
+                        blockchain_name, rpc_url, retry_after is not None, retry_after
+                    )
+
+                    if retry_after is not None or self.is_batch_size_error(status, body):
+                        # the provider rejected the size of the batch, so we halve the batch size
+                        # for this endpoint (unless it is only rate limiting us, in which case the
+                        # rate limiter holds the next attempt back) and send the calls again
+                        if retry_after is None:
+                            self.batch_sizes[rpc_url] = max(1, batch_size // 2)
+                        continue
+
+                    # any other failure (e.g. a 502 reply) does not tell anything about the batch
+                    # size, so the calls are retried one by one across the endpoints
+                    for idx in chunk:
+                        method, params = calls[idx]
+                        responses[idx] = await self.make_request(
+                            rpc_url, blockchain_name, method, params
+                        )
+                    return
+
+                self.scheduler.record_success(blockchain_name, rpc_url)
+
+                results = {result.get("id"): result for result in body if isinstance(result, dict)}
+
+                for idx in chunk:
+                    result = results.get(idx)
+                    if result is None or result.get("result") is None:
+                        method, params = calls[idx]
+                        result = await self.make_request(rpc_url, blockchain_name, method, params)
+                    else:
+                        batched.append(idx)
+                    responses[idx] = result
+                return
+
+        responses = await self.get_cached_responses(blockchain_name, calls)
+        indexes = [idx for idx, response in enumerate(responses) if response is None]
+        # calls answered by a batch, as `make_request` caches the responses it fetches itself
+        batched = []
+        rpc_url = self.get_next_rpc(blockchain_name)
+        batch_size = self.batch_sizes.get(rpc_url, 1)
+
+        await asyncio.gather(
+            *(send(indexes[i : i + batch_size]) for i in range(0, len(indexes), batch_size))
+        )
+
+        for idx in batched:
+            method, params = calls[idx]
+            await self.cache_response(blockchain_name, method, params, responses[idx])
+
+        return responses
+
+    async def get_cached_response(
+        self, blockchain_name: str, method: str, params: list
+    ) -> dict | None:
+        """
+        asyncio version of `RPCClient.get_cached_response`. The SQLite cache is read in a worker
+        thread, so that the event loop is not blocked.
+        """
+        if self.response_cache is None or not ResponseCache.is_cacheable(method):
+            return None
+
+        return await asyncio.to_thread(super().get_cached_response, blockchain_name, method, params)
+
+    async def get_cached_responses(self, blockchain_name: str, calls: list) -> list:
+        """Returns the cached response (or None) of each (method, params) call."""
+        if self.response_cache is None:
+            return [None] * len(calls)
+
+        # the whole list is read in a single worker thread
+        return await asyncio.to_thread(
+            lambda: [
+                RPCClient.get_cached_response(self, blockchain_name, method, params)
+                for method, params in calls
+            ]
+        )
+
+    async def cache_response(self, blockchain_name: str, method: str, params: list, response: dict):
+        """asyncio version of `RPCClient.cache_response`, writing the cache in a worker thread."""
+        self.record_response(blockchain_name, method, params, response)
+
+        if self.response_cache is None or not ResponseCache.is_cacheable(method):
+            return
+
+        block = ResponseCache.response_block(method, params, response)
+        if block is not None and await self.is_final_block(blockchain_name, block):
+            await asyncio.to_thread(
+                self.response_cache.put, blockchain_name, method, params, response
+            )
+
+    async def is_final_block(self, blockchain_name: str, block: int) -> bool:
+        """asyncio version of `RPCClient.is_final_block`."""
+        final_block, fetched_at = self.finalized_blocks.get(blockchain_name, (-1, 0.0))
+
+        if block <= final_block:
+            return True
+
+        if time.monotonic() - fetched_at < RPC_CACHE_HEAD_REFRESH_SECONDS:
+            return False
+
+        rpc_url = self.get_next_rpc(blockchain_name)
+        response = await self.make_request(rpc_url, blockchain_name, "eth_blockNumber", [])
+        final_block = int(response["result"], 16) - RPC_CACHE_FINALITY_BLOCKS.get(
+            blockchain_name, RPC_CACHE_DEFAULT_FINALITY_BLOCKS
+        )
+        self.finalized_blocks[blockchain_name] = (final_block, time.monotonic())
+
+        return block <= final_block
+
+    async def get_logs_emitted_by_contract(
+        self,
+        blockchain: str,
+        contract: str | tuple,
+        topics: list,
+        start_block: int,
+        end_block: int,
+    ) -> list:
+        logs = await self.fetch_logs(blockchain, contract, topics, start_block, end_block)
+
+        for log in logs:
+            if log.get("blockTimestamp"):
+                await self.cache_block_timestamp(
+                    blockchain, log["blockNumber"], log["blockTimestamp"]
+                )
+
+        return logs
+
+    async def cache_block_timestamp(self, blockchain: str, block_number, timestamp):
+        """asyncio version of `EvmRPCClient.cache_block_timestamp`."""
+        timestamp_cache = get_block_timestamp_cache(blockchain)
+        block = timestamp_cache.to_int(block_number)
+        final = timestamp_cache.cache_file is None or await self.is_final_block(blockchain, block)
+        timestamp_cache.put(block, timestamp, final)
+
+    async def fetch_logs(
+        self,
+        blockchain: str,
+        contract: str | tuple,
+        topics: list,
+        start_block: int,
+        end_block: int,
+    ) -> list:
+        """
+        asyncio version of `EvmRPCClient.fetch_logs`, where the sub-ranges of a split range are
+        fetched concurrently.
+        """
+        func_name = "fetch_logs"
+        rpc = self.get_next_rpc(blockchain)
+        num_blocks = end_block - start_block + 1
+
+        max_range = self.log_range_limits.get(rpc, blockchain, contract)
+        if max_range is not None and num_blocks > max_range:
+            ranges = self.log_range_limits.split(start_block, end_block, max_range)
+        else:
+            params = [
+                {
+                    "fromBlock": hex(start_block),
+                    "toBlock": hex(end_block),
+                    "topics": [topics],
+                    "address": contract if isinstance(contract, str) else list(contract),
+                }
+            ]
+
+            refused = set()
+            while rpc is not None:
+                try:
+                    response = await self.make_request(rpc, blockchain, "eth_getLogs", params)
+                    return response["result"] if response else []
+                except ProviderLimitException as e:
+                    error = e
+                    refused.add(e.rpc_url)
+                    self.log_range_limits.learn(e.rpc_url, blockchain, contract, num_blocks // 2)
+                    rpc = self.get_next_log_rpc(blockchain, contract, num_blocks, refused)
+
+            if start_block >= end_block:
+                raise CustomException(
+                    self.CLASS_NAME,
+                    func_name,
+                    f"Logs of {contract} in block {start_block} exceed provider limits. {error}",
+                ) from error
+
+            middle = (start_block + end_block) // 2
+            ranges = [(start_block, middle), (middle + 1, end_block)]
+
+        results = await asyncio.gather(
+            *(self.fetch_logs(blockchain, contract, topics, start, end) for start, end in ranges)
+        )
+        return [log for logs in results for log in logs]
+
+    async def process_transactions(self, blockchain: str, transactions: list) -> dict:
+        """
+        asyncio version of `EvmRPCClient.process_transactions`. Takes a list of
+        (tx_hash, block_number) pairs and returns a dictionary mapping each tx_hash to its
+        (receipt, block) pair, including the transactions fetched by concurrent calls.
+        """
+        timestamp_cache = get_block_timestamp_cache(blockchain)
+        single_flight = get_single_flight()
+
+        transactions = dict(transactions)
+        timestamps = {
+            block_number: timestamp_cache.get(block_number)
+            for block_number in dict.fromkeys(transactions.values())
+        }
+
+        owned, in_flight = single_flight.claim(
+            [("transaction", blockchain, tx_hash) for tx_hash in transactions]
+            + [
+                ("block", blockchain, block_number)
+                for block_number, timestamp in timestamps.items()
+                if timestamp is None
+            ]
+        )
+        owned_txs = {key[2]: transactions[key[2]] for key in owned if key[0] == "transaction"}
+        owned_blocks = [key[2] for key in owned if key[0] == "block"]
+
+        try:
+            receipts, fetched_timestamps = await self.fetch_transactions(
+                blockchain, owned_txs, owned_blocks
+            )
+
+            # see EvmRPCClient.process_transactions for the order of the landings and waits
+            single_flight.land(
+                [key for key in owned if key[0] == "block"],
+                results={
+                    ("block", blockchain, block_number): timestamp
+                    for block_number, timestamp in fetched_timestamps.items()
+                },
+            )
+            timestamps.update(fetched_timestamps)
+
+            shared_blocks = await single_flight.wait_async(
+                {key: flight for key, flight in in_flight.items() if key[0] == "block"}
+            )
+            timestamps.update({key[2]: timestamp for key, timestamp in shared_blocks.items()})
+
+            results = {}
+            for tx_hash, block_number in owned_txs.items():
+                timestamp = timestamps.get(block_number)
+
+                results[tx_hash] = (
+                    receipts[tx_hash],
+                    (
+                        EvmRPCClient.build_block_header(block_number, timestamp)
+                        if timestamp is not None
+                        else {}
+                    ),
+                )
+        except BaseException as e:
+            # the keys landed already are left as they are
+            single_flight.land(owned, e)
+            raise
+
+        single_flight.land(
+            [key for key in owned if key[0] == "transaction"],
+            results={
+                ("transaction", blockchain, tx_hash): result for tx_hash, result in results.items()
+            },
+        )
+
+        shared_txs = await single_flight.wait_async(
+            {key: flight for key, flight in in_flight.items() if key[0] == "transaction"}
+        )
+        results.update({key[2]: result for key, result in shared_txs.items()})
+
+        return results
+
+    async def fetch_transactions(
+        self, blockchain: str, transactions: dict, block_numbers: list
+    ) -> tuple[dict, dict]:
+        """asyncio version of `EvmRPCClient.fetch_transactions`."""
+        timestamp_cache = get_block_timestamp_cache(blockchain)
+        tx_hashes = list(transactions.keys())
+
+        calls = [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in tx_hashes]
+        calls += [("eth_getBlockByNumber", [block_number, False]) for block_number in block_numbers]
+
+        if self.requires_transaction_by_hash_rpc_call:
+            calls += [("eth_getTransactionByHash", [tx_hash]) for tx_hash in tx_hashes]
+
+        responses = iter(await self.make_batch_request(blockchain, calls) if calls else [])
+
+        receipts = {tx_hash: next(responses) for tx_hash in tx_hashes}
+        timestamps = {}
+        for block_number in block_numbers:
+            response_block = next(responses)
+            if response_block:
+                timestamps[block_number] = timestamp_cache.to_int(
+                    response_block["result"]["timestamp"]
+                )
+                await self.cache_block_timestamp(blockchain, block_number, timestamps[block_number])
+        txs = {tx_hash: next(responses, None) for tx_hash in tx_hashes}
+
+        results = {}
+        for tx_hash in tx_hashes:
+            response_receipt = receipts[tx_hash]
+            response_tx = txs[tx_hash]
+
+            if response_receipt and response_tx:
+                response_receipt["result"]["value"] = response_tx["result"]["value"]
+                response_receipt["result"]["input"] = response_tx["result"]["input"]
+
+            results[tx_hash] = response_receipt["result"] if response_receipt else {}
+
+        return results, timestamps
+
+    async def process_transaction(self, blockchain: str, tx_hash: str, block_number: str) -> dict:
+        results = await self.process_transactions(blockchain, [(tx_hash, block_number)])
+        return results[tx_hash]
@@ -0,0 +1,189 @@
+import bisect
+import os
+import threading
+
+from config.constants import (
+    BLOCK_RESOLVER_INTERPOLATION_PROBES,
+    RPC_CACHE_DEFAULT_FINALITY_BLOCKS,
+    RPC_CACHE_FINALITY_BLOCKS,
+    Bridge,
+)
+from rpcs.evm_rpc_client import EvmRPCClient
+from utils.utils import CustomException, load_block_index_dir
+
+
+class BlockTimeIndex:
+    """
+    Sparse, sorted list of (block number, timestamp) points of a single blockchain, used to narrow
+    the search of the block of a timestamp. Only final blocks are added, so the points never
+    change. When `index_dir` is set, every new point is also appended to
+    `<index_dir>/<blockchain>.csv`, which is loaded back in later runs.
+    """
+
+    def __init__(self, blockchain: str, index_dir: str | None = None):
+        self.blockchain = blockchain
+        self.blocks = []
+        self.timestamps = []
+        self.lock = threading.Lock()
+        self.index_file = None
+
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+            self.index_file = os.path.join(index_dir, f"{blockchain}.csv")
+            self.load()
+
+    def load(self):
+        if not os.path.exists(self.index_file):
+            return
+
+        with open(self.index_file, "r") as f:
+            for line in f:
+                try:
+                    block_number, timestamp = line.strip().split(",")
+                    self.insert(int(block_number), int(timestamp))
+                except ValueError:
+                    # ignore lines truncated by an interrupted run
+                    continue
+
+    def insert(self, block_number: int, timestamp: int) -> bool:
+        """Inserts a point, keeping the blocks sorted. Returns False if the block was known."""
+        idx = bisect.bisect_left(self.blocks, block_number)
+        if idx < len(self.blocks) and self.blocks[idx] == block_number:
+            return False
+
+        self.blocks.insert(idx, block_number)
+        self.timestamps.insert(idx, timestamp)
+        return True
+
+    def add(self, block_number: int, timestamp: int):
+        with self.lock:
+            if self.insert(block_number, timestamp) and self.index_file:
+                with open(self.index_file, "a") as f:
+                    f.write(f"{block_number},{timestamp}\n")
+
+    def bounds(self, timestamp: int) -> tuple:
+        """
+        Returns the last point with a timestamp at or before `timestamp` and the first point after
+        it, as (block number, timestamp) tuples (None when there is no such point).
+        """
+        with self.lock:
+            # block timestamps never decrease, so the timestamps are sorted as well
+            idx = bisect.bisect_right(self.timestamps, timestamp)
+            lower = (self.blocks[idx - 1], self.timestamps[idx - 1]) if idx > 0 else None
+            upper = (self.blocks[idx], self.timestamps[idx]) if idx < len(self.blocks) else None
+            return lower, upper
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.blocks)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_block_time_index(blockchain: str) -> BlockTimeIndex:
+    """Returns the process-wide block-time index of a blockchain."""
+    with _indexes_lock:
+        if blockchain not in _indexes:
+            _indexes[blockchain] = BlockTimeIndex(blockchain, index_dir=load_block_index_dir())
+        return _indexes[blockchain]
+
+
+class BlockResolver:
+    """
+    Finds the last block of an EVM blockchain with a timestamp at or before a given timestamp, with
+    an interpolation search over the block timestamps returned by the RPC endpoints of the
+    blockchain (read through the block timestamp cache).
+
+    The search starts from the closest points of the BlockTimeIndex of the blockchain, and the
+    final blocks it probes are added to the index, so that later searches of nearby timestamps
+    only need a couple of probes.
+    """
+
+    CLASS_NAME = "BlockResolver"
+
+    def __init__(self, rpc_client, index: BlockTimeIndex | None = None):
+        self.rpc_client = rpc_client
+        # the process-wide index of each blockchain is used if None
+        self.index = index
+
+    def get_timestamp(self, blockchain: str, block_number: int) -> int:
+        func_name = "get_timestamp"
+
+        header = self.rpc_client.get_block_header(blockchain, hex(block_number))
+        if not header:
+            raise CustomException(
+                self.CLASS_NAME, func_name, f"Block {block_number} of {blockchain} not found"
+            )
+
+        return int(header["timestamp"], 16)
+
+    def get_block_by_timestamp(self, blockchain: str, timestamp: int) -> int:
+        func_name = "get_block_by_timestamp"
+
+        index = self.index if self.index is not None else get_block_time_index(blockchain)
+
+        head = self.rpc_client.get_latest_block_header(blockchain)
+        if not head:
+            raise CustomException(
+                self.CLASS_NAME, func_name, f"Latest block of {blockchain} not found"
+            )
+
+        head_block = int(head["number"], 16)
+        head_timestamp = int(head["timestamp"], 16)
+        if timestamp >= head_timestamp:
+            return head_block
+
+        final_block = head_block - RPC_CACHE_FINALITY_BLOCKS.get(
+            blockchain, RPC_CACHE_DEFAULT_FINALITY_BLOCKS
+        )
+
+        lower, upper = index.bounds(timestamp)
+        if lower is None:
+            lower = (0, self.get_timestamp(blockchain, 0))
+            index.add(*lower)
+            if timestamp < lower[1]:
+                return 0
+        if upper is None or upper[0] > head_block:
+            upper = (head_block, head_timestamp)
+
+        probes = 0
+        # lower[1] <= timestamp < upper[1]
+        while upper[0] - lower[0] > 1:
+            if probes < BLOCK_RESOLVER_INTERPOLATION_PROBES or probes % 2 == 0:
+                block_number = lower[0] + (timestamp - lower[1]) * (upper[0] - lower[0]) // (
+                    upper[1] - lower[1]
+                )
+            else:
+                block_number = (lower[0] + upper[0]) // 2
+            block_number = min(max(block_number, lower[0] + 1), upper[0] - 1)
+
+            block_timestamp = self.get_timestamp(blockchain, block_number)
+            probes += 1
+
+            if block_number <= final_block:
+                index.add(block_number, block_timestamp)
+
+            if block_timestamp <= timestamp:
+                lower = (block_number, block_timestamp)
+            else:
+                upper = (block_number, block_timestamp)
+
+        return lower[0]
+
+
+_resolvers = {}
+_resolvers_lock = threading.Lock()
+
+
+def get_block_resolver(bridge: Bridge) -> BlockResolver:
+    """
+    Returns the process-wide block resolver of a bridge. Its RPC client is shared by all the
+    timestamps resolved, so that the RPC configuration is loaded once and the health, batch sizes
+    and log range limits learned about the endpoints are kept.
+    """
+    with _resolvers_lock:
+        if bridge not in _resolvers:
+            _resolvers[bridge] = BlockResolver(EvmRPCClient(bridge))
+        return _resolvers[bridge]
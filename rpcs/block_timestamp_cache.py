@@ -0,0 +1,104 @@
+import os
+import threading
+from collections import OrderedDict
+
+from config.constants import BLOCK_TIMESTAMP_CACHE_SIZE
+from utils.utils import load_block_timestamp_cache_dir
+
+
+class BlockTimestampCache:
+    """
+    Thread-safe, bounded LRU mapping of block numbers to block timestamps for a single blockchain.
+    Block timestamps never change for a given block, so the cache is shared by all extractor
+    threads (see `get_block_timestamp_cache`). When `cache_dir` is set, every new entry of a final
+    block is also appended to `<cache_dir>/<blockchain>.csv`, which is loaded back in later runs.
+    Entries of blocks that may still be replaced by a reorg are only kept in memory.
+    """
+
+    def __init__(
+        self,
+        blockchain: str,
+        max_size: int = BLOCK_TIMESTAMP_CACHE_SIZE,
+        cache_dir: str | None = None,
+    ):
+        self.blockchain = blockchain
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.cache_file = None
+        # blocks cached in memory, but not persisted as they were not final yet
+        self.non_final_blocks = set()
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.cache_file = os.path.join(cache_dir, f"{blockchain}.csv")
+            self.load()
+
+    @staticmethod
+    def to_int(value) -> int:
+        return int(value, 0) if isinstance(value, str) else int(value)
+
+    def load(self):
+        if not os.path.exists(self.cache_file):
+            return
+
+        with open(self.cache_file, "r") as f:
+            for line in f:
+                try:
+                    block_number, timestamp = line.strip().split(",")
+                    self.entries[int(block_number)] = int(timestamp)
+                except ValueError:
+                    # ignore lines truncated by an interrupted run
+                    continue
+
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def get(self, block_number) -> int | None:
+        block_number = self.to_int(block_number)
+
+        with self.lock:
+            timestamp = self.entries.get(block_number)
+            if timestamp is not None:
+                self.entries.move_to_end(block_number)
+            return timestamp
+
+    def put(self, block_number, timestamp, final: bool = True):
+        block_number = self.to_int(block_number)
+        timestamp = self.to_int(timestamp)
+
+        with self.lock:
+            is_new = block_number not in self.entries or block_number in self.non_final_blocks
+            self.entries[block_number] = timestamp
+            self.entries.move_to_end(block_number)
+
+            if final:
+                self.non_final_blocks.discard(block_number)
+            else:
+                self.non_final_blocks.add(block_number)
+
+            if len(self.entries) > self.max_size:
+                evicted_block, _ = self.entries.popitem(last=False)
+                self.non_final_blocks.discard(evicted_block)
+
+            if final and is_new and self.cache_file:
+                with open(self.cache_file, "a") as f:
+                    f.write(f"{block_number},{timestamp}\n")
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.entries)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_block_timestamp_cache(blockchain: str) -> BlockTimestampCache:
+    """Returns the process-wide block timestamp cache of a blockchain."""
+    with _caches_lock:
+        if blockchain not in _caches:
+            _caches[blockchain] = BlockTimestampCache(
+                blockchain, cache_dir=load_block_timestamp_cache_dir()
+            )
+        return _caches[blockchain]
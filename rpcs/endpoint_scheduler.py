@@ -0,0 +1,156 @@
+import random
+import threading
+import time
+
+from config.constants import (
+    ENDPOINT_EJECTION_SECONDS,
+    ENDPOINT_EWMA_ALPHA,
+    ENDPOINT_FAILURE_THRESHOLD,
+    ENDPOINT_MAX_EJECTION_SECONDS,
+)
+
+
+class EndpointStats:
+    """Health statistics of a single RPC endpoint."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latency = None  # EWMA of the latency of successful requests, in seconds
+        self.error_rate = 0.0  # EWMA of the share of failed requests
+        self.requests = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    def score(self) -> float:
+        """
+        Expected cost of sending a request to the endpoint (lower is better). Endpoints without
+        samples yet score 0, so that each of them is tried early on.
+        """
+        if self.latency is None:
+            return 0.0
+        return self.latency / max(1.0 - self.error_rate, 0.05)
+
+    def is_ejected(self, now: float) -> bool:
+        return self.ejected_until > now
+
+    def to_dict(self) -> dict:
+        return {
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "requests": self.requests,
+            "failures": self.failures,
+            "rate_limited": self.rate_limited,
+            "ejected": self.is_ejected(time.monotonic()),
+        }
+
+
+class EndpointScheduler:
+    """
+    Thread-safe selection of the RPC endpoint of each request. Each endpoint keeps an EWMA of its
+    latency and error rate, and requests go to the best of two randomly picked endpoints
+    (power-of-two-choices), so slow or failing endpoints get less traffic. Endpoints that fail
+    ENDPOINT_FAILURE_THRESHOLD times in a row, or rate limit us, are ejected for an exponentially
+    growing period (circuit breaker), after which they are tried again.
+    """
+
+    def __init__(self, endpoints: dict, alpha: float = ENDPOINT_EWMA_ALPHA):
+        self.alpha = alpha
+        self.stats = {
+            blockchain: {rpc: EndpointStats(rpc) for rpc in rpcs}
+            for blockchain, rpcs in endpoints.items()
+        }
+        self.lock = threading.Lock()
+
+    def __contains__(self, blockchain: str) -> bool:
+        return blockchain in self.stats
+
+    def select(self, blockchain: str, exclude=()) -> str:
+        """
+        Returns the endpoint to use for the next request, ignoring the ones in `exclude` (e.g.
+        endpoints already tried for the request) unless there are no others.
+        """
+        now = time.monotonic()
+
+        with self.lock:
+            endpoints = list(self.stats[blockchain].values())
+            candidates = [stats for stats in endpoints if stats.url not in exclude] or endpoints
+
+            available = [stats for stats in candidates if not stats.is_ejected(now)]
+            if not available:
+                # every endpoint is ejected, so we use the one that is closest to coming back
+                return min(candidates, key=lambda stats: stats.ejected_until).url
+
+            if len(available) == 1:
+                return available[0].url
+
+            first, second = random.sample(available, 2)
+            return first.url if first.score() <= second.score() else second.url
+
+    def record_success(self, blockchain: str, rpc: str, latency: float | None = None):
+        """
+        Records a successful request. `latency` is only given for single calls, as the latency of
+        batches depends on their size.
+        """
+        with self.lock:
+            stats = self.stats[blockchain].get(rpc)
+            if stats is None:
+                return
+
+            stats.requests += 1
+            if latency is not None:
+                stats.latency = (
+                    latency
+                    if stats.latency is None
+                    else (1 - self.alpha) * stats.latency + self.alpha * latency
+                )
+            stats.error_rate = (1 - self.alpha) * stats.error_rate
+            stats.consecutive_failures = 0
+            stats.ejections = 0
+
+    def record_failure(
+        self,
+        blockchain: str,
+        rpc: str,
+        rate_limited: bool = False,
+        retry_after: float | None = None,
+    ):
+        """
+        Records a failed request. Rate limited endpoints are ejected right away (for `retry_after`
+        seconds, when the endpoint says so), the others after ENDPOINT_FAILURE_THRESHOLD
+        consecutive failures.
+        """
+        with self.lock:
+            stats = self.stats[blockchain].get(rpc)
+            if stats is None:
+                return
+
+            stats.requests += 1
+            stats.failures += 1
+            stats.error_rate = (1 - self.alpha) * stats.error_rate + self.alpha
+            stats.consecutive_failures += 1
+
+            if rate_limited:
+                stats.rate_limited += 1
+
+            if rate_limited:
+                self.eject(stats, retry_after)
+            elif stats.consecutive_failures >= ENDPOINT_FAILURE_THRESHOLD:
+                self.eject(stats)
+
+    def eject(self, stats: EndpointStats, duration: float | None = None):
+        if duration is None:
+            duration = min(
+                ENDPOINT_EJECTION_SECONDS * 2**stats.ejections, ENDPOINT_MAX_EJECTION_SECONDS
+            )
+
+        stats.ejections += 1
+        stats.consecutive_failures = 0
+        stats.ejected_until = max(stats.ejected_until, time.monotonic() + duration)
+
+    def get_stats(self, blockchain: str) -> dict:
+        """Returns the statistics of each endpoint of a blockchain, indexed by URL."""
+        with self.lock:
+            return {rpc: stats.to_dict() for rpc, stats in self.stats[blockchain].items()}
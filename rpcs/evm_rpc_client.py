@@ -1,37 +1,122 @@
+import random
+from collections import defaultdict
+
 from config.constants import (
+    BLOCK_RECEIPTS_MIN_TRANSACTIONS,
+    DEFAULT_TRANSACTION_FETCH_STRATEGY,
+    RPC_BATCH_READ_TIMEOUT,
     RPCS_CONFIG_FILE,
+    TRANSACTION_FETCH_STRATEGIES,
 )
+from rpcs import http_session
+from rpcs.block_timestamp_cache import get_block_timestamp_cache
 from rpcs.rpc_client import RPCClient
+from rpcs.singleflight import get_single_flight
+from utils.metrics import Metrics
+from utils.utils import CustomException, ProviderLimitException
 
 
 class EvmRPCClient(RPCClient):
     CLASS_NAME = "EvmRPCClient"
 
-    def __init__(self, bridge, config_file: str = RPCS_CONFIG_FILE):
+    def __init__(
+        self,
+        bridge,
+        config_file: str = RPCS_CONFIG_FILE,
+        fetch_strategy: str = DEFAULT_TRANSACTION_FETCH_STRATEGY,
+    ):
+        func_name = "__init__"
         super().__init__(bridge, config_file)
 
+        if fetch_strategy not in TRANSACTION_FETCH_STRATEGIES:
+            raise CustomException(
+                self.CLASS_NAME, func_name, f"Unknown fetch strategy {fetch_strategy}."
+            )
+
+        self.fetch_strategy = fetch_strategy
+        self.metrics = Metrics()
+        # endpoints that support eth_getBlockReceipts, detected when generating the RPC configs
+        self.block_receipts_rpcs = {
+            blockchain["name"]: blockchain.get("block_receipts_rpcs") or []
+            for blockchain in self.blockchains
+        }
+
     def get_logs_emitted_by_contract(
         self,
         blockchain: str,
-        contract: str,
+        contract: str | tuple,
         topics: list,
-        start_block: str,
-        end_block: str,
+        start_block: int,
+        end_block: int,
     ) -> list:
+        logs = self.fetch_logs(blockchain, contract, topics, start_block, end_block)
+
+        # some nodes already include the block timestamp in each log, which saves us from fetching
+        # the block header later on
+        for log in logs:
+            if log.get("blockTimestamp"):
+                self.cache_block_timestamp(blockchain, log["blockNumber"], log["blockTimestamp"])
+
+        return logs
+
+    def fetch_logs(
+        self,
+        blockchain: str,
+        contract: str | tuple,
+        topics: list,
+        start_block: int,
+        end_block: int,
+    ) -> list:
+        """
+        Fetches the logs of a contract (or a tuple of contracts) in the (inclusive) block range.
+        Ranges larger than the limit learned for the endpoint are split up front. Ranges refused by
+        the endpoint because of its limits are sent to the other endpoints, learning the limit of
+        each, and split in half (recursively) once no endpoint accepts them.
+        """
+        func_name = "fetch_logs"
+        rpc = self.get_next_rpc(blockchain)
+        num_blocks = end_block - start_block + 1
+
+        max_range = self.log_range_limits.get(rpc, blockchain, contract)
+        if max_range is not None and num_blocks > max_range:
+            logs = []
+            for start, end in self.log_range_limits.split(start_block, end_block, max_range):
+                logs += self.fetch_logs(blockchain, contract, topics, start, end)
+            return logs
+
         method = "eth_getLogs"
         params = [
             {
                 "fromBlock": hex(start_block),
                 "toBlock": hex(end_block),
                 "topics": [topics],
-                "address": contract,
+                "address": contract if isinstance(contract, str) else list(contract),
             }
         ]
 
-        rpc = self.get_next_rpc(blockchain)
-        response = self.make_request(rpc, blockchain, method, params)
-
-        return response["result"] if response else []
+        refused = set()
+        while rpc is not None:
+            try:
+                response = self.make_request(rpc, blockchain, method, params)
+                return response["result"] if response else []
+            except ProviderLimitException as e:
+                error = e
+                refused.add(e.rpc_url)
+                self.log_range_limits.learn(e.rpc_url, blockchain, contract, num_blocks // 2)
+                rpc = self.get_next_log_rpc(blockchain, contract, num_blocks, refused)
+
+        if start_block >= end_block:
+            raise CustomException(
+                self.CLASS_NAME,
+                func_name,
+                f"Logs of {contract} in block {start_block} exceed provider limits. {error}",
+            ) from error
+
+        self.metrics.increment("get_logs_splits")
+        middle = (start_block + end_block) // 2
+        return self.fetch_logs(blockchain, contract, topics, start_block, middle) + self.fetch_logs(
+            blockchain, contract, topics, middle + 1, end_block
+        )
 
     def process_transaction(self, blockchain: str, tx_hash: str, block_number: str) -> dict:
         import concurrent.futures
@@ -43,9 +128,6 @@ class EvmRPCClient(RPCClient):
         method_receipt = "eth_getTransactionReceipt"
         params_receipt = [tx_hash]
 
-        method_block = "eth_getBlockByNumber"
-        params_block = [block_number, True]
-
         rpc = self.get_next_rpc(blockchain)
 
         with concurrent.futures.ThreadPoolExecutor() as executor:
@@ -57,9 +139,7 @@ class EvmRPCClient(RPCClient):
             future_receipt = executor.submit(
                 self.make_request, rpc, blockchain, method_receipt, params_receipt
             )
-            future_block = executor.submit(
-                self.make_request, rpc, blockchain, method_block, params_block
-            )
+            future_block = executor.submit(self.get_block_header, blockchain, block_number)
 
             if self.requires_transaction_by_hash_rpc_call:
                 response_tx = future_tx.result()
@@ -67,15 +147,289 @@ class EvmRPCClient(RPCClient):
                 response_tx = None
 
             response_receipt = future_receipt.result()
-            response_block = future_block.result()
+            block = future_block.result()
 
             if response_receipt and response_tx:
                 response_receipt["result"]["value"] = response_tx["result"]["value"]
                 response_receipt["result"]["input"] = response_tx["result"]["input"]
 
-        return response_receipt["result"] if response_receipt else {}, response_block[
-            "result"
-        ] if response_block else {}
+        return response_receipt["result"] if response_receipt else {}, block
+
+    def process_transactions(self, blockchain: str, transactions: list) -> dict:
+        """
+        Batched version of `process_transaction`. Takes a list of (tx_hash, block_number) pairs
+        and returns a dictionary mapping each tx_hash to its (receipt, block) pair. All receipts,
+        block headers and (if required by the bridge) transactions are fetched through JSON-RPC
+        batches. Block headers are only requested for blocks whose timestamp is not cached yet,
+        and each block is only requested once.
+
+        Transactions and blocks being fetched by concurrent calls (e.g. for other logs or
+        contracts of the same transaction) are waited for instead of requested again, and their
+        (receipt, block) pairs returned as well, so that every caller can check that its
+        transactions were stored. A failure of the concurrent call is raised here as well.
+        """
+        timestamp_cache = get_block_timestamp_cache(blockchain)
+        single_flight = get_single_flight()
+
+        # the transactions and blocks repeated in the chunk are only requested once. Cached
+        # timestamps are read right away, as they can be evicted from the cache meanwhile
+        transactions = dict(transactions)
+        timestamps = {
+            block_number: timestamp_cache.get(block_number)
+            for block_number in dict.fromkeys(transactions.values())
+        }
+
+        owned, in_flight = single_flight.claim(
+            [("transaction", blockchain, tx_hash) for tx_hash in transactions]
+            + [
+                ("block", blockchain, block_number)
+                for block_number, timestamp in timestamps.items()
+                if timestamp is None
+            ]
+        )
+        owned_txs = {key[2]: transactions[key[2]] for key in owned if key[0] == "transaction"}
+        owned_blocks = [key[2] for key in owned if key[0] == "block"]
+
+        try:
+            receipts, fetched_timestamps = self.fetch_transactions(
+                blockchain, owned_txs, owned_blocks
+            )
+
+            # blocks are landed before waiting for anything, and transactions only wait for
+            # blocks before being landed, so that concurrent calls never wait for each other in a
+            # cycle
+            single_flight.land(
+                [key for key in owned if key[0] == "block"],
+                results={
+                    ("block", blockchain, block_number): timestamp
+                    for block_number, timestamp in fetched_timestamps.items()
+                },
+            )
+            timestamps.update(fetched_timestamps)
+
+            shared_blocks = single_flight.wait(
+                {key: flight for key, flight in in_flight.items() if key[0] == "block"}
+            )
+            timestamps.update({key[2]: timestamp for key, timestamp in shared_blocks.items()})
+
+            results = {}
+            for tx_hash, block_number in owned_txs.items():
+                timestamp = timestamps.get(block_number)
+
+                results[tx_hash] = (
+                    receipts[tx_hash],
+                    self.build_block_header(block_number, timestamp)
+                    if timestamp is not None
+                    else {},
+                )
+        except BaseException as e:
+            # the keys landed already are left as they are
+            single_flight.land(owned, e)
+            raise
+
+        single_flight.land(
+            [key for key in owned if key[0] == "transaction"],
+            results={
+                ("transaction", blockchain, tx_hash): result for tx_hash, result in results.items()
+            },
+        )
+
+        shared_txs = single_flight.wait(
+            {key: flight for key, flight in in_flight.items() if key[0] == "transaction"}
+        )
+        if shared_txs:
+            self.metrics.increment("transaction_fetches_shared", len(shared_txs))
+        results.update({key[2]: result for key, result in shared_txs.items()})
+
+        return results
+
+    def fetch_transactions(
+        self, blockchain: str, transactions: dict, block_numbers: list
+    ) -> tuple[dict, dict]:
+        """
+        Fetches the receipts of the transactions in `transactions` (tx_hash -> block_number) and
+        the timestamps of the blocks in `block_numbers`, which are put in the block timestamp
+        cache. Returns the receipts (empty if not found) indexed by tx_hash, and the timestamps
+        found indexed by block number.
+        """
+        timestamp_cache = get_block_timestamp_cache(blockchain)
+        tx_hashes = list(transactions.keys())
+
+        receipts = self.fetch_block_receipts(blockchain, transactions)
+        missing_receipts = [tx_hash for tx_hash in tx_hashes if tx_hash not in receipts]
+
+        calls = [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in missing_receipts]
+        calls += [("eth_getBlockByNumber", [block_number, False]) for block_number in block_numbers]
+
+        if self.requires_transaction_by_hash_rpc_call:
+            calls += [("eth_getTransactionByHash", [tx_hash]) for tx_hash in tx_hashes]
+
+        self.metrics.increment("transaction_receipt_calls", len(missing_receipts))
+
+        responses = iter(self.make_batch_request(blockchain, calls) if calls else [])
+
+        receipts.update({tx_hash: next(responses) for tx_hash in missing_receipts})
+        timestamps = {}
+        for block_number in block_numbers:
+            response_block = next(responses)
+            if response_block:
+                timestamps[block_number] = timestamp_cache.to_int(
+                    response_block["result"]["timestamp"]
+                )
+                self.cache_block_timestamp(blockchain, block_number, timestamps[block_number])
+        txs = {tx_hash: next(responses, None) for tx_hash in tx_hashes}
+
+        results = {}
+        for tx_hash in tx_hashes:
+            response_receipt = receipts[tx_hash]
+            response_tx = txs[tx_hash]
+
+            if response_receipt and response_tx:
+                response_receipt["result"]["value"] = response_tx["result"]["value"]
+                response_receipt["result"]["input"] = response_tx["result"]["input"]
+
+            results[tx_hash] = response_receipt["result"] if response_receipt else {}
+
+        return results, timestamps
+
+    def fetch_block_receipts(self, blockchain: str, transactions: dict) -> dict:
+        """
+        Fetches, according to the fetch strategy, the receipts of the transactions in `transactions`
+        (tx_hash -> block_number) with one eth_getBlockReceipts call per block. Returns the
+        receipts found, as RPC responses indexed by tx_hash. Transactions without a receipt here
+        must be fetched with eth_getTransactionReceipt.
+        """
+        if self.fetch_strategy == "transaction" or not self.block_receipts_rpcs.get(blockchain):
+            return {}
+
+        txs_per_block = defaultdict(list)
+        for tx_hash, block_number in transactions.items():
+            txs_per_block[block_number].append(tx_hash)
+
+        min_transactions = BLOCK_RECEIPTS_MIN_TRANSACTIONS if self.fetch_strategy == "auto" else 1
+
+        receipts = {}
+        for block_number, tx_hashes in txs_per_block.items():
+            if len(tx_hashes) < min_transactions:
+                continue
+
+            block_receipts = self.get_block_receipts(blockchain, block_number)
+
+            if block_receipts is None:
+                continue
+
+            receipts_by_hash = {
+                receipt["transactionHash"].lower(): receipt for receipt in block_receipts
+            }
+
+            num_found = 0
+            for tx_hash in tx_hashes:
+                if tx_hash.lower() in receipts_by_hash:
+                    receipts[tx_hash] = {"result": receipts_by_hash[tx_hash.lower()]}
+                    num_found += 1
+
+            self.metrics.increment("block_receipts_calls")
+            # the receipts not found are still fetched one by one
+            self.metrics.increment("transaction_receipt_calls_saved", max(num_found - 1, 0))
+
+        return receipts
+
+    def get_block_receipts(self, blockchain: str, block_number: str) -> list | None:
+        """
+        Fetches all receipts of a block from the endpoints that support eth_getBlockReceipts.
+        Each endpoint is tried once, and None is returned if none of them answers, in which case
+        the receipts must be fetched one by one.
+        """
+        method = "eth_getBlockReceipts"
+        params = [block_number]
+
+        cached_response = self.get_cached_response(blockchain, method, params)
+        if cached_response is not None:
+            return cached_response["result"]
+
+        rpcs = list(self.block_receipts_rpcs[blockchain])
+        random.shuffle(rpcs)
+
+        payload = {"id": 1, "jsonrpc": "2.0", "method": method, "params": params}
+
+        for rpc in rpcs:
+            try:
+                response = http_session.post(
+                    rpc,
+                    json=payload,
+                    headers=self.build_headers(blockchain),
+                    timeout=self.timeouts.get(rpc, RPC_BATCH_READ_TIMEOUT),
+                )
+                response.raise_for_status()
+
+                body = response.json()
+                if isinstance(body.get("result"), list):
+                    self.cache_response(blockchain, method, params, body)
+                    return body["result"]
+            except Exception:
+                # ignore the exception and try the next RPC endpoint
+                pass
+
+        self.metrics.increment("block_receipts_failures")
+        return None
+
+    def get_block_header(self, blockchain: str, block_number: str) -> dict:
+        """
+        Returns a minimal block header ({"number", "timestamp"}) for a block. The timestamp is read
+        from the shared block timestamp cache, and only when missing the block is fetched without
+        its transaction bodies.
+        """
+        timestamp_cache = get_block_timestamp_cache(blockchain)
+        timestamp = timestamp_cache.get(block_number)
+
+        if timestamp is None:
+            method = "eth_getBlockByNumber"
+            params = [block_number, False]
+
+            rpc = self.get_next_rpc(blockchain)
+            response = self.make_request(rpc, blockchain, method, params)
+
+            if not response:
+                return {}
+
+            timestamp = timestamp_cache.to_int(response["result"]["timestamp"])
+            self.cache_block_timestamp(blockchain, block_number, timestamp)
+
+        return self.build_block_header(block_number, timestamp)
+
+    def cache_block_timestamp(self, blockchain: str, block_number, timestamp):
+        """
+        Puts the timestamp of a block in the block timestamp cache. When the cache is persisted,
+        it is only written to disk once the block is final (see `RPCClient.is_final_block`).
+        """
+        timestamp_cache = get_block_timestamp_cache(blockchain)
+        block = timestamp_cache.to_int(block_number)
+        final = timestamp_cache.cache_file is None or self.is_final_block(blockchain, block)
+        timestamp_cache.put(block, timestamp, final)
+
+    def get_latest_block_header(self, blockchain: str) -> dict:
+        """
+        Returns the header ({"number", "timestamp"}) of the latest block. Its timestamp is not put
+        in the block timestamp cache, as the latest block may still be replaced by a reorg.
+        """
+        method = "eth_getBlockByNumber"
+        params = ["latest", False]
+
+        rpc = self.get_next_rpc(blockchain)
+        response = self.make_request(rpc, blockchain, method, params)
+
+        if not response:
+            return {}
+
+        return {
+            "number": response["result"]["number"],
+            "timestamp": response["result"]["timestamp"],
+        }
+
+    @staticmethod
+    def build_block_header(block_number: str, timestamp: int) -> dict:
+        # timestamps are kept as hex strings, as in the responses of the RPC nodes
+        return {"number": block_number, "timestamp": hex(timestamp)}
 
     def get_transaction_receipt(self, blockchain: str, tx_hash: str) -> dict:
         method = "eth_getTransactionReceipt"
@@ -113,6 +467,19 @@ class EvmRPCClient(RPCClient):
 
         return response["result"] if response else {}
 
+    def get_block_hash(self, blockchain: str, block_number: int) -> str | None:
+        """Returns the hash of a block of the canonical chain, as seen by the next endpoint."""
+        method = "eth_getBlockByNumber"
+        params = [hex(block_number), False]
+
+        rpc = self.get_next_rpc(blockchain)
+        response = self.make_request(rpc, blockchain, method, params)
+
+        if not response or not response.get("result"):
+            return None
+
+        return response["result"]["hash"]
+
     def get_block(self, blockchain: str, block_number: str) -> dict:
         method = "eth_getBlockByNumber"
         params = [block_number, True]
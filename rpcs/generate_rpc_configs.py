@@ -84,18 +84,48 @@ def test_rpcs(configs, blockchains):
             except Exception as e:
                 print("Removing RPC: ", rpc, e)
 
-        final_configs.append(
-            {
-                "name": config["name"],
-                "contract": config["contract"],
-                "topics": config["topics"],
-                "start_block": config["start_block"],
-                "end_block": config["end_block"],
-                "rpcs": rpcs,
+        block_receipts_rpcs = [
+            rpc for rpc in rpcs if supports_block_receipts(rpc, config["start_block"])
+        ]
+
+        final_config = {
+            "name": config["name"],
+            "contract": config["contract"],
+            "topics": config["topics"],
+            "start_block": config["start_block"],
+            "end_block": config["end_block"],
+            "rpcs": rpcs,
+            "block_receipts_rpcs": block_receipts_rpcs,
+        }
+
+        # optional tuning settings are copied as they are, only keeping available endpoints
+        for setting in ["max_batch_size", "timeout", "requests_per_second", "burst"]:
+            if setting in config:
+                final_config[setting] = config[setting]
+
+        if "endpoint_settings" in config:
+            final_config["endpoint_settings"] = {
+                rpc: settings
+                for rpc, settings in config["endpoint_settings"].items()
+                if rpc in rpcs
             }
-        )
+
+        final_configs.append(final_config)
 
     outfile = "./config/rpcs_config.yaml"
     with open(outfile, "w") as f:
         yaml.dump({"blockchains": final_configs}, f, default_flow_style=False, indent=2)
         print(f"RPC configurations generated and written to {outfile}.")
+
+
+def supports_block_receipts(rpc: str, block_number: str) -> bool:
+    """
+    Checks whether an RPC endpoint supports the eth_getBlockReceipts method, which returns all the
+    receipts of a block in a single call.
+    """
+    try:
+        response = EvmRPCClient.plain_request(rpc, "eth_getBlockReceipts", [block_number])
+    except Exception:
+        return False
+
+    return "error" not in response and isinstance(response.get("result"), list)
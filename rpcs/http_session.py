@@ -0,0 +1,60 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.constants import HTTP_POOL_SIZE, RPC_CONNECT_TIMEOUT, RPC_READ_TIMEOUT
+from rpcs import rate_limiter
+
+
+def build_session(pool_size: int = HTTP_POOL_SIZE) -> requests.Session:
+    """
+    Creates a session that keeps up to `pool_size` keep-alive connections open, so that requests
+    to the same endpoint reuse TCP and TLS connections instead of opening new ones.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate"})
+    return session
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(url: str) -> requests.Session:
+    """Returns the process-wide session of the endpoint (scheme and host) serving `url`."""
+    parts = urlsplit(url)
+    endpoint = f"{parts.scheme}://{parts.netloc}"
+
+    with _sessions_lock:
+        if endpoint not in _sessions:
+            _sessions[endpoint] = build_session()
+        return _sessions[endpoint]
+
+
+def post(url: str, json=None, headers: dict = None, timeout=None) -> requests.Response:
+    """
+    Sends a POST request through the pooled session of the endpoint. `timeout` is the read
+    timeout in seconds (RPC_READ_TIMEOUT by default), and connections time out after
+    RPC_CONNECT_TIMEOUT seconds. Requests wait for the rate limiter of the URL, which is paused
+    whenever the endpoint replies with HTTP 429.
+    """
+    rate_limiter.acquire(url)
+
+    response = get_session(url).post(
+        url,
+        json=json,
+        headers=headers,
+        timeout=(RPC_CONNECT_TIMEOUT, timeout or RPC_READ_TIMEOUT),
+    )
+
+    if response.status_code == 429:
+        rate_limiter.pause(
+            url, rate_limiter.get_retry_delay(response.headers.get("Retry-After"), response.text)
+        )
+
+    return response
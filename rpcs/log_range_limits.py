@@ -0,0 +1,37 @@
+import threading
+
+
+class LogRangeLimits:
+    """
+    Thread-safe record of the largest eth_getLogs block range accepted by each
+    (endpoint, blockchain, contract), learned from the provider limit errors of the endpoints.
+    """
+
+    def __init__(self):
+        self.limits = {}
+        self.lock = threading.Lock()
+
+    def get(self, rpc: str, blockchain: str, contract: str) -> int | None:
+        with self.lock:
+            return self.limits.get((rpc, blockchain, contract))
+
+    def accepts(self, rpc: str, blockchain: str, contract: str, num_blocks: int) -> bool:
+        """Whether the endpoint is not known to refuse ranges of `num_blocks` blocks."""
+        max_range = self.get(rpc, blockchain, contract)
+        return max_range is None or num_blocks <= max_range
+
+    def learn(self, rpc: str, blockchain: str, contract: str, max_range: int):
+        """Records that the endpoint only accepts ranges of at most `max_range` blocks."""
+        key = (rpc, blockchain, contract)
+        max_range = max(1, max_range)
+
+        with self.lock:
+            self.limits[key] = min(self.limits.get(key, max_range), max_range)
+
+    @staticmethod
+    def split(start_block: int, end_block: int, max_range: int) -> list:
+        """Splits the (inclusive) block range into ranges of at most `max_range` blocks."""
+        return [
+            (start, min(start + max_range - 1, end_block))
+            for start in range(start_block, end_block + 1, max_range)
+        ]
@@ -0,0 +1,260 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import yaml
+
+from config.constants import MOCK_RPC_NODE_PORT
+from rpcs.rate_limiter import TokenBucket
+from rpcs.response_cache import ResponseCache
+from rpcs.rpc_recorder import load_recorded_calls
+
+
+class MockRPCNode:
+    """
+    Local stand-in for the JSON-RPC nodes of the blockchains, replaying the calls recorded with
+    RPC_RECORD_DIR. Each blockchain is served under `/<blockchain>/<endpoint index>`, so that
+    several endpoints can be configured per blockchain. Every request is delayed by `latency`
+    seconds, fails with HTTP 503 with probability `error_rate`, and is refused with HTTP 429 when
+    the endpoint receives more than `requests_per_second` requests per second (with bursts of up
+    to `burst`). eth_getLogs ranges that were not recorded are refused as too large, as the
+    recorded run must have split them. The Solana decoder is served under `/parseTransactionByHash`.
+    """
+
+    def __init__(
+        self,
+        recorded_calls: dict,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        requests_per_second: float | None = None,
+        burst: float | None = None,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.random = random.Random(seed)
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+        # {blockchain: {call key: result}}, and the recorded eth_getLogs ranges of each
+        # (blockchain, address, topics) filter as (from block, to block, logs)
+        self.results = {}
+        self.log_ranges = {}
+        for blockchain, calls in recorded_calls.items():
+            results = self.results.setdefault(blockchain, {})
+            for call in calls:
+                method, params, result = call["method"], call["params"], call["result"]
+                if method == "eth_getLogs":
+                    self.log_ranges.setdefault(self.log_filter(blockchain, params), []).append(
+                        (int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16), result)
+                    )
+                else:
+                    results[ResponseCache.build_key(blockchain, method, params)] = result
+
+        for ranges in self.log_ranges.values():
+            ranges.sort(key=lambda log_range: log_range[0])
+
+    def get_bucket(self, path: str) -> TokenBucket:
+        with self.lock:
+            if path not in self.buckets:
+                self.buckets[path] = TokenBucket(self.requests_per_second, self.burst)
+            return self.buckets[path]
+
+    def handle(self, path: str, payload) -> tuple:
+        """Returns the (HTTP status, body, headers) of the reply to a request sent to `path`."""
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.requests_per_second:
+            delay = self.get_bucket(path).try_reserve()
+            if delay > 0:
+                body = {"error": {"code": 429, "message": "too many requests"}}
+                return 429, body, {"Retry-After": f"{delay:.3f}"}
+
+        with self.lock:
+            failed = self.random.random() < self.error_rate
+        if failed:
+            return 503, {"error": {"code": 503, "message": "service unavailable"}}, {}
+
+        if path.strip("/") == "parseTransactionByHash":
+            result = self.replay("solana", "parseTransactionByHash", [payload.get("signature")])
+            if result is None:
+                return 404, {"error": "transaction not recorded"}, {}
+            return 200, result, {}
+
+        blockchain = path.strip("/").split("/")[0]
+
+        if isinstance(payload, list):
+            return 200, [self.reply(blockchain, call) for call in payload], {}
+
+        return 200, self.reply(blockchain, payload), {}
+
+    def reply(self, blockchain: str, call: dict) -> dict:
+        method, params = call.get("method"), call.get("params", [])
+        result = self.replay(blockchain, method, params)
+
+        if result is None:
+            if method == "eth_getLogs":
+                # the recorded run split this range because the provider refused it
+                message = "block range too large (range not recorded)"
+            else:
+                message = f"call {method} not recorded"
+                print(f"Call not recorded: {blockchain} {method} {params}")
+
+            return {
+                "id": call.get("id"),
+                "jsonrpc": "2.0",
+                "error": {"code": -32001, "message": message},
+            }
+
+        return {"id": call.get("id"), "jsonrpc": "2.0", "result": result}
+
+    def replay(self, blockchain: str, method: str, params: list):
+        if method == "eth_getLogs":
+            return self.replay_logs(blockchain, params)
+
+        key = ResponseCache.build_key(blockchain, method, params)
+        return self.results.get(blockchain, {}).get(key)
+
+    def replay_logs(self, blockchain: str, params: list) -> list | None:
+        """
+        Returns the logs of an eth_getLogs call from the recorded ranges of its filter, or None when
+        the recorded ranges do not cover the whole range of the call.
+        """
+        start_block, end_block = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+        covered_until = start_block
+        logs = {}
+
+        for from_block, to_block, range_logs in self.log_ranges.get(
+            self.log_filter(blockchain, params), []
+        ):
+            if to_block < covered_until:
+                continue
+            if from_block > covered_until:
+                return None
+
+            for log in range_logs:
+                if start_block <= int(log["blockNumber"], 16) <= end_block:
+                    logs[(log["transactionHash"], log["logIndex"])] = log
+
+            covered_until = to_block + 1
+            if covered_until > end_block:
+                return sorted(
+                    logs.values(),
+                    key=lambda log: (int(log["blockNumber"], 16), int(log["logIndex"], 16)),
+                )
+
+        return None
+
+    @staticmethod
+    def log_filter(blockchain: str, params: list) -> tuple:
+        address = params[0].get("address")
+        topics = params[0].get("topics")
+        return (blockchain, json.dumps(address).lower(), json.dumps(topics).lower())
+
+    def build_server(self, host: str, port: int) -> ThreadingHTTPServer:
+        node = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    payload = json.loads(self.rfile.read(length))
+                except ValueError:
+                    status, body, headers = 400, {"error": "invalid JSON"}, {}
+                else:
+                    status, body, headers = node.handle(self.path, payload)
+
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), RequestHandler)
+        server.daemon_threads = True
+        return server
+
+
+def write_rpc_config(blockchain_names: list, base_url: str, num_endpoints: int, config_file: str):
+    """
+    Writes an RPC configuration file pointing each blockchain to `num_endpoints` endpoints of the
+    mock node, so that extractions run against it instead of the real nodes.
+    """
+    blockchains = []
+
+    for blockchain in blockchain_names:
+        if blockchain == "solana":
+            blockchains.append({"name": blockchain, "rpcs": [f"{base_url}/solana/0"]})
+            continue
+
+        rpcs = [f"{base_url}/{blockchain}/{idx}" for idx in range(num_endpoints)]
+        blockchains.append({"name": blockchain, "rpcs": rpcs, "block_receipts_rpcs": rpcs})
+
+    with open(config_file, "w") as f:
+        yaml.dump({"blockchains": blockchains}, f, default_flow_style=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock JSON-RPC node replaying recorded calls")
+    parser.add_argument("--fixtures", required=True, help="Directory of the recorded calls")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=MOCK_RPC_NODE_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="Delay of each request (s)")
+    parser.add_argument(
+        "--error_rate", type=float, default=0.0, help="Probability of failing a request"
+    )
+    parser.add_argument(
+        "--requests_per_second", type=float, help="Rate limit of each endpoint (none by default)"
+    )
+    parser.add_argument("--burst", type=float, help="Requests allowed at once by the rate limit")
+    parser.add_argument(
+        "--endpoints", type=int, default=4, help="Number of endpoints served per blockchain"
+    )
+    parser.add_argument(
+        "--config_out", help="Write an RPC configuration file pointing to this node"
+    )
+    parser.add_argument("--seed", type=int, help="Seed of the simulated errors")
+    args = parser.parse_args()
+
+    recorded_calls = load_recorded_calls(args.fixtures)
+    node = MockRPCNode(
+        recorded_calls,
+        args.latency,
+        args.error_rate,
+        args.requests_per_second,
+        args.burst,
+        args.seed,
+    )
+    server = node.build_server(args.host, args.port)
+    base_url = f"http://{args.host}:{server.server_address[1]}"
+
+    if args.config_out:
+        write_rpc_config(sorted(recorded_calls), base_url, args.endpoints, args.config_out)
+
+    num_calls = sum(len(calls) for calls in recorded_calls.values())
+    print(f"Replaying {num_calls} recorded calls of {sorted(recorded_calls)} on {base_url}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from config.constants import RATE_LIMIT_DEFAULT_PAUSE, RATE_LIMIT_MAX_PAUSE
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket pacing the requests sent to a single endpoint: up to `burst` requests
+    can be sent at once, refilled at `rate` requests per second. Without a rate, requests are not
+    paced, but the bucket can still be paused (e.g. after a rate limit response).
+    """
+
+    def __init__(self, rate: float | None = None, burst: float | None = None):
+        self.lock = threading.Lock()
+        self.paused_until = 0.0
+        self.rate = None
+        self.burst = None
+        self.tokens = None
+        self.configure(rate, burst)
+
+    def configure(self, rate: float | None, burst: float | None):
+        """
+        Sets the rate and burst of the bucket. The tokens left are kept (up to the new burst), so
+        reconfiguring the bucket of an endpoint in use does not let a new burst of requests through.
+        """
+        burst = max(1.0, burst if burst is not None else (rate or 1.0))
+
+        with self.lock:
+            now = time.monotonic()
+            if not self.rate:
+                # the tokens of unpaced buckets are not used
+                self.tokens = burst
+            else:
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+
+            self.rate = rate
+            self.burst = burst
+            self.tokens = min(self.tokens, burst)
+            self.updated = now
+
+    def reserve(self) -> float:
+        """Takes a token and returns how long (in seconds) to wait before sending the request."""
+        with self.lock:
+            now = time.monotonic()
+            delay = max(0.0, self.paused_until - now)
+
+            if self.rate:
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                # tokens can go negative, which queues the requests of concurrent threads
+                self.tokens -= 1
+                if self.tokens < 0:
+                    delay = max(delay, -self.tokens / self.rate)
+
+            return delay
+
+    def try_reserve(self) -> float:
+        """
+        Takes a token only if one is available right away. Returns 0 when it was taken, or how long
+        (in seconds) to wait until one is available otherwise.
+        """
+        with self.lock:
+            now = time.monotonic()
+            delay = max(0.0, self.paused_until - now)
+
+            if self.rate:
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens < 1:
+                    delay = max(delay, (1 - self.tokens) / self.rate)
+
+            if delay == 0 and self.rate:
+                self.tokens -= 1
+
+            return delay
+
+    def pause(self, seconds: float):
+        """Stops sending requests for `seconds` (e.g. as requested by a Retry-After header)."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(url: str) -> TokenBucket:
+    """Returns the process-wide token bucket of an endpoint URL."""
+    with _buckets_lock:
+        if url not in _buckets:
+            _buckets[url] = TokenBucket()
+        return _buckets[url]
+
+
+def configure(url: str, rate: float | None, burst: float | None = None):
+    """Sets the rate and burst of the bucket of an endpoint, unless they are already set."""
+    bucket = get_bucket(url)
+    burst = max(1.0, burst if burst is not None else (rate or 1.0))
+    if (bucket.rate, bucket.burst) != (rate, burst):
+        bucket.configure(rate, burst)
+
+
+def acquire(url: str):
+    """Blocks the calling thread until a request can be sent to the endpoint."""
+    delay = get_bucket(url).reserve()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def pause(url: str, seconds: float):
+    get_bucket(url).pause(min(seconds, RATE_LIMIT_MAX_PAUSE))
+
+
+def get_retry_delay(retry_after: str | None, body: str = "") -> float:
+    """
+    Returns how long to wait after a rate limit response, read from its Retry-After header
+    (seconds or HTTP date) or, when missing, from messages such as "try again in 2s" in its body.
+    """
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+
+    match = re.search(
+        r"(?:try again|retry) (?:in|after) (\d+(?:\.\d+)?) ?(ms|s)?", body or "", re.IGNORECASE
+    )
+    if match:
+        delay = float(match.group(1))
+        return delay / 1000 if match.group(2) == "ms" else delay
+
+    return RATE_LIMIT_DEFAULT_PAUSE
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+
+from config.constants import RPC_CACHE_METHODS
+from utils.utils import load_rpc_cache_dir
+
+
+class ResponseCache:
+    """
+    On-disk cache of the responses of RPC methods whose results never change once their block is
+    final (logs, receipts, transactions, blocks). Responses are zlib-compressed JSON stored in a
+    SQLite database, keyed by the SHA-256 of the canonical (blockchain, method, params) triple.
+    Callers are responsible for only storing responses of final blocks (see `response_block`).
+    """
+
+    def __init__(self, cache_dir: str):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            os.path.join(cache_dir, "rpc_responses.sqlite"), check_same_thread=False
+        )
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key BLOB PRIMARY KEY, value BLOB NOT NULL)"
+            )
+            self.connection.commit()
+
+    @staticmethod
+    def build_key(blockchain: str, method: str, params: list) -> bytes:
+        # hex strings (hashes, addresses, block numbers) are case-insensitive
+        def canonical(value):
+            if isinstance(value, str):
+                return value.lower()
+            if isinstance(value, list):
+                return [canonical(item) for item in value]
+            if isinstance(value, dict):
+                return {key: canonical(item) for key, item in value.items()}
+            return value
+
+        data = json.dumps(
+            [blockchain, method, canonical(params)], sort_keys=True, separators=(",", ":")
+        )
+        return hashlib.sha256(data.encode()).digest()
+
+    def get(self, blockchain: str, method: str, params: list) -> dict | None:
+        key = self.build_key(blockchain, method, params)
+
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def put(self, blockchain: str, method: str, params: list, response: dict):
+        key = self.build_key(blockchain, method, params)
+        value = zlib.compress(json.dumps(response, separators=(",", ":")).encode())
+
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value) VALUES (?, ?)", (key, value)
+            )
+            self.connection.commit()
+
+    @staticmethod
+    def is_cacheable(method: str) -> bool:
+        return method in RPC_CACHE_METHODS
+
+    @staticmethod
+    def response_block(method: str, params: list, response: dict) -> int | None:
+        """
+        Returns the (highest) block number the response depends on, which must be final for the
+        response to be cached. Returns None when it cannot be determined (e.g. block tags such as
+        "latest"), in which case the response is not cached.
+        """
+
+        def to_int(value) -> int | None:
+            if isinstance(value, int):
+                return value
+            try:
+                return int(value, 16) if isinstance(value, str) else None
+            except ValueError:
+                return None
+
+        if method == "eth_getLogs":
+            return to_int(params[0].get("toBlock"))
+
+        if method in ("eth_getBlockByNumber", "eth_getBlockReceipts"):
+            return to_int(params[0])
+
+        result = response.get("result")
+
+        if isinstance(result, dict):
+            return to_int(result.get("blockNumber"))
+
+        if isinstance(result, list) and result and isinstance(result[0], dict):
+            # traces of a transaction
+            return to_int(result[0].get("blockNumber"))
+
+        return None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache | None:
+    """Returns the process-wide RPC response cache, or None if caching is disabled."""
+    global _cache
+
+    cache_dir = load_rpc_cache_dir()
+    if not cache_dir:
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(cache_dir)
+        return _cache
@@ -1,16 +1,36 @@
 import time
 from abc import ABC, abstractmethod
-from itertools import cycle
 
 import requests
 import yaml
 
 from config.constants import (
+    BATCH_SIZE_LIMIT_ERRORS,
     BRIDGE_NEEDS_TRANSACTION_BY_HASH_RPC_METHOD,
+    GET_LOGS_LIMIT_ERRORS,
     MAX_NUM_THREADS_EXTRACTOR,
+    MAX_RPC_BATCH_SIZE,
+    RATE_LIMIT_ERRORS,
+    RPC_BATCH_READ_TIMEOUT,
+    RPC_BURST,
+    RPC_CACHE_DEFAULT_FINALITY_BLOCKS,
+    RPC_CACHE_FINALITY_BLOCKS,
+    RPC_CACHE_HEAD_REFRESH_SECONDS,
+    RPC_READ_TIMEOUT,
+    RPC_REQUESTS_PER_SECOND,
     RPCS_CONFIG_FILE,
 )
-from utils.utils import CustomException, load_solana_api_key, log_error
+from rpcs import http_session, rate_limiter
+from rpcs.endpoint_scheduler import EndpointScheduler
+from rpcs.log_range_limits import LogRangeLimits
+from rpcs.response_cache import ResponseCache, get_response_cache
+from rpcs.rpc_recorder import get_rpc_recorder
+from utils.utils import (
+    CustomException,
+    ProviderLimitException,
+    load_solana_api_key,
+    log_error,
+)
 
 
 class RPCClient(ABC):
@@ -19,10 +39,19 @@ class RPCClient(ABC):
     def __init__(self, bridge, config_file: str = RPCS_CONFIG_FILE):
         self.bridge = bridge
         self.blockchains = self.load_config(config_file)
-        self.rpc_mapping = self.initialize_rpc_mapping()
+        self.scheduler = self.initialize_scheduler()
         self.rpc_sizes = {
             blockchain["name"]: len(blockchain["rpcs"]) for blockchain in self.blockchains
         }
+        self.batch_sizes = self.initialize_batch_sizes()
+        self.timeouts = self.initialize_timeouts()
+        self.initialize_rate_limits()
+        # eth_getLogs block range limits learned from the endpoints
+        self.log_range_limits = LogRangeLimits()
+        self.response_cache = get_response_cache()
+        self.recorder = get_rpc_recorder()
+        # blockchain -> (last final block, time it was fetched)
+        self.finalized_blocks = {}
         self.requires_transaction_by_hash_rpc_call = BRIDGE_NEEDS_TRANSACTION_BY_HASH_RPC_METHOD[
             bridge
         ]  # noqa: E501
@@ -44,36 +73,122 @@ class RPCClient(ABC):
         with open(config_file, "r") as file:
             return yaml.safe_load(file)["blockchains"]
 
-    def initialize_rpc_mapping(self):
-        """Initialize a round-robin cycle for each blockchain's RPC endpoints."""
-        rpc_mapping = {}
+    def initialize_scheduler(self) -> EndpointScheduler:
+        """Initialize the health-based selection of each blockchain's RPC endpoints."""
+        return EndpointScheduler(
+            {blockchain["name"]: blockchain["rpcs"] for blockchain in self.blockchains}
+        )
+
+    def initialize_batch_sizes(self) -> dict:
+        """
+        Initialize the maximum number of calls sent in a single JSON-RPC batch to each endpoint.
+        The default can be set per blockchain with `max_batch_size` and per endpoint under
+        `endpoint_settings` in the RPC configuration file.
+        """
+        batch_sizes = {}
+        for blockchain in self.blockchains:
+            default_size = blockchain.get("max_batch_size", MAX_RPC_BATCH_SIZE)
+            endpoint_settings = blockchain.get("endpoint_settings") or {}
+            for rpc in blockchain["rpcs"]:
+                settings = endpoint_settings.get(rpc) or {}
+                batch_sizes[rpc] = max(1, int(settings.get("max_batch_size", default_size)))
+        return batch_sizes
+
+    def initialize_timeouts(self) -> dict:
+        """
+        Initialize the read timeout (in seconds) of the requests sent to each endpoint, which can be
+        set per blockchain with `timeout` and per endpoint under `endpoint_settings` in the RPC
+        configuration file. Endpoints without a configured timeout are not in the mapping and use
+        the defaults of single calls and batches.
+        """
+        timeouts = {}
         for blockchain in self.blockchains:
-            blockchain_name = blockchain["name"]
-            rpc_mapping[blockchain_name] = cycle(blockchain["rpcs"])
-        return rpc_mapping
+            default_timeout = blockchain.get("timeout")
+            endpoint_settings = blockchain.get("endpoint_settings") or {}
+            for rpc in blockchain["rpcs"]:
+                settings = endpoint_settings.get(rpc) or {}
+                timeout = settings.get("timeout", default_timeout)
+                if timeout is not None:
+                    timeouts[rpc] = float(timeout)
+        return timeouts
 
-    def get_next_rpc(self, blockchain_name: str) -> str:
-        """Get the next RPC URL in the round-robin cycle for a blockchain."""
+    def initialize_rate_limits(self):
+        """
+        Configure the rate limiter of each endpoint, which can be set per blockchain with
+        `requests_per_second` and `burst` and per endpoint under `endpoint_settings` in the RPC
+        configuration file. The rate limiters are shared by all clients of the process, so creating
+        a client does not refill them.
+        """
+        for blockchain in self.blockchains:
+            default_rate = blockchain.get("requests_per_second", RPC_REQUESTS_PER_SECOND)
+            default_burst = blockchain.get("burst", RPC_BURST)
+            endpoint_settings = blockchain.get("endpoint_settings") or {}
+            for rpc in blockchain["rpcs"]:
+                settings = endpoint_settings.get(rpc) or {}
+                rate_limiter.configure(
+                    rpc,
+                    settings.get("requests_per_second", default_rate),
+                    settings.get("burst", default_burst),
+                )
+
+    def get_next_rpc(self, blockchain_name: str, exclude=()) -> str:
+        """
+        Get the RPC URL to use for the next request to a blockchain, preferring the healthiest
+        endpoints. Endpoints in `exclude` are only returned if there are no others.
+        """
         func_name = "get_next_rpc"
-        if blockchain_name not in self.rpc_mapping:
+        if blockchain_name not in self.scheduler:
             raise CustomException(
                 self.CLASS_NAME,
                 func_name,
                 f"blockchain {blockchain_name} not found in configuration.",
             )
 
-        next_rpc = next(self.rpc_mapping[blockchain_name])
-        return next_rpc
+        return self.scheduler.select(blockchain_name, exclude)
+
+    def get_next_log_rpc(
+        self, blockchain_name: str, contract: str | tuple, num_blocks: int, refused: set
+    ) -> str | None:
+        """
+        Get the endpoint to send an eth_getLogs request of `num_blocks` blocks of a contract to,
+        other than the endpoints in `refused` and the ones known to refuse ranges of that size.
+        Returns None if there is no such endpoint.
+        """
+        rpcs = next(
+            blockchain["rpcs"]
+            for blockchain in self.blockchains
+            if blockchain["name"] == blockchain_name
+        )
+        exclude = set(refused) | {
+            rpc
+            for rpc in rpcs
+            if not self.log_range_limits.accepts(rpc, blockchain_name, contract, num_blocks)
+        }
+
+        rpc = self.get_next_rpc(blockchain_name, exclude)
+        return None if rpc in exclude else rpc
+
+    def get_endpoint_stats(self, blockchain_name: str) -> dict:
+        """Get the latency, error rate and request counters of each endpoint of a blockchain."""
+        return self.scheduler.get_stats(blockchain_name)
 
     def get_random_rpc(self, blockchain) -> str:
         """Get a random RPC URL for Ethereum."""
         return self.get_next_rpc(blockchain)
 
     def make_request(self, rpc_url: str, blockchain_name: str, method: str, params: list) -> dict:
-        """Make an RPC request using the next available endpoint in the round-robin."""
+        """
+        Make an RPC request, falling back to the other endpoints of the blockchain on failure.
+        Requests that exceed the limits of the provider (e.g. eth_getLogs over too many blocks)
+        are not retried, and raise a ProviderLimitException instead.
+        """
         func_name = "make_request"
         num_rpcs = self.rpc_sizes[blockchain_name]
 
+        cached_response = self.get_cached_response(blockchain_name, method, params)
+        if cached_response is not None:
+            return cached_response
+
         try:
             backoff = 1
             while True:
@@ -86,28 +201,48 @@ class RPCClient(ABC):
                         "params": params,
                     }
 
-                    if blockchain_name == "solana":
-                        headers = {
-                            "Content-Type": "application/json",
-                            "Accept": "application/json",
-                            "Authorization": f"Bearer {load_solana_api_key()}",
-                        }
-                    else:
-                        headers = {
-                            "Content-Type": "application/json",
-                            "Accept": "application/json",
-                        }
+                    headers = self.build_headers(blockchain_name)
+                    response = None
                     try:
-                        response = requests.post(rpc_url, json=payload, headers=headers, timeout=10)
+                        start_time = time.monotonic()
+                        response = http_session.post(
+                            rpc_url,
+                            json=payload,
+                            headers=headers,
+                            timeout=self.timeouts.get(rpc_url, RPC_READ_TIMEOUT),
+                        )
+
+                        if method == "eth_getLogs" and self.is_provider_limit_error(
+                            self.parse_json(response)
+                        ):
+                            raise ProviderLimitException(
+                                self.CLASS_NAME,
+                                func_name,
+                                f"{rpc_url} refused {method} with params {params}: "
+                                f"{response.text}",
+                                rpc_url,
+                            )
+
                         response.raise_for_status()
 
-                        if response.json() is None or response.json()["result"] is None:
+                        body = response.json()
+                        if body is None or body["result"] is None:
                             raise Exception()
 
-                        return response.json()
+                        self.scheduler.record_success(
+                            blockchain_name, rpc_url, time.monotonic() - start_time
+                        )
+                        self.cache_response(blockchain_name, method, params, body)
+                        return body
+                    except ProviderLimitException:
+                        raise
                     except Exception as e:
                         tried_rpcs[rpc_url] = e
-                        rpc_url = self.get_next_rpc(blockchain_name)
+                        retry_after = self.pause_if_rate_limited(rpc_url, response)
+                        self.scheduler.record_failure(
+                            blockchain_name, rpc_url, retry_after is not None, retry_after
+                        )
+                        rpc_url = self.get_next_rpc(blockchain_name, exclude=tried_rpcs)
                         # ignore the exception and try the next RPC endpoint
                         pass
 
@@ -125,6 +260,8 @@ class RPCClient(ABC):
                 )
                 backoff = (backoff * 2) if backoff < 30 else 0
 
+        except ProviderLimitException:
+            raise
         except Exception as e:
             raise CustomException(
                 self.CLASS_NAME,
@@ -135,13 +272,249 @@ class RPCClient(ABC):
                 ),
             ) from e
 
+    def make_batch_request(self, blockchain_name: str, calls: list) -> list:
+        """
+        Send a list of (method, params) calls packed into JSON-RPC batch arrays, split according
+        to the maximum batch size of each endpoint. Endpoints that reject the size of a batch have
+        their batch size halved (down to single calls), and calls of other failed batches or that
+        fail inside a batch are retried one by one with `make_request`. Returns the responses in
+        the same order as `calls`.
+        """
+        responses = [
+            self.get_cached_response(blockchain_name, method, params) for method, params in calls
+        ]
+        pending = [idx for idx, response in enumerate(responses) if response is None]
+        # calls answered by a batch, as `make_request` caches the responses it fetches itself
+        batched = []
+
+        while pending:
+            rpc_url = self.get_next_rpc(blockchain_name)
+            batch_size = self.batch_sizes.get(rpc_url, 1)
+            chunk, pending = pending[:batch_size], pending[batch_size:]
+
+            if batch_size == 1:
+                for idx in chunk:
+                    method, params = calls[idx]
+                    responses[idx] = self.make_request(rpc_url, blockchain_name, method, params)
+                continue
+
+            payload = [
+                {"id": idx, "jsonrpc": "2.0", "method": calls[idx][0], "params": calls[idx][1]}
+                for idx in chunk
+            ]
+
+            try:
+                response = http_session.post(
+                    rpc_url,
+                    json=payload,
+                    headers=self.build_headers(blockchain_name),
+                    timeout=self.timeouts.get(rpc_url, RPC_BATCH_READ_TIMEOUT),
+                )
+            except requests.exceptions.RequestException:
+                self.scheduler.record_failure(blockchain_name, rpc_url)
+                # the endpoint is unreachable, not necessarily unable to handle batches, so we
+                # let `make_request` deal with the retries across the remaining endpoints
+                for idx in chunk:
+                    method, params = calls[idx]
+                    responses[idx] = self.make_request(rpc_url, blockchain_name, method, params)
+                continue
+
+            results = self.parse_batch_response(response)
+
+            if results is None:
+                retry_after = self.pause_if_rate_limited(rpc_url, response)
+                self.scheduler.record_failure(
+                    blockchain_name, rpc_url, retry_after is not None, retry_after
+                )
+
+                if retry_after is not None or self.is_batch_size_error(
+                    response.status_code, self.parse_json(response)
+                ):
+                    # the provider rejected the size of the batch, so we halve the batch size for
+                    # this endpoint (unless it is only rate limiting us) and put the calls back in
+                    # the queue
+                    if retry_after is None:
+                        self.batch_sizes[rpc_url] = max(1, batch_size // 2)
+                    pending = chunk + pending
+                    continue
+
+                # any other failure (e.g. a 502 reply) does not tell anything about the batch
+                # size, so we let `make_request` retry the calls across the endpoints
+                for idx in chunk:
+                    method, params = calls[idx]
+                    responses[idx] = self.make_request(rpc_url, blockchain_name, method, params)
+                continue
+
+            self.scheduler.record_success(blockchain_name, rpc_url)
+
+            for idx in chunk:
+                result = results.get(idx)
+                if result is None or result.get("result") is None:
+                    method, params = calls[idx]
+                    result = self.make_request(rpc_url, blockchain_name, method, params)
+                else:
+                    batched.append(idx)
+                responses[idx] = result
+
+        for idx in batched:
+            method, params = calls[idx]
+            self.cache_response(blockchain_name, method, params, responses[idx])
+
+        return responses
+
+    def get_cached_response(self, blockchain_name: str, method: str, params: list) -> dict | None:
+        """Returns the cached response of a call, if caching is enabled and the call is cached."""
+        if self.response_cache is None or not ResponseCache.is_cacheable(method):
+            return None
+
+        response = self.response_cache.get(blockchain_name, method, params)
+        if response is not None:
+            self.record_response(blockchain_name, method, params, response)
+        return response
+
+    def cache_response(self, blockchain_name: str, method: str, params: list, response: dict):
+        """
+        Caches the response of a call, if caching is enabled and its block is final. Every response
+        is also recorded as a fixture when recording is enabled.
+        """
+        self.record_response(blockchain_name, method, params, response)
+
+        if self.response_cache is None or not ResponseCache.is_cacheable(method):
+            return
+
+        block = ResponseCache.response_block(method, params, response)
+        if block is not None and self.is_final_block(blockchain_name, block):
+            self.response_cache.put(blockchain_name, method, params, response)
+
+    def record_response(self, blockchain_name: str, method: str, params: list, response: dict):
+        """Records the response of a call as a fixture, if recording is enabled."""
+        if self.recorder is not None:
+            self.recorder.record(blockchain_name, method, params, response)
+
+    def get_latest_block_number(self, blockchain_name: str) -> int:
+        rpc_url = self.get_next_rpc(blockchain_name)
+        response = self.make_request(rpc_url, blockchain_name, "eth_blockNumber", [])
+        return int(response["result"], 16)
+
+    def is_final_block(self, blockchain_name: str, block: int) -> bool:
+        """
+        Whether a block is at least RPC_CACHE_FINALITY_BLOCKS behind the latest block of the
+        blockchain, which is only fetched again after RPC_CACHE_HEAD_REFRESH_SECONDS.
+        """
+        final_block, fetched_at = self.finalized_blocks.get(blockchain_name, (-1, 0.0))
+
+        if block <= final_block:
+            return True
+
+        if time.monotonic() - fetched_at < RPC_CACHE_HEAD_REFRESH_SECONDS:
+            return False
+
+        final_block = self.get_latest_block_number(blockchain_name) - RPC_CACHE_FINALITY_BLOCKS.get(
+            blockchain_name, RPC_CACHE_DEFAULT_FINALITY_BLOCKS
+        )
+        self.finalized_blocks[blockchain_name] = (final_block, time.monotonic())
+
+        return block <= final_block
+
+    @staticmethod
+    def parse_json(response):
+        """Returns the decoded body of a response, or None if it is not valid JSON."""
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    @staticmethod
+    def is_provider_limit_error(body) -> bool:
+        """Whether the endpoint replied with an error saying that the request exceeds its limits."""
+        if not isinstance(body, dict) or not isinstance(body.get("error"), dict):
+            return False
+
+        message = str(body["error"].get("message", "")).lower()
+        return any(error in message for error in GET_LOGS_LIMIT_ERRORS)
+
+    @staticmethod
+    def is_rate_limit_error(status_code: int, body) -> bool:
+        """Whether the endpoint replied that it is rate limiting us (HTTP 429 or error message)."""
+        if status_code == 429:
+            return True
+
+        if not isinstance(body, dict) or not isinstance(body.get("error"), dict):
+            return False
+
+        message = str(body["error"].get("message", "")).lower()
+        return any(error in message for error in RATE_LIMIT_ERRORS)
+
+    def pause_if_rate_limited(self, rpc_url: str, response) -> float | None:
+        """
+        Pauses the rate limiter of the endpoint when `response` says it is rate limiting us, for
+        the time given in its Retry-After header or error message. Returns that time in seconds,
+        or None when the endpoint is not rate limiting us.
+        """
+        if response is None or not self.is_rate_limit_error(
+            response.status_code, self.parse_json(response)
+        ):
+            return None
+
+        retry_after = rate_limiter.get_retry_delay(
+            response.headers.get("Retry-After"), response.text
+        )
+        rate_limiter.pause(rpc_url, retry_after)
+        return retry_after
+
+    @staticmethod
+    def is_batch_size_error(status_code: int, body) -> bool:
+        """Whether a failed batch reply means that the endpoint does not accept batches that big."""
+        if status_code == 413:
+            return True
+
+        error = body.get("error") if isinstance(body, dict) else None
+        message = error.get("message") if isinstance(error, dict) else error
+        message = str(message or "").lower()
+
+        return any(fragment in message for fragment in BATCH_SIZE_LIMIT_ERRORS)
+
+    @staticmethod
+    def parse_batch_response(response) -> dict | None:
+        """
+        Map each response in a JSON-RPC batch reply to its request id. Returns None when the reply
+        is not a valid batch, which means the provider does not accept batches of that size.
+        """
+        if response.status_code != 200:
+            return None
+
+        try:
+            results = response.json()
+        except ValueError:
+            return None
+
+        if not isinstance(results, list):
+            return None
+
+        return {result.get("id"): result for result in results if isinstance(result, dict)}
+
+    @staticmethod
+    def build_headers(blockchain_name: str) -> dict:
+        if blockchain_name == "solana":
+            return {
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+                "Authorization": f"Bearer {load_solana_api_key()}",
+            }
+
+        return {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        }
+
     @staticmethod
     def plain_request(rpc, method, params):
         func_name = "plain_request"
-        response = requests.post(
+        response = http_session.post(
             rpc,
             headers={"Content-Type": "application/json", "Accept": "application/json"},
             json={"id": 1, "jsonrpc": "2.0", "method": method, "params": params},
+            timeout=RPC_BATCH_READ_TIMEOUT,
         )
 
         if response.status_code != 200:
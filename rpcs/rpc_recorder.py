@@ -0,0 +1,66 @@
+import json
+import os
+import threading
+
+from utils.utils import load_rpc_record_dir
+
+
+class RPCRecorder:
+    """
+    Records the successful JSON-RPC calls of a run as fixtures, one JSON line per call in
+    `<record_dir>/<blockchain>.jsonl`, which can be replayed offline with `rpcs.mock_rpc_node`.
+    """
+
+    def __init__(self, record_dir: str):
+        os.makedirs(record_dir, exist_ok=True)
+        self.record_dir = record_dir
+        self.lock = threading.Lock()
+
+    def record(self, blockchain: str, method: str, params: list, response: dict):
+        line = json.dumps(
+            {"method": method, "params": params, "result": response.get("result")},
+            separators=(",", ":"),
+        )
+
+        with self.lock:
+            with open(os.path.join(self.record_dir, f"{blockchain}.jsonl"), "a") as f:
+                f.write(line + "\n")
+
+
+def load_recorded_calls(record_dir: str) -> dict:
+    """Loads the recorded calls of each blockchain, as {blockchain: [{method, params, result}]}."""
+    recorded_calls = {}
+
+    for file_name in sorted(os.listdir(record_dir)):
+        if not file_name.endswith(".jsonl"):
+            continue
+
+        calls = recorded_calls.setdefault(file_name[: -len(".jsonl")], [])
+
+        with open(os.path.join(record_dir, file_name), "r") as f:
+            for line in f:
+                try:
+                    calls.append(json.loads(line))
+                except ValueError:
+                    # ignore lines truncated by an interrupted run
+                    continue
+
+    return recorded_calls
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_rpc_recorder() -> RPCRecorder | None:
+    """Returns the process-wide RPC recorder, or None if recording is disabled."""
+    global _recorder
+
+    record_dir = load_rpc_record_dir()
+    if not record_dir:
+        return None
+
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = RPCRecorder(record_dir)
+        return _recorder
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+
+from utils.utils import CustomException
+
+
+class Flight:
+    """A fetch in progress, waited for by the callers that requested the same key meanwhile."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+        # what the owner fetched, handed to the waiters
+        self.result = None
+
+
+class SingleFlight:
+    """
+    Thread-safe map of the keys (e.g. transactions or blocks) being fetched, so that concurrent
+    requests for the same key share a single fetch (see `get_single_flight`).
+
+    Callers `claim` the keys they need, fetch the ones they own, `land` them with what they
+    fetched, and `wait` for the keys owned by other callers, which returns what their owners
+    fetched. Keys can be landed in stages (e.g. blocks, then the transactions built from them), as
+    long as every caller lands the keys of a stage before waiting for the keys of that stage owned
+    by other callers, so that callers never wait for each other in a cycle.
+    """
+
+    CLASS_NAME = "SingleFlight"
+
+    def __init__(self):
+        self.flights = {}
+        self.lock = threading.Lock()
+
+    def claim(self, keys: list) -> tuple:
+        """
+        Registers the keys that are not being fetched as owned by the caller. Returns the owned
+        keys, and the flights of the keys being fetched by other callers, as {key: flight}.
+        """
+        owned = []
+        in_flight = {}
+
+        with self.lock:
+            for key in dict.fromkeys(keys):
+                flight = self.flights.get(key)
+                if flight is None:
+                    self.flights[key] = Flight()
+                    owned.append(key)
+                else:
+                    in_flight[key] = flight
+
+        return owned, in_flight
+
+    def land(self, keys: list, error: BaseException | None = None, results: dict | None = None):
+        """
+        Marks the owned keys as fetched, with their results in `results` (key -> result), or as
+        failed with `error`, releasing their waiters.
+        """
+        with self.lock:
+            flights = [(key, self.flights.pop(key)) for key in keys if key in self.flights]
+
+        for key, flight in flights:
+            flight.error = error
+            flight.result = results.get(key) if results else None
+            flight.done.set()
+
+    def wait(self, in_flight: dict) -> dict:
+        """
+        Waits for the keys fetched by other callers, and returns their results (key -> result).
+        Raises if any of the fetches failed.
+        """
+        func_name = "wait"
+        results = {}
+
+        for key, flight in in_flight.items():
+            flight.done.wait()
+            if flight.error is not None:
+                raise CustomException(
+                    self.CLASS_NAME,
+                    func_name,
+                    f"Concurrent fetch of {key} failed: {flight.error}",
+                ) from flight.error
+            results[key] = flight.result
+
+        return results
+
+    async def wait_async(self, in_flight: dict) -> dict:
+        """asyncio version of `wait`, which waits in a thread so the event loop keeps running."""
+        if not in_flight:
+            return {}
+        return await asyncio.get_running_loop().run_in_executor(None, self.wait, in_flight)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.flights)
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """Returns the process-wide map of the keys being fetched."""
+    return _single_flight
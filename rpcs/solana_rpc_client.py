@@ -1,10 +1,10 @@
 import json
 
-import requests
-
 from config.constants import (
+    RPC_BATCH_READ_TIMEOUT,
     RPCS_CONFIG_FILE,
 )
+from rpcs import http_session
 from rpcs.rpc_client import RPCClient
 from utils.utils import (
     CliColor,
@@ -102,13 +102,14 @@ class SolanaRPCClient(RPCClient):
 
         rpc = self.get_next_rpc("solana")
 
-        response = requests.post(
+        response = http_session.post(
             f"{self.SOLANA_DECODER_URL}/parseTransactionByHash",
             headers={
                 "Content-Type": "application/json",
                 "Accept": "application/json",
             },
             json={"rpcUrl": rpc, "signature": tx_signature},
+            timeout=RPC_BATCH_READ_TIMEOUT,
         )
 
         if response.status_code != 200:
@@ -118,4 +119,10 @@ class SolanaRPCClient(RPCClient):
                 f"RPC request failed with status code {response.status_code}",
             )
 
-        return response.json()
+        decoded_tx = response.json()
+        # the decoder is replayed by the mock node as a call of the solana blockchain
+        self.record_response(
+            "solana", "parseTransactionByHash", [tx_signature], {"result": decoded_tx}
+        )
+
+        return decoded_tx
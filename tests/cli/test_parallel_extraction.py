@@ -0,0 +1,40 @@
+import argparse
+import threading
+
+from cli import Cli
+from extractor.evm_extractor import EvmExtractor
+
+
+def test_blockchains_are_extracted_concurrently(monkeypatch):
+    blockchains = ["ethereum", "arbitrum", "base"]
+    all_started = threading.Barrier(len(blockchains), timeout=5)
+    post_processed = []
+
+    class FakeExtractor(EvmExtractor):
+        def __init__(self):
+            pass
+
+        def post_processing(self):
+            post_processed.append(self)
+
+    def fake_extract_evm_data(idx, bridge, blockchain, start_block, end_block, *args):
+        # fails (with BrokenBarrierError) unless all blockchains are extracted at the same time
+        all_started.wait()
+        return FakeExtractor()
+
+    monkeypatch.setattr(Cli, "load_db_models", lambda bridge: None)
+    monkeypatch.setattr(Cli, "extract_evm_data", fake_extract_evm_data)
+    monkeypatch.setattr("cli.cli.generate_rpc_configs", lambda blockchains: None)
+    monkeypatch.setattr("cli.cli.get_block_by_timestamp", lambda timestamp, blockchain, bridge: 0)
+
+    args = argparse.Namespace(
+        blockchains=blockchains,
+        bridge="cctp",
+        start_ts=0,
+        end_ts=1,
+        parallel_blockchains=len(blockchains),
+    )
+    Cli.extract_data(args)
+
+    assert not all_started.broken
+    assert len(post_processed) == 1
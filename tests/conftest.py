@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def error_log_file(tmp_path, monkeypatch):
+    """Writes the errors logged by the tests (see `log_error`) to tmp_path instead of the repo."""
+    log_file = tmp_path / "error_log.log"
+
+    def log_to_file(message: str, _log_file: str):
+        with open(log_file, "a") as f:
+            f.write(f"{message}\n")
+
+    monkeypatch.setattr("utils.utils.log_to_file", log_to_file)
+    return log_file
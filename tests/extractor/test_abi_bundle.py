@@ -0,0 +1,40 @@
+import random
+
+from config.constants import Bridge
+from extractor.abi_bundle import AbiBundle
+from extractor.decoder import BridgeDecoder
+from tests.extractor.test_decoder import build_log
+
+
+def test_only_the_contracts_of_the_given_blockchains_are_indexed():
+    decoder = BridgeDecoder(Bridge.CCTP, ["arbitrum"])
+
+    assert decoder.contract_abi_files
+    assert {blockchain for _, blockchain in decoder.contract_abi_files} == {"arbitrum"}
+    # ABIs are parsed, and web3 contracts built, on first use
+    assert decoder.contracts_abi == {}
+    assert decoder.contracts == {}
+
+
+def test_bundled_event_layouts_skip_parsing_the_abis(tmp_path):
+    rng = random.Random(5)
+    decoder = BridgeDecoder(Bridge.CCTP, ["ethereum"])
+    logs = []
+    for contract_addr, blockchain in decoder.contract_abi_files:
+        for selector, event_abi in decoder.get_event_abis(contract_addr, blockchain).items():
+            _, types = decoder.get_abi_input_types_custom(event_abi, ("test", selector))
+            logs.append((contract_addr, blockchain, build_log(event_abi, selector, types, rng)))
+
+    abi_bundle = AbiBundle(Bridge.CCTP, str(tmp_path), load=False)
+    decoder.build_abi_bundle(abi_bundle)
+    abi_bundle.save()
+
+    bundled_decoder = BridgeDecoder(Bridge.CCTP, ["ethereum"])
+    bundled_decoder.abi_bundle = AbiBundle(Bridge.CCTP, str(tmp_path))
+
+    assert len(bundled_decoder.abi_bundle) == len(abi_bundle)
+    for contract_addr, blockchain, log in logs:
+        assert bundled_decoder.decode(contract_addr, blockchain, log) == decoder.decode(
+            contract_addr, blockchain, log
+        )
+    assert bundled_decoder.contracts_abi == {}
@@ -0,0 +1,69 @@
+import random
+
+from eth_abi import encode
+
+from config.constants import Bridge
+from extractor.bulk_decoder import StaticEventLayout
+from extractor.decoder import BridgeDecoder
+from tests.extractor.test_decoder import build_log
+
+
+def test_static_events_are_decoded_in_bulk_as_by_the_generic_decoder():
+    rng = random.Random(11)
+    bulk_events = 0
+
+    for bridge in (Bridge.CCTP, Bridge.ACROSS, Bridge.POLYGON):
+        decoder = BridgeDecoder(bridge)
+
+        for contract_addr, blockchain in decoder.contract_abi_files:
+            logs = []
+            for selector, event_abi in decoder.get_event_abis(contract_addr, blockchain).items():
+                names, types = decoder.get_abi_input_types_custom(event_abi, ("test", selector))
+                if StaticEventLayout.from_types(names, types) is None:
+                    continue
+                logs += [build_log(event_abi, selector, types, rng) for _ in range(40)]
+                bulk_events += 1
+
+            rng.shuffle(logs)
+            expected = [decoder.decode(contract_addr, blockchain, log) for log in logs]
+
+            assert decoder.decode_logs(contract_addr, blockchain, logs) == expected
+
+        assert decoder.metrics.get("bulk") > 0
+
+    assert bulk_events > 5
+
+
+def test_invalid_words_are_left_to_the_generic_decoder():
+    layout = StaticEventLayout(
+        ["amount", "delta", "recipient", "ok", "tag"],
+        ["uint256", "int24", "address", "bool", "bytes4"],
+    )
+    values = [2**255 + 7, -5, "0x" + "ab" * 20, True, b"\x01\x02\x03\x04"]
+    params = encode(layout.types, values)
+
+    def log(data: bytes) -> dict:
+        return {"topics": ["0x" + "00" * 32], "data": "0x" + data.hex()}
+
+    # non-zero padding of the address, a bool of 2, and a log with extra data
+    bad_address = params[:70] + b"\x01" + params[71:]
+    bad_bool = params[:127] + b"\x02" + params[128:]
+    logs = [log(params), log(bad_address), log(params), log(bad_bool), log(params + params[:32])]
+
+    columns, row_idxs, invalid_idxs = layout.decode_columns(logs)
+
+    assert row_idxs == [0, 2]
+    assert invalid_idxs == [1, 3, 4]
+    assert columns == {
+        "amount": [2**255 + 7] * 2,
+        "delta": [-5] * 2,
+        "recipient": ["0xABaBaBaBABabABabAbAbABAbABabababaBaBABaB"] * 2,
+        "ok": [True] * 2,
+        "tag": ["01020304"] * 2,
+    }
+
+
+def test_dynamic_types_have_no_static_layout():
+    assert StaticEventLayout.from_types(["a", "b"], ["uint256", "bytes"]) is None
+    assert StaticEventLayout.from_types(["a"], ["(uint256,address)"]) is None
+    assert StaticEventLayout.from_types(["a"], ["uint256[2]"]) is None
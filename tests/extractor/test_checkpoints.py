@@ -0,0 +1,185 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+from types import SimpleNamespace
+
+from config.constants import Bridge
+from extractor.async_evm_extractor import AsyncEvmExtractor
+from extractor.checkpoints import Checkpoints
+from extractor.evm_extractor import EvmExtractor
+from extractor.pipeline_evm_extractor import PipelineEvmExtractor
+
+
+class FakeCheckpointRepository:
+    def __init__(self):
+        self.rows = []
+
+    def save_range(
+        self,
+        bridge,
+        blockchain,
+        contract,
+        topics,
+        start_block,
+        end_block,
+        status,
+        error=None,
+        num_logs=None,
+    ):
+        key = (bridge, blockchain, contract, topics, start_block, end_block)
+        self.rows = [row for row in self.rows if row.key != key]
+        self.rows.append(
+            SimpleNamespace(
+                key=key,
+                bridge=bridge,
+                blockchain=blockchain,
+                contract=contract,
+                topics=topics,
+                start_block=start_block,
+                end_block=end_block,
+                status=status,
+                error=error,
+                num_logs=num_logs,
+            )
+        )
+
+    def get_ranges(self, bridge, blockchain, status):
+        rows = [
+            row
+            for row in self.rows
+            if (row.bridge, row.blockchain, row.status) == (bridge, blockchain, status)
+        ]
+        return sorted(rows, key=lambda row: row.start_block)
+
+
+def test_subtract_removes_completed_ranges():
+    assert Checkpoints.subtract([(0, 99)], [(10, 19), (0, 4), (50, 120)]) == [(5, 9), (20, 49)]
+    assert Checkpoints.subtract([(0, 9), (10, 19)], [(0, 9)]) == [(10, 19)]
+    assert Checkpoints.subtract([(0, 9)], []) == [(0, 9)]
+
+
+def test_missing_ranges_are_kept_per_filter():
+    checkpoints = Checkpoints(Bridge.CCTP, "ethereum", FakeCheckpointRepository())
+    checkpoints.complete("0xA", ["0xtopic"], 0, 9)
+    checkpoints.complete(("0xA", "0xB"), ["0xtopic"], 10, 19)
+
+    assert checkpoints.missing_ranges("0xA", ["0xtopic"], [(0, 9), (10, 19)]) == [(10, 19)]
+    assert checkpoints.missing_ranges("0xA", ["0xother"], [(0, 9)]) == [(0, 9)]
+    assert checkpoints.missing_ranges(("0xA", "0xB"), ["0xtopic"], [(10, 19)]) == []
+
+
+def test_failed_ranges_exclude_ranges_completed_since():
+    checkpoints = Checkpoints(Bridge.CCTP, "ethereum", FakeCheckpointRepository())
+    checkpoints.fail("0xA", ["0xtopic"], 0, 9, Exception("timeout"))
+    checkpoints.fail(("0xA", "0xB"), ["0xtopic"], 0, 9, Exception("timeout"))
+    checkpoints.fail("0xA", ["0xtopic"], 10, 19, Exception("timeout"))
+    checkpoints.complete("0xA", ["0xtopic"], 10, 19)
+
+    assert checkpoints.failed_ranges() == [
+        ("0xA", ["0xtopic"], 0, 9),
+        (("0xA", "0xB"), ["0xtopic"], 0, 9),
+    ]
+
+
+def test_pipeline_checkpoints_ranges_once_all_their_items_are_done():
+    # the RPC client, decoder and handler are not needed to track the items of each range
+    extractor = PipelineEvmExtractor.__new__(PipelineEvmExtractor)
+    extractor.bridge = Bridge.CCTP
+    extractor.blockchain = "ethereum"
+    extractor.checkpoints = Checkpoints(Bridge.CCTP, "ethereum", FakeCheckpointRepository())
+    extractor.pending_items = {}
+    extractor.task_logs = {}
+    extractor.task_errors = {}
+    extractor.tasks_lock = threading.Lock()
+
+    completed = ("0xA", ("0xtopic",), 0, 9)
+    failed = ("0xA", ("0xtopic",), 10, 19)
+    for task in (completed, failed):
+        extractor.start_task(task)
+        extractor.task_logs[task] = 7
+        # the range is split in two items (e.g. the logs of two contracts of a grouped filter)
+        extractor.update_task(task, 2)
+
+    extractor.update_task(completed, 0)
+    extractor.update_task(failed, 0, Exception("timeout"))
+    assert extractor.checkpoints.get_ranges(Checkpoints.COMPLETED) == {}
+
+    extractor.update_task(completed, 0)
+    extractor.update_task(failed, 0)
+
+    assert extractor.checkpoints.get_ranges(Checkpoints.COMPLETED) == {
+        ('"0xA"', '["0xtopic"]'): [(0, 9)]
+    }
+    assert extractor.checkpoints.get_history("0xA", ["0xtopic"]) == [(0, 9, 7)]
+    assert extractor.checkpoints.failed_ranges() == [("0xA", ["0xtopic"], 10, 19)]
+    assert extractor.pending_items == {}
+    assert extractor.task_logs == {}
+
+
+class FakeAsyncRPCClient:
+    async def get_logs_emitted_by_contract(self, blockchain, contract, topics, start, end):
+        return [{"blockNumber": hex(block)} for block in range(start, end + 1, 2)]
+
+
+def test_async_checkpoints_record_the_number_of_logs():
+    extractor = AsyncEvmExtractor.__new__(AsyncEvmExtractor)
+    extractor.bridge = Bridge.CCTP
+    extractor.blockchain = "ethereum"
+    extractor.resume = False
+    extractor.async_rpc_client = FakeAsyncRPCClient()
+    extractor.checkpoints = Checkpoints(Bridge.CCTP, "ethereum", FakeCheckpointRepository())
+    # the logs have no transactions to fetch
+    extractor.handle_logs = lambda contract, topics, start_block, end_block, logs: {}
+
+    with ThreadPoolExecutor(max_workers=1) as db_writer:
+        asyncio.run(extractor.extract_contract_data(db_writer, "0xA", ["0xtopic"], 10, 10))
+
+    assert extractor.checkpoints.get_history("0xA", ["0xtopic"]) == [(10, 10, 1)]
+
+
+def test_static_ranges_failing_with_any_error_are_checkpointed_as_failed():
+    extractor = EvmExtractor.__new__(EvmExtractor)
+    extractor.bridge = Bridge.CCTP
+    extractor.blockchain = "ethereum"
+    extractor.checkpoints = Checkpoints(Bridge.CCTP, "ethereum", FakeCheckpointRepository())
+    extractor.task_queue = Queue()
+    extractor.task_queue.put(("0xA", ["0xtopic"], 0, 9))
+    extractor.task_queue.put(("0xA", ["0xtopic"], 10, 19))
+
+    def work(contract, topics, start_block, end_block):
+        if start_block == 0:
+            raise KeyError("result")
+        return 3
+
+    extractor.work = work
+    extractor.worker()
+
+    assert extractor.checkpoints.failed_ranges() == [("0xA", ["0xtopic"], 0, 9)]
+    assert extractor.checkpoints.get_history("0xA", ["0xtopic"]) == [(10, 19, 3)]
+
+
+def test_async_ranges_failing_with_any_error_are_checkpointed_as_failed():
+    extractor = AsyncEvmExtractor.__new__(AsyncEvmExtractor)
+    extractor.bridge = Bridge.CCTP
+    extractor.blockchain = "ethereum"
+    extractor.resume = False
+    extractor.async_rpc_client = FakeAsyncRPCClient()
+    extractor.checkpoints = Checkpoints(Bridge.CCTP, "ethereum", FakeCheckpointRepository())
+
+    def handle_logs(contract, topics, start_block, end_block, logs):
+        if start_block == 0:
+            raise TypeError("malformed log")
+        return {}
+
+    extractor.handle_logs = handle_logs
+
+    with ThreadPoolExecutor(max_workers=1) as db_writer:
+        asyncio.run(extractor.extract_contract_data(db_writer, "0xA", ["0xtopic"], 0, 100))
+
+    failed_ranges = extractor.checkpoints.failed_ranges()
+    assert [start_block for _, _, start_block, _ in failed_ranges] == [0]
+    # the other ranges of the contract were not cancelled
+    completed = extractor.checkpoints.get_history("0xA", ["0xtopic"])
+    assert completed[0][0] == failed_ranges[0][3] + 1
+    assert completed[-1][1] == 100
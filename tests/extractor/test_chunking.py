@@ -0,0 +1,182 @@
+import threading
+import time
+
+from config.constants import Bridge
+from extractor.chunking import AdaptiveRangeSplitter, split_logs
+from extractor.evm_extractor import EvmExtractor
+
+
+def drain(splitter: AdaptiveRangeSplitter) -> list:
+    ranges = []
+    while (block_range := splitter.next_range()) is not None:
+        ranges.append(block_range)
+    return ranges
+
+
+def build_log(block_number: int) -> dict:
+    return {"blockNumber": hex(block_number), "transactionHash": hex(block_number)}
+
+
+def test_ranges_follow_the_log_density_of_fetched_ranges():
+    splitter = AdaptiveRangeSplitter([(0, 999_999)], 1, target_logs=100)
+
+    assert splitter.next_range() == (0, 1999)
+
+    # 1 log every 2 blocks: ranges of 200 blocks hold about 100 logs
+    splitter.record(0, 1999, 1000)
+    assert splitter.next_range() == (2000, 2199)
+
+    splitter.density = 0
+    assert splitter.next_range() == (2200, 52_199)
+
+
+def test_ranges_follow_the_log_density_of_previous_runs():
+    history = [(0, 9_999, 0), (10_000, 10_999, 1_000), (20_000, 29_999, 0)]
+    splitter = AdaptiveRangeSplitter([(0, 39_999)], 1, history, target_logs=100)
+
+    # the empty stretch is covered at once, and the dense one in ranges of about 100 logs
+    assert splitter.next_range() == (0, 10_099)
+    assert splitter.next_range() == (10_100, 10_199)
+
+    splitter.next_block = 11_000
+    # there is no history for blocks 11_000 to 19_999, nor fetched ranges
+    assert splitter.next_range() == (11_000, 12_999)
+
+
+def test_ranges_cover_all_blocks_and_shrink_at_the_tail():
+    splitter = AdaptiveRangeSplitter([(0, 9_999), (20_000, 20_499)], 4, min_blocks=10)
+    splitter.density = 0
+
+    ranges = drain(splitter)
+
+    covered = [block for start, end in ranges for block in range(start, end + 1)]
+    assert covered == list(range(0, 10_000)) + list(range(20_000, 20_500))
+    assert ranges[0] == (0, 2_624)
+    assert all(end - start + 1 <= 10 for start, end in ranges[-4:])
+
+
+def test_dense_ranges_are_split_at_block_boundaries(monkeypatch):
+    monkeypatch.setattr("extractor.chunking.ADAPTIVE_CHUNK_SPLIT_LOGS", 3)
+    monkeypatch.setattr("extractor.chunking.ADAPTIVE_CHUNK_TARGET_LOGS", 2)
+    logs = [build_log(block) for block in (15, 11, 11, 11, 12, 14)]
+
+    parts = split_logs(10, 20, logs)
+
+    assert [(start, end) for start, end, _ in parts] == [(10, 11), (12, 14), (15, 20)]
+    assert [len(part_logs) for _, _, part_logs in parts] == [3, 2, 1]
+    assert split_logs(10, 20, logs[:3]) == [(10, 20, logs[:3])]
+
+
+class FakeRPCClient:
+    def get_logs_emitted_by_contract(self, blockchain, contract, topics, start_block, end_block):
+        # one log every 10 blocks
+        return [build_log(block) for block in range(start_block, end_block + 1) if block % 10 == 0]
+
+
+class FakeCheckpoints:
+    def __init__(self):
+        self.completed = []
+        self.failed = []
+
+    def get_history(self, contract, topics):
+        return []
+
+    def complete(self, contract, topics, start_block, end_block, num_logs=None):
+        self.completed.append((start_block, end_block, num_logs))
+
+    def fail(self, contract, topics, start_block, end_block, error):
+        self.failed.append((start_block, end_block, str(error)))
+
+
+def test_adaptive_extraction_processes_each_log_once(monkeypatch):
+    monkeypatch.setattr("extractor.chunking.ADAPTIVE_CHUNK_SPLIT_LOGS", 50)
+    monkeypatch.setattr("extractor.chunking.ADAPTIVE_CHUNK_TARGET_LOGS", 20)
+
+    # the decoder and handler are not needed when processing logs is faked
+    extractor = EvmExtractor.__new__(EvmExtractor)
+    extractor.bridge = Bridge.CCTP
+    extractor.blockchain = "ethereum"
+    extractor.resume = False
+    extractor.rpc_client = FakeRPCClient()
+    extractor.checkpoints = FakeCheckpoints()
+    processed = []
+    lock = threading.Lock()
+
+    def process_logs(contract, topics, start_block, end_block, logs):
+        with lock:
+            processed.extend(int(log["blockNumber"], 16) for log in logs)
+
+    extractor.process_logs = process_logs
+    extractor.extract_filter_adaptive("0xA", ["0xtopic"], 0, 99_999, 4)
+
+    assert sorted(processed) == list(range(0, 100_000, 10))
+    completed = sorted(extractor.checkpoints.completed)
+    assert [start for start, _, _ in completed][0] == 0
+    assert all(end + 1 == start for (_, end, _), (start, _, _) in zip(completed, completed[1:]))
+    assert completed[-1][1] == 99_999
+    assert sum(num_logs for _, _, num_logs in completed) == 10_000
+
+
+class SlowDenseRPCClient:
+    def get_logs_emitted_by_contract(self, blockchain, contract, topics, start_block, end_block):
+        # the other threads find no range left to fetch while this one is being fetched
+        time.sleep(0.2)
+        return [build_log(block) for block in range(start_block, end_block + 1) for _ in range(5)]
+
+
+def test_idle_threads_wait_for_the_sub_ranges_of_ranges_being_fetched(monkeypatch):
+    monkeypatch.setattr("extractor.chunking.ADAPTIVE_CHUNK_SPLIT_LOGS", 5)
+    monkeypatch.setattr("extractor.chunking.ADAPTIVE_CHUNK_TARGET_LOGS", 5)
+    extractor = EvmExtractor.__new__(EvmExtractor)
+    extractor.bridge = Bridge.CCTP
+    extractor.blockchain = "ethereum"
+    extractor.resume = False
+    extractor.rpc_client = SlowDenseRPCClient()
+    extractor.checkpoints = FakeCheckpoints()
+    threads = set()
+
+    def process_logs(contract, topics, start_block, end_block, logs):
+        threads.add(threading.current_thread().name)
+        time.sleep(0.02)
+
+    extractor.process_logs = process_logs
+    # a single range of ADAPTIVE_CHUNK_MIN_BLOCKS blocks, split in a sub-range per block
+    extractor.extract_filter_adaptive("0xA", ["0xtopic"], 0, 9, 4)
+
+    assert extractor.checkpoints.completed == [(0, 9, 50)]
+    assert len(threads) > 1
+
+
+def test_adaptive_ranges_failing_with_any_error_are_checkpointed_as_failed(error_log_file):
+    extractor = EvmExtractor.__new__(EvmExtractor)
+    extractor.bridge = Bridge.CCTP
+    extractor.blockchain = "ethereum"
+    extractor.resume = False
+    extractor.rpc_client = FakeRPCClient()
+    extractor.checkpoints = FakeCheckpoints()
+
+    def process_logs(contract, topics, start_block, end_block, logs):
+        raise ValueError("invalid log")
+
+    extractor.process_logs = process_logs
+    extractor.extract_filter_adaptive("0xA", ["0xtopic"], 0, 999, 2)
+
+    # only ranges without logs are completed
+    assert all(num_logs == 0 for _, _, num_logs in extractor.checkpoints.completed)
+    failed = sorted(extractor.checkpoints.failed)
+    assert failed[0][0] == 0
+    assert all(error == "invalid log" for _, _, error in failed)
+    assert "Error: invalid log" in error_log_file.read_text()
+
+
+def test_static_extraction_of_a_single_block():
+    extractor = EvmExtractor.__new__(EvmExtractor)
+    extractor.bridge = Bridge.CCTP
+    extractor.blockchain = "ethereum"
+    extractor.resume = False
+    processed = []
+    extractor.process_tasks = lambda tasks, num_threads: processed.extend(tasks)
+
+    extractor.extract_filter_static("0xA", ["0xtopic"], 1_001, 1_001, 4)
+
+    assert processed == [("0xA", ["0xtopic"], 1_001, 1_001)]
@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from config.constants import Bridge
+from extractor.decode_pool import DecodePool
+from extractor.decoder import BridgeDecoder
+from tests.extractor.test_decoder import build_log
+from utils.metrics import Metrics
+from utils.utils import CustomException
+
+
+def build_logs(decoder: BridgeDecoder, num_logs: int) -> tuple:
+    rng = random.Random(3)
+    contract_addr, blockchain = next(iter(decoder.contract_abi_files))
+    events = []
+    for selector, event_abi in decoder.get_event_abis(contract_addr, blockchain).items():
+        _, types = decoder.get_abi_input_types_custom(event_abi, ("test", selector))
+        events.append((selector, event_abi, types))
+
+    logs = []
+    for idx in range(num_logs):
+        selector, event_abi, types = events[idx % len(events)]
+        logs.append(build_log(event_abi, selector, types, rng))
+
+    return contract_addr, blockchain, logs
+
+
+def test_logs_are_decoded_by_the_workers_in_order(monkeypatch):
+    monkeypatch.setattr("extractor.decode_pool.DECODE_POOL_BATCH_SIZE", 7)
+    decoder = BridgeDecoder(Bridge.CCTP)
+    contract_addr, blockchain, logs = build_logs(decoder, 50)
+    pool = DecodePool(Bridge.CCTP, 2)
+    metrics = Metrics()
+
+    try:
+        decoded_logs = pool.decode(contract_addr, blockchain, logs, metrics)
+
+        assert decoded_logs == [decoder.decode(contract_addr, blockchain, log) for log in logs]
+        # the counters of the workers are reported to the extractor
+        assert metrics.get("generic") == 50
+
+        # errors of the workers are raised by the extractor thread
+        with pytest.raises(CustomException, match="not found in contracts list"):
+            pool.decode("0x0000000000000000000000000000000000000001", blockchain, logs)
+    finally:
+        pool.shutdown()
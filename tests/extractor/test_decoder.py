@@ -0,0 +1,158 @@
+import random
+
+from eth_abi import encode
+from eth_abi.grammar import TupleType, parse
+
+from config.constants import Bridge
+from extractor.decoder import BridgeDecoder
+
+CONTRACT_A = "0x00000000000000000000000000000000000000aa"
+CONTRACT_B = "0x00000000000000000000000000000000000000bb"
+
+
+def sample_value(abi_type, rng: random.Random):
+    if abi_type.is_array:
+        length = abi_type.arrlist[-1][0] if abi_type.arrlist[-1] else rng.randint(0, 3)
+        return [sample_value(abi_type.item_type, rng) for _ in range(length)]
+    if isinstance(abi_type, TupleType):
+        return tuple(sample_value(component, rng) for component in abi_type.components)
+    if abi_type.base == "uint":
+        return rng.getrandbits(abi_type.sub)
+    if abi_type.base == "int":
+        return rng.getrandbits(abi_type.sub - 1) * rng.choice([1, -1])
+    if abi_type.base == "address":
+        return "0x" + rng.randbytes(20).hex()
+    if abi_type.base == "bool":
+        return rng.random() < 0.5
+    if abi_type.base == "bytes":
+        return rng.randbytes(abi_type.sub or rng.randint(0, 70))
+    if abi_type.base == "string":
+        return "x" * rng.randint(0, 40)
+    raise ValueError(f"Unsupported type {abi_type}")
+
+
+def build_log(event_abi: dict, selector: bytes, types: list, rng: random.Random) -> dict:
+    params = encode(types, [sample_value(parse(abi_type), rng) for abi_type in types])
+    num_indexed = sum(1 for input in event_abi["inputs"] if input["indexed"])
+
+    return {
+        "topics": ["0x" + selector.hex()]
+        + ["0x" + params[32 * i : 32 * (i + 1)].hex() for i in range(num_indexed)],
+        "data": "0x" + params[32 * num_indexed :].hex(),
+    }
+
+
+def test_decoding_plans_match_the_generic_decoder():
+    rng = random.Random(7)
+    decoded_events = 0
+
+    for bridge in (Bridge.CCTP, Bridge.ACROSS, Bridge.DEBRIDGE, Bridge.MAYAN):
+        decoder = BridgeDecoder(bridge)
+
+        for contract_addr, blockchain in decoder.contract_abi_files:
+            for selector, event_abi in decoder.get_event_abis(contract_addr, blockchain).items():
+                _, types = decoder.get_abi_input_types_custom(event_abi, ("test", selector))
+                try:
+                    log = build_log(event_abi, selector, types, rng)
+                except Exception:
+                    # types that cannot be encoded are not decoded by the generic decoder either
+                    continue
+
+                event_data = "0x" + "".join(topic[2:] for topic in log["topics"])
+                expected = decoder.decode_event_input(
+                    contract_addr, blockchain, event_data + log["data"][2:]
+                )
+                plan = decoder.get_decoding_plan(contract_addr, blockchain, log["topics"][0])
+
+                assert plan.decode(log) == expected
+                decoded_events += 1
+
+    assert decoded_events > 50
+
+
+def build_event_abi(second_input: str) -> list:
+    return [
+        {
+            "type": "event",
+            "name": "Sent",
+            "anonymous": False,
+            "inputs": [
+                {"name": "nonce", "type": "uint64", "internalType": "uint64", "indexed": True},
+                {"name": second_input, "type": "bytes", "internalType": "bytes", "indexed": False},
+            ],
+        }
+    ]
+
+
+def create_decoder(custom_decoder=None) -> BridgeDecoder:
+    # the contracts are registered by the tests instead of taken from the bridge configuration
+    decoder = BridgeDecoder(Bridge.CCTP, blockchains=[])
+    decoder.custom_decoder = custom_decoder
+    return decoder
+
+
+def test_decoding_plans_are_not_shared_between_contracts():
+    decoder = create_decoder()
+
+    # same selector, but addresses are decoded as bytes32 (see get_abi_input_types_custom)
+    decoder.register_contract(CONTRACT_A, "ethereum", build_event_abi("payload"))
+    decoder.register_contract(CONTRACT_B, "ethereum", build_event_abi("toAddress"))
+    selector = "0x" + next(iter(decoder.get_event_abis(CONTRACT_A, "ethereum"))).hex()
+
+    payload_params = encode(["uint64", "bytes"], [1, b"\x01\x02"])
+    payload_log = {
+        "topics": [selector, "0x" + payload_params[:32].hex()],
+        "data": "0x" + payload_params[32:].hex(),
+    }
+    address_params = encode(["uint64", "bytes32"], [2, b"\x03" * 32])
+    address_log = {
+        "topics": [selector, "0x" + address_params[:32].hex()],
+        "data": "0x" + address_params[32:].hex(),
+    }
+
+    assert decoder.decode(CONTRACT_A, "ethereum", payload_log) == {"nonce": 1, "payload": "0102"}
+    assert decoder.decode(CONTRACT_B, "ethereum", address_log) == {
+        "nonce": 2,
+        "toAddress": "03" * 32,
+    }
+
+
+class FakeCustomDecoder:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def decode_event(self, contract, log):
+        self.calls += 1
+        if self.fail:
+            raise ValueError("unsupported log")
+        return {"custom": log["data"]}
+
+
+def test_logs_failing_the_generic_decoding_are_routed_to_the_custom_decoder():
+    custom_decoder = FakeCustomDecoder()
+    decoder = create_decoder(custom_decoder)
+    decoder.register_contract(CONTRACT_A, "ethereum", build_event_abi("payload"))
+    selector = "0x" + next(iter(decoder.get_event_abis(CONTRACT_A, "ethereum"))).hex()
+    nonce = "0x" + encode(["uint64"], [1]).hex()
+    # the pointer to the payload is out of bounds
+    invalid_log = {"topics": [selector, nonce], "data": "0x" + encode(["uint256"], [999]).hex()}
+
+    for _ in range(3):
+        assert decoder.decode(CONTRACT_A, "ethereum", invalid_log) == {
+            "custom": invalid_log["data"]
+        }
+
+    # only the first log was tried with the generic decoder
+    assert decoder.metrics.get("generic_failures") == 1
+    assert decoder.metrics.get("custom") == 3
+
+    # logs the custom decoder does not handle are decoded by the generic decoder again
+    custom_decoder.fail = True
+    params = encode(["uint64", "bytes"], [1, b"\x01"])
+    valid_log = {"topics": [selector, nonce], "data": "0x" + params[32:].hex()}
+
+    assert decoder.decode(CONTRACT_A, "ethereum", valid_log) == {"nonce": 1, "payload": "01"}
+    assert decoder.metrics.get("custom_failures") == 1
+    assert decoder.metrics.get("generic") == 1
+    assert decoder.custom_routes == set()
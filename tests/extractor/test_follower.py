@@ -0,0 +1,180 @@
+from types import SimpleNamespace
+
+import pytest
+
+from config.constants import Bridge
+from extractor.follower import ChainFollower
+from utils.utils import CustomException
+
+
+class FakeRPCClient:
+    def __init__(self, head: int):
+        self.head = head
+        # block -> hash, "h<block>" unless overridden (e.g. by a reorg)
+        self.hashes = {}
+
+    def get_latest_block_number(self, blockchain):
+        return self.head
+
+    def get_block_hash(self, blockchain, block_number):
+        return self.hashes.get(block_number, f"h{block_number}")
+
+
+class FakeFollowStateRepository:
+    def __init__(self):
+        self.state = None
+        self.rollbacks = []
+
+    def get_state(self, bridge, blockchain):
+        return self.state
+
+    def save_state(self, bridge, blockchain, last_block, block_hashes):
+        self.state = SimpleNamespace(last_block=last_block, block_hashes=block_hashes)
+
+    def rollback_blocks(self, bridge, blockchain, fork_block):
+        self.rollbacks.append(fork_block)
+        return 3
+
+
+class FakeCheckpointRepository:
+    def __init__(self):
+        self.deleted_after = []
+
+    def delete_ranges_after(self, bridge, blockchain, block):
+        self.deleted_after.append(block)
+
+
+class FakeTransactionIndex:
+    def __init__(self):
+        self.invalidated = 0
+
+    def invalidate(self):
+        self.invalidated += 1
+
+
+class FakeCheckpoints:
+    def __init__(self):
+        # (contract, topics, start_block, end_block) ranges failing until retried `retries` times
+        self.failed = []
+        self.retries = 1
+
+    def failed_ranges(self):
+        return list(self.failed)
+
+
+class FakeExtractor:
+    def __init__(self, rpc_client):
+        self.bridge = Bridge.CCTP
+        self.blockchain = "ethereum"
+        self.rpc_client = rpc_client
+        self.transaction_index = FakeTransactionIndex()
+        self.checkpoints = FakeCheckpoints()
+        self.extracted = []
+        self.retried = []
+
+    def extract_data(self, start_block, end_block):
+        self.extracted.append((start_block, end_block))
+
+    def extract_ranges(self, tasks):
+        self.retried.append(tasks)
+        self.checkpoints.retries -= 1
+        if self.checkpoints.retries <= 0:
+            self.checkpoints.failed = []
+
+
+def create_follower(head: int, start_block: int = None, confirmations: int = 10):
+    rpc_client = FakeRPCClient(head)
+    return ChainFollower(
+        FakeExtractor(rpc_client),
+        confirmations,
+        start_block,
+        repository=FakeFollowStateRepository(),
+        checkpoint_repository=FakeCheckpointRepository(),
+    )
+
+
+def test_first_poll_starts_at_the_confirmed_head():
+    follower = create_follower(1_000)
+
+    assert follower.poll() == 0
+    assert follower.extractor.extracted == []
+    assert follower.load_state() == (990, [(990, "h990")])
+
+    follower.rpc_client.head = 1_005
+    assert follower.poll() == 5
+    assert follower.extractor.extracted == [(991, 995)]
+    assert follower.load_state() == (995, [(990, "h990"), (995, "h995")])
+
+
+def test_catching_up_is_done_in_bounded_ranges(monkeypatch):
+    monkeypatch.setattr("extractor.follower.FOLLOW_MAX_RANGE_BLOCKS", 100)
+    follower = create_follower(1_000, start_block=800)
+
+    while follower.poll():
+        pass
+
+    assert follower.extractor.extracted == [(800, 899), (900, 990)]
+    assert follower.metrics.get("blocks") == 191
+
+
+def test_reorgs_roll_back_to_the_last_block_still_in_the_chain():
+    follower = create_follower(1_000, start_block=900)
+    follower.poll()
+    follower.rpc_client.head = 1_020
+    follower.poll()
+    follower.rpc_client.head = 1_030
+    follower.poll()
+    assert follower.load_state()[0] == 1_020
+
+    # blocks 1_010 and 1_020 were replaced
+    follower.rpc_client.hashes = {1_010: "x1010", 1_020: "x1020"}
+    follower.rpc_client.head = 1_040
+    follower.poll()
+
+    assert follower.repository.rollbacks == [990]
+    assert follower.checkpoint_repository.deleted_after == [990]
+    assert follower.extractor.transaction_index.invalidated == 1
+    assert follower.extractor.extracted[-1] == (991, 1_030)
+    assert follower.load_state() == (1_030, [(990, "h990"), (1_030, "h1030")])
+    assert follower.metrics.get("reorgs") == 1
+
+
+def test_a_single_new_block_is_extracted():
+    follower = create_follower(1_000)
+    follower.poll()
+
+    follower.rpc_client.head = 1_001
+    assert follower.poll() == 1
+    assert follower.extractor.extracted == [(991, 991)]
+    assert follower.load_state()[0] == 991
+
+
+def test_failed_ranges_of_a_poll_are_retried_before_moving_on():
+    follower = create_follower(1_000)
+    follower.poll()
+    checkpoints = follower.extractor.checkpoints
+    checkpoints.failed = [("0xA", ["0xtopic"], 500, 600), ("0xA", ["0xtopic"], 980, 993)]
+
+    follower.rpc_client.head = 1_005
+    assert follower.poll() == 5
+
+    # only the part of the failed ranges within the polled blocks is retried
+    assert follower.extractor.retried == [[("0xA", ["0xtopic"], 991, 993)]]
+    assert follower.load_state()[0] == 995
+
+
+def test_blocks_with_ranges_still_failing_are_polled_again():
+    follower = create_follower(1_000)
+    follower.poll()
+    checkpoints = follower.extractor.checkpoints
+    checkpoints.failed = [("0xA", ["0xtopic"], 991, 993)]
+    checkpoints.retries = 2
+
+    follower.rpc_client.head = 1_005
+    with pytest.raises(CustomException, match="will be extracted again"):
+        follower.poll()
+    assert follower.load_state()[0] == 990
+
+    assert follower.poll() == 5
+    assert follower.extractor.extracted == [(991, 995), (991, 995)]
+    assert follower.load_state()[0] == 995
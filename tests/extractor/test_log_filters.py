@@ -0,0 +1,59 @@
+from config.constants import Bridge
+from extractor.evm_extractor import EvmExtractor
+
+PAIRS = [
+    {"contracts": ["0xPoolA", "0xPoolB"], "topics": ["0xswap", "0xsync"]},
+    {"contracts": ["0xRouter"], "topics": ["0xsend"]},
+    {"contracts": ["0xpoola"], "topics": ["0xmint"]},
+]
+
+
+def create_extractor(log_filter_mode: str) -> EvmExtractor:
+    # the RPC client, decoder and handler are not needed to build and route filters
+    extractor = EvmExtractor.__new__(EvmExtractor)
+    extractor.bridge = Bridge.CCTP
+    extractor.blockchain = "ethereum"
+    extractor.log_filter_mode = log_filter_mode
+    extractor.grouped_contracts = {}
+    return extractor
+
+
+def build_log(address: str, topic: str) -> dict:
+    return {"address": address.lower(), "topics": [topic], "transactionHash": "0x1"}
+
+
+def test_contract_filters_are_kept_per_contract():
+    extractor = create_extractor("contract")
+
+    assert extractor.build_log_filters(PAIRS) == [
+        ("0xPoolA", ["0xswap", "0xsync"]),
+        ("0xPoolB", ["0xswap", "0xsync"]),
+        ("0xRouter", ["0xsend"]),
+        ("0xpoola", ["0xmint"]),
+    ]
+
+
+def test_grouped_filters_merge_contracts_and_topics(monkeypatch):
+    monkeypatch.setattr("extractor.evm_extractor.GET_LOGS_MAX_ADDRESSES", 2)
+    extractor = create_extractor("grouped")
+
+    assert extractor.build_log_filters(PAIRS) == [
+        (("0xPoolA", "0xPoolB"), ["0xswap", "0xsync", "0xmint"]),
+        (("0xRouter",), ["0xsend"]),
+    ]
+
+
+def test_grouped_logs_are_routed_to_their_contract():
+    extractor = create_extractor("grouped")
+    extractor.build_log_filters(PAIRS)
+
+    swap_a = build_log("0xPoolA", "0xswap")
+    mint_a = build_log("0xPoolA", "0xmint")
+    send_b = build_log("0xPoolB", "0xsend")  # topic of another contract
+    send_router = build_log("0xRouter", "0xsend")
+
+    assert extractor.route_logs([swap_a, mint_a, send_b, send_router]) == [
+        ("0xPoolA", ["0xswap", "0xsync"], [swap_a]),
+        ("0xpoola", ["0xmint"], [mint_a]),
+        ("0xRouter", ["0xsend"], [send_router]),
+    ]
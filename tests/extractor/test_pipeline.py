@@ -0,0 +1,68 @@
+import threading
+import time
+
+from extractor.pipeline import Pipeline
+
+
+def test_items_go_through_all_stages():
+    written = []
+
+    pipeline = (
+        Pipeline(queue_size=2)
+        .add_stage("double", lambda item: [item * 2], workers=3)
+        .add_stage("split", lambda item: [item, item + 1] if item % 4 == 0 else [], workers=2)
+        .add_stage("write", written.extend, workers=1, batch_size=5)
+    )
+    pipeline.run(range(10))
+
+    assert sorted(written) == [0, 1, 4, 5, 8, 9, 12, 13, 16, 17]
+    assert pipeline.metrics.get("double") == 10
+    assert pipeline.metrics.get("write") == 10
+
+
+def test_errors_only_drop_their_item():
+    errors = []
+    written = []
+
+    def check(item):
+        if item == 3:
+            raise ValueError("bad item")
+        return [item]
+
+    pipeline = (
+        Pipeline(queue_size=2, on_error=lambda stage, item, e: errors.append((stage, item)))
+        .add_stage("check", check, workers=2)
+        .add_stage("write", written.append)
+    )
+    pipeline.run(range(5))
+
+    assert sorted(written) == [0, 1, 2, 4]
+    assert errors == [("check", 3)]
+    assert pipeline.metrics.get("check_errors") == 1
+
+
+def test_slow_stages_apply_backpressure():
+    in_flight = []
+    lock = threading.Lock()
+    fetched = 0
+    written = 0
+
+    def fetch(item):
+        nonlocal fetched
+        with lock:
+            fetched += 1
+            in_flight.append(fetched - written)
+        return [item]
+
+    def write(item):
+        nonlocal written
+        time.sleep(0.01)
+        with lock:
+            written += 1
+
+    pipeline = Pipeline(queue_size=2).add_stage("fetch", fetch).add_stage("write", write)
+    pipeline.run(range(30))
+
+    assert written == 30
+    # at most the queued items, plus the ones held by the workers, are in flight
+    assert max(in_flight) <= 2 + 2 + 1
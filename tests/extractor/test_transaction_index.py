@@ -0,0 +1,187 @@
+from config.constants import Bridge
+from extractor.evm_extractor import EvmExtractor
+from extractor.transaction_index import (
+    BloomFilter,
+    TransactionHashIndex,
+    get_transaction_hash_index,
+)
+from utils.utils import CustomException
+
+
+class FakeTransactionRepository:
+    def __init__(self, hashes, blockchain="ethereum"):
+        # tx_hash -> blockchain
+        self.hashes = dict.fromkeys(hashes, blockchain)
+        self.streams = 0
+        self.lookups = 0
+
+    def select(self, filters):
+        return [
+            tx_hash
+            for tx_hash, blockchain in self.hashes.items()
+            if filters.get("blockchain", blockchain) == blockchain
+        ]
+
+    def count(self, **filters):
+        return len(self.select(filters))
+
+    def stream_column(self, column, batch_size, **filters):
+        assert column == "transaction_hash"
+        self.streams += 1
+        yield from sorted(self.select(filters))
+
+    def get_transaction_by_hash(self, transaction_hash):
+        self.lookups += 1
+        return transaction_hash if transaction_hash in self.hashes else None
+
+
+def test_set_index_is_loaded_once_and_updated_with_stored_transactions():
+    repository = FakeTransactionRepository(["0x1", "0x2"])
+    index = TransactionHashIndex(repository, "set")
+
+    assert index.contains("0x1")
+    assert not index.contains("0x3")
+
+    repository.hashes["0x3"] = "ethereum"
+    index.add(["0x3"])
+    assert index.contains("0x3")
+    assert repository.streams == 1
+    assert repository.lookups == 0
+
+    # rows deleted from the database are dropped once the index is loaded again
+    repository.hashes.pop("0x1")
+    index.invalidate()
+    assert not index.contains("0x1")
+    assert repository.streams == 2
+
+
+def test_indexes_only_hold_the_transactions_of_their_blockchain():
+    repository = FakeTransactionRepository(["0x1", "0x2"])
+    repository.hashes["0x3"] = "arbitrum"
+    index = TransactionHashIndex(repository, "set", blockchain="arbitrum")
+
+    assert index.contains("0x3")
+    assert not index.contains("0x1")
+    assert get_transaction_hash_index(Bridge.CCTP, "arbitrum", repository) is not (
+        get_transaction_hash_index(Bridge.CCTP, "ethereum", repository)
+    )
+    assert get_transaction_hash_index(Bridge.CCTP, "arbitrum", repository) is (
+        get_transaction_hash_index(Bridge.CCTP, "arbitrum", repository)
+    )
+
+
+def test_bloom_index_confirms_positives_against_the_database():
+    repository = FakeTransactionRepository([hex(i) for i in range(1_000)])
+    index = TransactionHashIndex(repository, "bloom")
+
+    assert all(index.contains(hex(i)) for i in range(1_000))
+    assert repository.lookups == 1_000
+
+    missing = [hex(i) for i in range(1_000, 2_000)]
+    assert not any(index.contains(tx_hash) for tx_hash in missing)
+    # only the false positives of the filter reach the database
+    assert repository.lookups - 1_000 < 50
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(10_000, 0.01)
+    items = [f"0x{i:064x}" for i in range(10_000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"0x{i:064x}" in bloom for i in range(10_000, 20_000))
+    assert false_positives < 300
+
+
+class FakeHandler:
+    def handle_events(self, blockchain, start_block, end_block, contract, topics, logs):
+        return logs
+
+    def does_transaction_exist_by_hash(self, transaction_hash):
+        raise AssertionError("the database should not be queried")
+
+
+def test_stored_transactions_of_logs_are_skipped_without_database_queries():
+    extractor = EvmExtractor.__new__(EvmExtractor)
+    extractor.bridge = Bridge.CCTP
+    extractor.blockchain = "ethereum"
+    extractor.handler = FakeHandler()
+    extractor.transaction_index = TransactionHashIndex(FakeTransactionRepository(["0xa"]), "set")
+    logs = [
+        {"transaction_hash": "0xa", "block_number": "0x1"},
+        {"transaction_hash": "0xb", "block_number": "0x2"},
+        {"transaction_hash": "0xb", "block_number": "0x2"},
+    ]
+
+    assert extractor.persist_logs("0xC", ["0xt"], 1, 2, logs) == {"0xb": "0x2"}
+
+
+class FakeTransactionHandler:
+    def __init__(self, repository=None):
+        self.repository = repository
+        self.stored = []
+
+    def create_transaction_object(self, blockchain, tx, timestamp):
+        return {"transaction_hash": tx["transactionHash"]}
+
+    def handle_transactions(self, transactions):
+        if self.repository is not None and any(
+            tx["transaction_hash"] in self.repository.hashes for tx in transactions
+        ):
+            raise CustomException("FakeTransactionHandler", "handle_transactions", "duplicate key")
+        self.stored += [tx["transaction_hash"] for tx in transactions]
+
+    def handle_transaction(self, transaction):
+        self.handle_transactions([transaction])
+
+
+def test_fetched_transactions_stored_by_concurrent_calls_are_skipped():
+    extractor = EvmExtractor.__new__(EvmExtractor)
+    extractor.bridge = Bridge.CCTP
+    extractor.blockchain = "ethereum"
+    extractor.handler = FakeTransactionHandler()
+    extractor.transaction_index = TransactionHashIndex(FakeTransactionRepository(["0xa"]), "set")
+    block = {"number": "0x1", "timestamp": "0x10"}
+
+    # 0xa was stored by the call that fetched it, 0xb was not (e.g. it failed to store it)
+    extractor.handle_fetched_transactions(
+        "0xC",
+        ["0xt"],
+        1,
+        2,
+        {"0xa": ({"transactionHash": "0xa"}, block), "0xb": ({"transactionHash": "0xb"}, block)},
+    )
+
+    assert extractor.handler.stored == ["0xb"]
+    assert extractor.transaction_index.contains("0xb")
+
+
+def test_transactions_stored_by_other_processes_are_checked_when_the_batch_conflicts(
+    monkeypatch,
+):
+    errors = []
+    monkeypatch.setattr("extractor.evm_extractor.log_error", lambda bridge, msg: errors.append(msg))
+    repository = FakeTransactionRepository(["0xa"])
+    extractor = EvmExtractor.__new__(EvmExtractor)
+    extractor.bridge = Bridge.CCTP
+    extractor.blockchain = "ethereum"
+    extractor.handler = FakeTransactionHandler(repository)
+    extractor.transaction_index = TransactionHashIndex(repository, "set")
+    extractor.transaction_index.load()
+    block = {"number": "0x1", "timestamp": "0x10"}
+
+    # 0xb was stored by another worker after the index was loaded
+    repository.hashes["0xb"] = "ethereum"
+    extractor.handle_fetched_transactions(
+        "0xC",
+        ["0xt"],
+        1,
+        2,
+        {"0xb": ({"transactionHash": "0xb"}, block), "0xc": ({"transactionHash": "0xc"}, block)},
+    )
+
+    assert extractor.handler.stored == ["0xc"]
+    assert errors == []
+    assert extractor.transaction_index.contains("0xb")
+    assert extractor.transaction_index.metrics.get("conflicts") == 1
@@ -0,0 +1,247 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from config.constants import Bridge
+from extractor.work_queue import QueueWorker, WorkQueue
+from repository.common.repository import ExtractionTaskRepository
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    # idle workers wait for the ranges being processed by others
+    monkeypatch.setattr("extractor.work_queue.WORK_QUEUE_POLL_SECONDS", 0.01)
+
+
+class FakeTaskRepository:
+    """In-memory ExtractionTaskRepository, claiming tasks under a lock like SKIP LOCKED would."""
+
+    def __init__(self):
+        self.tasks = []
+        self.lock = threading.Lock()
+
+    def add_tasks(self, bridge, blockchain, ranges):
+        with self.lock:
+            existing = {(task.blockchain, *task.key) for task in self.tasks}
+            added = 0
+            for contract, topics, start_block, end_block in ranges:
+                key = (contract, topics, start_block, end_block)
+                if (blockchain, *key) in existing:
+                    continue
+                self.tasks.append(
+                    SimpleNamespace(
+                        id=len(self.tasks) + 1,
+                        key=key,
+                        bridge=bridge,
+                        blockchain=blockchain,
+                        contract=contract,
+                        topics=topics,
+                        start_block=start_block,
+                        end_block=end_block,
+                        status=ExtractionTaskRepository.PENDING,
+                        attempts=0,
+                        lease_owner=None,
+                        lease_expires_at=None,
+                    )
+                )
+                added += 1
+            return added
+
+    def claimable(self, task, max_attempts, now):
+        return task.attempts < max_attempts and (
+            task.status == ExtractionTaskRepository.PENDING
+            or (task.status == ExtractionTaskRepository.RUNNING and task.lease_expires_at < now)
+        )
+
+    def claim_tasks(self, bridge, owner, limit, lease_seconds, max_attempts, blockchains=None):
+        now = time.time()
+        with self.lock:
+            tasks = [
+                task
+                for task in self.tasks
+                if self.claimable(task, max_attempts, now)
+                and (not blockchains or task.blockchain in blockchains)
+            ][:limit]
+            for task in tasks:
+                task.status = ExtractionTaskRepository.RUNNING
+                task.attempts += 1
+                task.lease_owner = owner
+                task.lease_expires_at = now + lease_seconds
+            return [SimpleNamespace(**vars(task)) for task in tasks]
+
+    def renew_leases(self, owner, lease_seconds):
+        return 0
+
+    def finish_task(self, task_id, owner, status, error=None):
+        with self.lock:
+            task = self.tasks[task_id - 1]
+            if task.status != ExtractionTaskRepository.RUNNING or task.lease_owner != owner:
+                return False
+            task.status = status
+            task.lease_owner = None
+            return True
+
+    def fail_expired_tasks(self, bridge, max_attempts, blockchains=None):
+        now = time.time()
+        with self.lock:
+            tasks = [
+                task
+                for task in self.tasks
+                if task.status == ExtractionTaskRepository.RUNNING
+                and task.lease_expires_at < now
+                and task.attempts >= max_attempts
+            ]
+            for task in tasks:
+                task.status = ExtractionTaskRepository.FAILED
+                task.lease_owner = None
+                task.error = "Lease expired"
+            return [SimpleNamespace(**vars(task)) for task in tasks]
+
+    def has_active_tasks(self, bridge, max_attempts, blockchains=None):
+        now = time.time()
+        with self.lock:
+            return any(
+                self.claimable(task, max_attempts, now)
+                or (
+                    task.status == ExtractionTaskRepository.RUNNING and task.lease_expires_at >= now
+                )
+                for task in self.tasks
+            )
+
+    def get_blockchains(self, bridge):
+        return sorted({task.blockchain for task in self.tasks})
+
+
+class FakeCheckpoints:
+    def __init__(self):
+        self.completed = []
+        self.failed = []
+
+    def complete(self, contract, topics, start_block, end_block, num_logs=None):
+        self.completed.append((contract, topics, start_block, end_block))
+
+    def fail(self, contract, topics, start_block, end_block, error):
+        self.failed.append((contract, topics, start_block, end_block))
+
+
+class FakeExtractor:
+    def __init__(self, failing_ranges=()):
+        self.checkpoints = FakeCheckpoints()
+        self.failing_ranges = set(failing_ranges)
+        self.processed = []
+        self.lock = threading.Lock()
+
+    def work(self, contract, topics, start_block, end_block):
+        with self.lock:
+            self.processed.append((contract, start_block, end_block))
+        if start_block in self.failing_ranges:
+            raise Exception("timeout")
+
+
+def create_worker(repository, extractor, owner="host:1", num_threads=3) -> QueueWorker:
+    worker = QueueWorker(Bridge.CCTP, owner, num_threads, repository=repository)
+    worker.create_extractor = lambda blockchain: extractor
+    return worker
+
+
+def test_enqueue_adds_each_range_of_each_filter_once():
+    repository = FakeTaskRepository()
+    work_queue = WorkQueue(Bridge.CCTP, repository)
+    log_filters = [("0xA", ["0xtopic"]), (("0xB", "0xC"), ["0xtopic", "0xother"])]
+
+    assert work_queue.enqueue("ethereum", log_filters, 100, 349, chunk_size=100) == 6
+    assert work_queue.enqueue("ethereum", log_filters, 100, 349, chunk_size=100) == 0
+
+    assert [task.key for task in repository.tasks[:3]] == [
+        ('"0xA"', '["0xtopic"]', 100, 199),
+        ('"0xA"', '["0xtopic"]', 200, 299),
+        ('"0xA"', '["0xtopic"]', 300, 349),
+    ]
+    assert repository.tasks[3].contract == '["0xB", "0xC"]'
+
+
+def test_workers_process_each_range_once():
+    repository = FakeTaskRepository()
+    WorkQueue(Bridge.CCTP, repository).enqueue("ethereum", [("0xA", ["0xt"])], 0, 999, 10)
+    extractor = FakeExtractor()
+
+    workers = [create_worker(repository, extractor, owner=f"host:{idx}") for idx in range(3)]
+    threads = [threading.Thread(target=worker.run) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(start for _, start, _ in extractor.processed) == list(range(0, 1000, 10))
+    assert len(extractor.checkpoints.completed) == 100
+    assert all(task.status == ExtractionTaskRepository.COMPLETED for task in repository.tasks)
+
+
+def test_failed_ranges_are_retried_until_max_attempts(monkeypatch):
+    monkeypatch.setattr("extractor.work_queue.WORK_QUEUE_MAX_ATTEMPTS", 2)
+    repository = FakeTaskRepository()
+    WorkQueue(Bridge.CCTP, repository).enqueue("ethereum", [("0xA", ["0xt"])], 0, 29, 10)
+    extractor = FakeExtractor(failing_ranges={10})
+
+    create_worker(repository, extractor).run()
+
+    assert [start for _, start, _ in extractor.processed].count(10) == 2
+    assert [task.status for task in repository.tasks] == [
+        ExtractionTaskRepository.COMPLETED,
+        ExtractionTaskRepository.FAILED,
+        ExtractionTaskRepository.COMPLETED,
+    ]
+    assert extractor.checkpoints.failed == [("0xA", ["0xt"], 10, 19)]
+
+
+def test_expired_leases_are_claimed_again():
+    repository = FakeTaskRepository()
+    WorkQueue(Bridge.CCTP, repository).enqueue("ethereum", [("0xA", ["0xt"])], 0, 9, 10)
+
+    # a worker claims the range and dies without renewing its lease
+    repository.claim_tasks(Bridge.CCTP.value, "dead:1", 1, -1, 3)
+    extractor = FakeExtractor()
+    create_worker(repository, extractor).run()
+
+    assert extractor.processed == [("0xA", 0, 9)]
+    assert repository.tasks[0].status == ExtractionTaskRepository.COMPLETED
+    assert repository.tasks[0].attempts == 2
+
+
+def test_expired_leases_of_the_last_attempt_are_failed(monkeypatch):
+    monkeypatch.setattr("extractor.work_queue.WORK_QUEUE_MAX_ATTEMPTS", 1)
+    repository = FakeTaskRepository()
+    WorkQueue(Bridge.CCTP, repository).enqueue("ethereum", [("0xA", ["0xt"])], 0, 9, 10)
+
+    repository.claim_tasks(Bridge.CCTP.value, "dead:1", 1, -1, 1)
+    extractor = FakeExtractor()
+    worker = create_worker(repository, extractor)
+    worker.run()
+
+    assert extractor.processed == []
+    assert repository.tasks[0].status == ExtractionTaskRepository.FAILED
+    assert extractor.checkpoints.failed == [("0xA", ["0xt"], 0, 9)]
+    assert worker.metrics.get(ExtractionTaskRepository.FAILED) == 1
+
+
+def test_outcomes_of_lost_leases_are_left_to_the_new_owner():
+    repository = FakeTaskRepository()
+    WorkQueue(Bridge.CCTP, repository).enqueue("ethereum", [("0xA", ["0xt"])], 0, 19, 10)
+    extractor = FakeExtractor(failing_ranges={10})
+    worker = create_worker(repository, extractor)
+    tasks = repository.claim_tasks(Bridge.CCTP.value, worker.owner, 2, 60, 1)
+
+    # the lease expired and the tasks were claimed by another worker
+    for task in repository.tasks:
+        task.lease_owner = "host:2"
+    for task in tasks:
+        worker.process(task)
+
+    assert [task.status for task in repository.tasks] == [ExtractionTaskRepository.RUNNING] * 2
+    # the extracted range is checkpointed anyway, but the failure is not
+    assert extractor.checkpoints.completed == [("0xA", ["0xt"], 0, 9)]
+    assert extractor.checkpoints.failed == []
+    assert worker.metrics.get("lost_leases") == 2
+    assert worker.metrics.get(ExtractionTaskRepository.COMPLETED) == 0
@@ -0,0 +1,148 @@
+import asyncio
+import sys
+from types import SimpleNamespace
+
+import pytest
+import yaml
+
+from config.constants import Bridge
+from rpcs.async_evm_rpc_client import AsyncEvmRPCClient
+
+
+@pytest.fixture(autouse=True)
+def empty_block_timestamp_caches(monkeypatch):
+    monkeypatch.setattr("rpcs.block_timestamp_cache._caches", {})
+
+
+def create_client(tmp_path, max_batch_size=50):
+    config_file = tmp_path / "rpcs_config.yaml"
+    config_file.write_text(
+        yaml.dump(
+            {
+                "blockchains": [
+                    {
+                        "name": "ethereum",
+                        "rpcs": ["http://rpc-1", "http://rpc-2"],
+                        "max_batch_size": max_batch_size,
+                    }
+                ]
+            }
+        )
+    )
+    return AsyncEvmRPCClient(Bridge.CCTP, str(config_file))
+
+
+def answer(payload):
+    method, params = payload["method"], payload["params"]
+    if method == "eth_getTransactionReceipt":
+        result = {"transactionHash": params[0], "blockNumber": "0x1"}
+    else:
+        result = {"number": params[0], "timestamp": "0x10"}
+    return {"id": payload["id"], "jsonrpc": "2.0", "result": result}
+
+
+def test_process_transactions_sends_batches_concurrently(tmp_path):
+    client = create_client(tmp_path, max_batch_size=2)
+    posts = []
+
+    async def fake_post(rpc_url, blockchain_name, payload, timeout):
+        posts.append(payload)
+        return 200, [answer(call) for call in payload], None
+
+    client.post = fake_post
+
+    results = asyncio.run(
+        client.process_transactions("ethereum", [("0xa", "0x1"), ("0xb", "0x1"), ("0xc", "0x2")])
+    )
+
+    # 3 receipts + 2 distinct blocks, packed in batches of at most 2 calls
+    assert [len(post) for post in posts] == [2, 2, 1]
+    assert results["0xc"][0]["transactionHash"] == "0xc"
+    assert results["0xa"][1] == {"number": "0x1", "timestamp": "0x10"}
+
+
+def test_batch_rejection_falls_back_to_single_calls(tmp_path):
+    client = create_client(tmp_path, max_batch_size=2)
+
+    async def fake_post(rpc_url, blockchain_name, payload, timeout):
+        if isinstance(payload, list):
+            return 400, {"error": {"message": "batch requests are not supported"}}, None
+        return 200, answer(payload), None
+
+    client.post = fake_post
+
+    results = asyncio.run(client.process_transactions("ethereum", [("0xa", "0x1")]))
+
+    assert client.batch_sizes["http://rpc-1"] == 1
+    assert results["0xa"][0]["transactionHash"] == "0xa"
+
+
+def test_failed_batches_keep_the_batch_size_of_the_endpoint(tmp_path):
+    client = create_client(tmp_path, max_batch_size=2)
+    posts = []
+
+    async def fake_post(rpc_url, blockchain_name, payload, timeout):
+        posts.append(payload)
+        if isinstance(payload, list) and len(posts) == 1:
+            return 503, None, None
+        if isinstance(payload, list):
+            return 200, [answer(call) for call in payload], None
+        return 200, answer(payload), None
+
+    client.post = fake_post
+    calls = [("eth_getTransactionReceipt", ["0xa"]), ("eth_getTransactionReceipt", ["0xb"])]
+
+    responses = asyncio.run(client.make_batch_request("ethereum", calls))
+
+    assert [response["result"]["transactionHash"] for response in responses] == ["0xa", "0xb"]
+    assert [isinstance(post, dict) for post in posts] == [False, True, True]
+    assert client.batch_sizes["http://rpc-1"] == 2
+
+
+def test_responses_of_single_call_fallbacks_are_recorded_once(tmp_path):
+    client = create_client(tmp_path, max_batch_size=2)
+    recorded = []
+    client.recorder = SimpleNamespace(
+        record=lambda blockchain_name, method, params, response: recorded.append(params[0])
+    )
+
+    async def fake_post(rpc_url, blockchain_name, payload, timeout):
+        if isinstance(payload, list):
+            # the receipt of 0xb is missing from the batch reply
+            return 200, [answer(call) for call in payload if call["params"][0] != "0xb"], None
+        return 200, answer(payload), None
+
+    client.post = fake_post
+    calls = [("eth_getTransactionReceipt", ["0xa"]), ("eth_getTransactionReceipt", ["0xb"])]
+
+    asyncio.run(client.make_batch_request("ethereum", calls))
+
+    assert sorted(recorded) == ["0xa", "0xb"]
+
+
+def stack_depth() -> int:
+    frame, depth = sys._getframe(), 0
+    while frame is not None:
+        frame, depth = frame.f_back, depth + 1
+    return depth
+
+
+def test_rate_limited_batches_are_retried_without_recursion(tmp_path):
+    client = create_client(tmp_path, max_batch_size=2)
+    depths = []
+
+    async def fake_post(rpc_url, blockchain_name, payload, timeout):
+        depths.append(stack_depth())
+        if len(depths) <= 50:
+            return 429, None, 0.0
+        return 200, [answer(call) for call in payload], None
+
+    client.post = fake_post
+    calls = [("eth_getTransactionReceipt", ["0xa"]), ("eth_getTransactionReceipt", ["0xb"])]
+
+    responses = asyncio.run(client.make_batch_request("ethereum", calls))
+
+    assert [response["result"]["transactionHash"] for response in responses] == ["0xa", "0xb"]
+    assert len(set(depths)) == 1
+    # rate limiting is not a batch size limit
+    assert client.batch_sizes["http://rpc-1"] == 2
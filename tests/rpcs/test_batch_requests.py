@@ -0,0 +1,325 @@
+import threading
+
+import pytest
+import yaml
+
+from config.constants import Bridge
+from rpcs.evm_rpc_client import EvmRPCClient
+from rpcs.rpc_client import RPCClient
+from rpcs.singleflight import get_single_flight
+from utils.utils import CustomException
+
+
+class FakeResponse:
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        if self.status_code != 200:
+            raise Exception(f"status {self.status_code}")
+
+
+@pytest.fixture(autouse=True)
+def empty_block_timestamp_caches(monkeypatch):
+    monkeypatch.setattr("rpcs.block_timestamp_cache._caches", {})
+
+
+def create_client(tmp_path, max_batch_size=50):
+    config_file = tmp_path / "rpcs_config.yaml"
+    config_file.write_text(
+        yaml.dump(
+            {
+                "blockchains": [
+                    {
+                        "name": "ethereum",
+                        "rpcs": ["http://rpc-1"],
+                        "max_batch_size": max_batch_size,
+                    }
+                ]
+            }
+        )
+    )
+    return EvmRPCClient(Bridge.CCTP, str(config_file))
+
+
+def answer(payload):
+    method, params = payload["method"], payload["params"]
+    if method == "eth_getTransactionReceipt":
+        result = {"transactionHash": params[0], "blockNumber": "0x1"}
+    else:
+        result = {"number": params[0], "timestamp": "0x10"}
+    return {"id": payload["id"], "jsonrpc": "2.0", "result": result}
+
+
+def test_process_transactions_uses_batches(tmp_path, monkeypatch):
+    client = create_client(tmp_path, max_batch_size=3)
+    posts = []
+
+    def fake_post(url, json, headers, timeout):
+        posts.append(json)
+        if isinstance(json, list):
+            return FakeResponse([answer(call) for call in json])
+        return FakeResponse(answer(json))
+
+    monkeypatch.setattr("rpcs.http_session.post", fake_post)
+
+    results = client.process_transactions(
+        "ethereum", [("0xa", "0x1"), ("0xb", "0x1"), ("0xc", "0x2")]
+    )
+
+    # 3 receipts + 2 distinct blocks, packed in batches of at most 3 calls
+    assert [len(post) for post in posts] == [3, 2]
+    assert results["0xb"][0]["transactionHash"] == "0xb"
+    assert results["0xc"][1] == {"number": "0x2", "timestamp": "0x10"}
+    assert all(call["params"][1] is False for call in posts[1] if call["params"][0] == "0x2")
+
+
+def test_cached_block_timestamps_are_not_fetched(tmp_path, monkeypatch):
+    client = create_client(tmp_path)
+    posts = []
+
+    def fake_post(url, json, headers, timeout):
+        posts.append(json)
+        return FakeResponse([answer(call) for call in json])
+
+    monkeypatch.setattr("rpcs.http_session.post", fake_post)
+
+    client.process_transactions("ethereum", [("0xa", "0x1")])
+    client.process_transactions("ethereum", [("0xb", "0x1")])
+
+    assert [call["method"] for call in posts[1]] == ["eth_getTransactionReceipt"]
+
+
+def test_batch_rejection_falls_back_to_single_calls(tmp_path, monkeypatch):
+    client = create_client(tmp_path, max_batch_size=2)
+    posts = []
+
+    def fake_post(url, json, headers, timeout):
+        posts.append(json)
+        if isinstance(json, list):
+            return FakeResponse({"error": {"message": "batch requests are not supported"}})
+        return FakeResponse(answer(json))
+
+    monkeypatch.setattr("rpcs.http_session.post", fake_post)
+
+    results = client.process_transactions("ethereum", [("0xa", "0x1"), ("0xb", "0x2")])
+
+    assert client.batch_sizes["http://rpc-1"] == 1
+    assert sum(isinstance(post, dict) for post in posts) == 4
+    assert results["0xa"][0]["transactionHash"] == "0xa"
+
+
+def test_failed_batches_keep_the_batch_size_of_the_endpoint(tmp_path, monkeypatch):
+    client = create_client(tmp_path, max_batch_size=4)
+    posts = []
+
+    def fake_post(url, json, headers, timeout):
+        posts.append(json)
+        if isinstance(json, list) and len(posts) == 1:
+            return FakeResponse("<html>502 Bad Gateway</html>", 502)
+        if isinstance(json, list):
+            return FakeResponse([answer(call) for call in json])
+        return FakeResponse(answer(json))
+
+    monkeypatch.setattr("rpcs.http_session.post", fake_post)
+    calls = [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in ("0xa", "0xb")]
+
+    responses = client.make_batch_request("ethereum", calls)
+
+    assert [response["result"]["transactionHash"] for response in responses] == ["0xa", "0xb"]
+    # the calls of the failed batch were sent one by one, without shrinking later batches
+    assert [isinstance(post, dict) for post in posts] == [False, True, True]
+    assert client.batch_sizes["http://rpc-1"] == 4
+
+    client.make_batch_request("ethereum", calls)
+    assert len(posts[-1]) == 2
+
+
+class FakeRecorder:
+    def __init__(self):
+        self.calls = []
+
+    def record(self, blockchain_name, method, params, response):
+        self.calls.append((method, params[0]))
+
+
+def test_responses_of_single_call_fallbacks_are_recorded_once(tmp_path, monkeypatch):
+    client = create_client(tmp_path)
+    client.recorder = FakeRecorder()
+
+    def fake_post(url, json, headers, timeout):
+        if isinstance(json, list):
+            # the receipt of 0xb is missing from the batch reply
+            return FakeResponse([answer(call) for call in json if call["params"][0] != "0xb"])
+        return FakeResponse(answer(json))
+
+    monkeypatch.setattr("rpcs.http_session.post", fake_post)
+    calls = [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in ("0xa", "0xb")]
+
+    client.make_batch_request("ethereum", calls)
+
+    assert sorted(client.recorder.calls) == [
+        ("eth_getTransactionReceipt", "0xa"),
+        ("eth_getTransactionReceipt", "0xb"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "status_code, body",
+    [
+        (413, "Payload Too Large"),
+        (200, {"error": {"code": -32600, "message": "Batch size too large"}}),
+        (400, {"error": {"message": "batch limit of 2 exceeded"}}),
+    ],
+)
+def test_batch_size_errors(status_code, body):
+    assert RPCClient.is_batch_size_error(status_code, body)
+
+
+@pytest.mark.parametrize(
+    "status_code, body",
+    [
+        (502, "<html>502 Bad Gateway</html>"),
+        (503, None),
+        (200, {"error": {"code": -32603, "message": "internal error"}}),
+    ],
+)
+def test_other_batch_failures(status_code, body):
+    assert not RPCClient.is_batch_size_error(status_code, body)
+
+
+def test_block_receipts_for_dense_blocks(tmp_path, monkeypatch):
+    client = create_client(tmp_path)
+    client.block_receipts_rpcs["ethereum"] = ["http://rpc-1"]
+    tx_hashes = [f"0x{i}" for i in range(6)]
+    posts = []
+
+    def fake_post(url, json, headers, timeout):
+        posts.append(json)
+        if isinstance(json, list):
+            return FakeResponse([answer(call) for call in json])
+        receipts = [{"transactionHash": tx_hash, "blockNumber": "0x1"} for tx_hash in tx_hashes]
+        return FakeResponse({"id": 1, "jsonrpc": "2.0", "result": receipts})
+
+    monkeypatch.setattr("rpcs.http_session.post", fake_post)
+
+    transactions = [(tx_hash, "0x1") for tx_hash in tx_hashes] + [("0xff", "0x2")]
+    results = client.process_transactions("ethereum", transactions)
+
+    assert posts[0]["method"] == "eth_getBlockReceipts"
+    assert [call["params"][0] for call in posts[1]] == ["0xff", "0x1", "0x2"]
+    assert results["0x3"][0]["transactionHash"] == "0x3"
+    assert client.metrics.get("transaction_receipt_calls_saved") == 5
+
+
+def test_only_the_block_receipts_found_are_counted_as_saved_calls(tmp_path, monkeypatch):
+    client = create_client(tmp_path)
+    client.block_receipts_rpcs["ethereum"] = ["http://rpc-1"]
+    tx_hashes = [f"0x{i}" for i in range(6)]
+    posts = []
+
+    def fake_post(url, json, headers, timeout):
+        posts.append(json)
+        if isinstance(json, list):
+            return FakeResponse([answer(call) for call in json])
+        # the endpoint misses the receipts of two of the transactions
+        receipts = [{"transactionHash": tx_hash, "blockNumber": "0x1"} for tx_hash in tx_hashes[2:]]
+        return FakeResponse({"id": 1, "jsonrpc": "2.0", "result": receipts})
+
+    monkeypatch.setattr("rpcs.http_session.post", fake_post)
+
+    results = client.process_transactions("ethereum", [(tx_hash, "0x1") for tx_hash in tx_hashes])
+
+    assert [call["params"][0] for call in posts[1]] == ["0x0", "0x1", "0x1"]
+    assert results["0x0"][0]["transactionHash"] == "0x0"
+    assert client.metrics.get("transaction_receipt_calls_saved") == 3
+
+
+def test_transactions_fetched_by_concurrent_calls_are_not_requested(tmp_path, monkeypatch):
+    client = create_client(tmp_path)
+    posts = []
+
+    def fake_post(url, json, headers, timeout):
+        posts.append(json)
+        return FakeResponse([answer(call) for call in json])
+
+    monkeypatch.setattr("rpcs.http_session.post", fake_post)
+
+    # another call is fetching transaction 0xa
+    single_flight = get_single_flight()
+    owned, _ = single_flight.claim([("transaction", "ethereum", "0xa")])
+    results = {}
+    thread = threading.Thread(
+        target=lambda: results.update(
+            client.process_transactions(
+                "ethereum", [("0xa", "0x1"), ("0xb", "0x1"), ("0xb", "0x1")]
+            )
+        )
+    )
+    thread.start()
+
+    thread.join(timeout=0.2)
+    assert thread.is_alive()
+    shared_result = ({"transactionHash": "0xa"}, {"number": "0x1", "timestamp": "0x10"})
+    single_flight.land(owned, results={owned[0]: shared_result})
+    thread.join()
+
+    assert [(call["method"], call["params"][0]) for call in posts[0]] == [
+        ("eth_getTransactionReceipt", "0xb"),
+        ("eth_getBlockByNumber", "0x1"),
+    ]
+    # what the concurrent call fetched is returned too, to check that it was stored
+    assert list(results) == ["0xb", "0xa"]
+    assert results["0xa"] == shared_result
+    assert len(single_flight) == 0
+
+
+def test_failed_concurrent_fetches_are_raised_to_their_waiters(tmp_path, monkeypatch):
+    client = create_client(tmp_path)
+    monkeypatch.setattr(
+        "rpcs.http_session.post",
+        lambda url, json, headers, timeout: FakeResponse([answer(call) for call in json]),
+    )
+
+    single_flight = get_single_flight()
+    owned, _ = single_flight.claim([("transaction", "ethereum", "0xa")])
+    failure = threading.Timer(0.05, single_flight.land, (owned, Exception("timeout")))
+    failure.start()
+
+    with pytest.raises(CustomException, match="timeout"):
+        client.process_transactions("ethereum", [("0xa", "0x1"), ("0xb", "0x1")])
+
+
+def test_timestamps_of_concurrent_fetches_are_handed_to_their_waiters(tmp_path, monkeypatch):
+    client = create_client(tmp_path)
+    posts = []
+
+    def fake_post(url, json, headers, timeout):
+        posts.append(json)
+        return FakeResponse([answer(call) for call in json])
+
+    monkeypatch.setattr("rpcs.http_session.post", fake_post)
+
+    # another call is fetching block 0x1
+    single_flight = get_single_flight()
+    owned, _ = single_flight.claim([("block", "ethereum", "0x1")])
+    results = {}
+    thread = threading.Thread(
+        target=lambda: results.update(client.process_transactions("ethereum", [("0xb", "0x1")]))
+    )
+    thread.start()
+
+    thread.join(timeout=0.2)
+    assert thread.is_alive()
+    # the timestamp is not read from the cache, where it may have been evicted already
+    single_flight.land(owned, results={owned[0]: 0x20})
+    thread.join()
+
+    assert [(call["method"], call["params"][0]) for call in posts[0]] == [
+        ("eth_getTransactionReceipt", "0xb"),
+    ]
+    assert results["0xb"][1] == {"number": "0x1", "timestamp": "0x20"}
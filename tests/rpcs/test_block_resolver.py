@@ -0,0 +1,101 @@
+import bisect
+import random
+
+from config.constants import Bridge
+from rpcs.block_resolver import BlockResolver, BlockTimeIndex
+from utils.utils import get_block_by_timestamp
+
+
+class FakeRPCClient:
+    def __init__(self, timestamps: list):
+        self.timestamps = timestamps
+        self.probes = 0
+
+    def get_latest_block_header(self, blockchain):
+        head = len(self.timestamps) - 1
+        return {"number": hex(head), "timestamp": hex(self.timestamps[head])}
+
+    def get_block_header(self, blockchain, block_number):
+        self.probes += 1
+        return {"number": block_number, "timestamp": hex(self.timestamps[int(block_number, 16)])}
+
+
+def build_timestamps(num_blocks: int, seed: int = 7) -> list:
+    # irregular block times, including blocks sharing their timestamp
+    rng = random.Random(seed)
+    timestamps = [1_600_000_000]
+    for _ in range(num_blocks - 1):
+        timestamps.append(timestamps[-1] + rng.choice([0, 1, 2, 12, 12, 12, 30]))
+    return timestamps
+
+
+def expected_block(timestamps: list, timestamp: int) -> int:
+    return max(0, bisect.bisect_right(timestamps, timestamp) - 1)
+
+
+def test_resolves_the_last_block_at_or_before_the_timestamp():
+    timestamps = build_timestamps(100_000)
+    rpc_client = FakeRPCClient(timestamps)
+    resolver = BlockResolver(rpc_client, BlockTimeIndex("ethereum"))
+    rng = random.Random(1)
+
+    for timestamp in [timestamps[0] - 1, timestamps[0], timestamps[500], timestamps[-1] + 60] + [
+        rng.randint(timestamps[0], timestamps[-1]) for _ in range(200)
+    ]:
+        assert resolver.get_block_by_timestamp("ethereum", timestamp) == expected_block(
+            timestamps, timestamp
+        )
+
+
+def test_later_lookups_are_narrowed_by_the_index():
+    timestamps = build_timestamps(1_000_000)
+    rpc_client = FakeRPCClient(timestamps)
+    index = BlockTimeIndex("ethereum")
+    resolver = BlockResolver(rpc_client, index)
+
+    resolver.get_block_by_timestamp("ethereum", timestamps[400_000] + 5)
+    first_probes = rpc_client.probes
+
+    rpc_client.probes = 0
+    block = resolver.get_block_by_timestamp("ethereum", timestamps[400_100])
+
+    assert block == expected_block(timestamps, timestamps[400_100])
+    assert rpc_client.probes < first_probes
+    assert rpc_client.probes <= 4
+
+
+def test_only_final_blocks_are_indexed_and_persisted(tmp_path):
+    timestamps = build_timestamps(1_000)
+    resolver = BlockResolver(FakeRPCClient(timestamps), BlockTimeIndex("ethereum", str(tmp_path)))
+
+    resolver.get_block_by_timestamp("ethereum", timestamps[-30])
+
+    reloaded = BlockTimeIndex("ethereum", str(tmp_path))
+    assert len(reloaded) > 0
+    # blocks within RPC_CACHE_FINALITY_BLOCKS of the head may still be replaced
+    assert all(block <= len(timestamps) - 1 - 64 for block in reloaded.blocks)
+    assert all(timestamps[block] == ts for block, ts in zip(reloaded.blocks, reloaded.timestamps))
+
+
+def test_timestamps_of_a_bridge_are_resolved_with_a_single_client(monkeypatch):
+    timestamps = build_timestamps(1_000)
+    clients = []
+
+    def create_client(bridge):
+        clients.append(FakeRPCClient(timestamps))
+        return clients[-1]
+
+    monkeypatch.setattr("rpcs.block_resolver.EvmRPCClient", create_client)
+    monkeypatch.setattr("rpcs.block_resolver._resolvers", {})
+    monkeypatch.setattr("rpcs.block_resolver._indexes", {})
+
+    start_block = get_block_by_timestamp(timestamps[100], "ethereum", Bridge.CCTP)
+    end_block = get_block_by_timestamp(timestamps[900], "ethereum", Bridge.CCTP)
+
+    assert (start_block, end_block) == (
+        expected_block(timestamps, timestamps[100]),
+        expected_block(timestamps, timestamps[900]),
+    )
+    assert len(clients) == 1
+    get_block_by_timestamp(timestamps[500], "ethereum", Bridge.ACROSS)
+    assert len(clients) == 2
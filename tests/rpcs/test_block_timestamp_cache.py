@@ -0,0 +1,39 @@
+from rpcs.block_timestamp_cache import BlockTimestampCache
+
+
+def test_lru_eviction():
+    cache = BlockTimestampCache("ethereum", max_size=2)
+
+    cache.put("0x1", "0x10")
+    cache.put(2, 32)
+    cache.get(1)  # block 1 becomes the most recently used
+    cache.put(3, 48)
+
+    assert cache.get(1) == 16
+    assert cache.get(2) is None
+    assert cache.get("0x3") == 48
+
+
+def test_persistence(tmp_path):
+    cache = BlockTimestampCache("polygon", cache_dir=str(tmp_path))
+    cache.put(100, 1700000000)
+    cache.put(100, 1700000000)
+
+    assert (tmp_path / "polygon.csv").read_text() == "100,1700000000\n"
+
+    reloaded = BlockTimestampCache("polygon", cache_dir=str(tmp_path))
+    assert reloaded.get("0x64") == 1700000000
+
+
+def test_only_final_blocks_are_persisted(tmp_path):
+    cache = BlockTimestampCache("polygon", cache_dir=str(tmp_path))
+    cache.put(100, 1700000000, final=False)
+
+    assert cache.get(100) == 1700000000
+    assert not (tmp_path / "polygon.csv").exists()
+
+    # persisted once the block is final
+    cache.put(100, 1700000002)
+    cache.put(100, 1700000002)
+
+    assert (tmp_path / "polygon.csv").read_text() == "100,1700000002\n"
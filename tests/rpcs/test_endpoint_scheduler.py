@@ -0,0 +1,35 @@
+from config.constants import ENDPOINT_FAILURE_THRESHOLD
+from rpcs.endpoint_scheduler import EndpointScheduler
+
+
+def create_scheduler():
+    return EndpointScheduler({"ethereum": ["http://fast", "http://slow"]})
+
+
+def test_faster_endpoint_is_preferred():
+    scheduler = create_scheduler()
+    scheduler.record_success("ethereum", "http://fast", 0.05)
+    scheduler.record_success("ethereum", "http://slow", 0.5)
+
+    assert {scheduler.select("ethereum") for _ in range(20)} == {"http://fast"}
+
+
+def test_failing_endpoint_is_ejected():
+    scheduler = create_scheduler()
+    scheduler.record_success("ethereum", "http://slow", 0.5)
+
+    for _ in range(ENDPOINT_FAILURE_THRESHOLD):
+        scheduler.record_failure("ethereum", "http://fast")
+
+    assert {scheduler.select("ethereum") for _ in range(20)} == {"http://slow"}
+    assert scheduler.get_stats("ethereum")["http://fast"]["ejected"]
+    assert scheduler.get_stats("ethereum")["http://fast"]["failures"] == ENDPOINT_FAILURE_THRESHOLD
+
+
+def test_rate_limited_endpoint_is_ejected_right_away():
+    scheduler = create_scheduler()
+    scheduler.record_failure("ethereum", "http://fast", rate_limited=True)
+
+    assert scheduler.select("ethereum") == "http://slow"
+    # excluded endpoints are only returned when there are no others
+    assert scheduler.select("ethereum", exclude={"http://slow"}) == "http://fast"
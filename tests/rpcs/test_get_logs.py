@@ -0,0 +1,114 @@
+import pytest
+import yaml
+
+from config.constants import Bridge
+from rpcs.evm_rpc_client import EvmRPCClient
+
+
+class FakeResponse:
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+        self.text = str(body)
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        if self.status_code != 200:
+            raise Exception(f"status {self.status_code}")
+
+
+@pytest.fixture(autouse=True)
+def empty_block_timestamp_caches(monkeypatch):
+    monkeypatch.setattr("rpcs.block_timestamp_cache._caches", {})
+
+
+def create_client(tmp_path, rpcs=("http://rpc",)):
+    config_file = tmp_path / "rpcs_config.yaml"
+    config_file.write_text(yaml.dump({"blockchains": [{"name": "polygon", "rpcs": list(rpcs)}]}))
+    return EvmRPCClient(Bridge.POLYGON, str(config_file))
+
+
+def test_oversized_ranges_are_split_and_limit_is_learned(tmp_path, monkeypatch):
+    client = create_client(tmp_path)
+    ranges = []
+
+    def fake_post(url, json, headers, timeout):
+        start, end = (int(json["params"][0][key], 16) for key in ("fromBlock", "toBlock"))
+        ranges.append((start, end))
+        if end - start + 1 > 25:
+            error = {"code": -32005, "message": "query returned more than 10000 results"}
+            return FakeResponse({"id": 1, "jsonrpc": "2.0", "error": error}, 400)
+        logs = [{"blockNumber": hex(block)} for block in range(start, end + 1)]
+        return FakeResponse({"id": 1, "jsonrpc": "2.0", "result": logs})
+
+    monkeypatch.setattr("rpcs.http_session.post", fake_post)
+
+    logs = client.get_logs_emitted_by_contract("polygon", "0xc0ffee", [], 0, 99)
+
+    assert [int(log["blockNumber"], 16) for log in logs] == list(range(100))
+    assert client.log_range_limits.get("http://rpc", "polygon", "0xc0ffee") == 25
+
+    # later ranges of the same contract are split up front
+    ranges.clear()
+    client.get_logs_emitted_by_contract("polygon", "0xc0ffee", [], 100, 149)
+    assert ranges == [(100, 124), (125, 149)]
+
+
+def test_grouped_contracts_are_queried_as_an_address_array(tmp_path, monkeypatch):
+    client = create_client(tmp_path)
+    addresses = []
+
+    def fake_post(url, json, headers, timeout):
+        addresses.append(json["params"][0]["address"])
+        return FakeResponse({"id": 1, "jsonrpc": "2.0", "result": []})
+
+    monkeypatch.setattr("rpcs.http_session.post", fake_post)
+
+    client.get_logs_emitted_by_contract("polygon", ("0xc0ffee", "0xbeef"), ["0xtopic"], 0, 9)
+
+    assert addresses == [["0xc0ffee", "0xbeef"]]
+
+
+def test_ranges_refused_by_an_endpoint_are_sent_to_the_others(tmp_path, monkeypatch):
+    client = create_client(tmp_path, ["http://a", "http://b"])
+    ranges = []
+
+    def fake_post(url, json, headers, timeout):
+        start, end = (int(json["params"][0][key], 16) for key in ("fromBlock", "toBlock"))
+        ranges.append((url, start, end))
+        # the first endpoint asked only accepts small ranges
+        if url == ranges[0][0] and end - start + 1 > 25:
+            error = {"code": -32005, "message": "block range is too wide"}
+            return FakeResponse({"id": 1, "jsonrpc": "2.0", "error": error}, 400)
+        logs = [{"blockNumber": hex(block)} for block in range(start, end + 1)]
+        return FakeResponse({"id": 1, "jsonrpc": "2.0", "result": logs})
+
+    monkeypatch.setattr("rpcs.http_session.post", fake_post)
+
+    logs = client.get_logs_emitted_by_contract("polygon", "0xc0ffee", [], 0, 99)
+
+    assert [int(log["blockNumber"], 16) for log in logs] == list(range(100))
+    # the range is not split while an endpoint accepts it
+    small, large = ranges[0][0], ({"http://a", "http://b"} - {ranges[0][0]}).pop()
+    assert ranges == [(small, 0, 99), (large, 0, 99)]
+    assert client.log_range_limits.get(small, "polygon", "0xc0ffee") == 50
+    assert client.log_range_limits.get(large, "polygon", "0xc0ffee") is None
+
+
+@pytest.mark.parametrize(
+    "message, is_limit_error",
+    [
+        ("query returned more than 10000 results", True),
+        ("exceed maximum block range: 50000", True),
+        ("Log response size exceeded.", True),
+        ("eth_getLogs is limited to a 10,000 range", True),
+        ("block range extends beyond current head block", False),
+        ("invalid block range params", False),
+    ],
+)
+def test_only_provider_limits_are_limit_errors(message, is_limit_error):
+    body = {"id": 1, "jsonrpc": "2.0", "error": {"code": -32000, "message": message}}
+
+    assert EvmRPCClient.is_provider_limit_error(body) == is_limit_error
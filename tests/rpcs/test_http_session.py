@@ -0,0 +1,22 @@
+import pytest
+
+from rpcs import http_session
+
+
+@pytest.fixture(autouse=True)
+def empty_sessions(monkeypatch):
+    monkeypatch.setattr("rpcs.http_session._sessions", {})
+
+
+def test_sessions_are_shared_per_endpoint():
+    session = http_session.get_session("https://rpc.example.org/v1/key")
+
+    assert http_session.get_session("https://rpc.example.org/other") is session
+    assert http_session.get_session("https://other.example.org/v1/key") is not session
+
+
+def test_connection_pool_size():
+    session = http_session.build_session(pool_size=7)
+
+    assert session.get_adapter("https://rpc.example.org")._pool_maxsize == 7
+    assert "gzip" in session.headers["Accept-Encoding"]
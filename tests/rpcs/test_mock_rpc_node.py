@@ -0,0 +1,154 @@
+import threading
+
+import pytest
+
+from config.constants import Bridge
+from rpcs.evm_rpc_client import EvmRPCClient
+from rpcs.mock_rpc_node import MockRPCNode, write_rpc_config
+from rpcs.rpc_recorder import load_recorded_calls
+
+
+class FakeResponse:
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        pass
+
+
+def build_log(block: int, log_index: int = 0) -> dict:
+    return {
+        "blockNumber": hex(block),
+        "logIndex": hex(log_index),
+        "transactionHash": f"0x{block:064x}",
+        "topics": ["0xtopic"],
+    }
+
+
+def get_logs_params(start_block: int, end_block: int) -> list:
+    return [
+        {
+            "fromBlock": hex(start_block),
+            "toBlock": hex(end_block),
+            "topics": [["0xtopic"]],
+            "address": "0xContract",
+        }
+    ]
+
+
+@pytest.fixture(autouse=True)
+def empty_caches(monkeypatch):
+    monkeypatch.setattr("rpcs.block_timestamp_cache._caches", {})
+    monkeypatch.setattr("rpcs.rpc_recorder._recorder", None)
+    monkeypatch.delenv("RPC_CACHE_DIR", raising=False)
+    monkeypatch.delenv("RPC_RECORD_DIR", raising=False)
+
+
+def test_calls_are_recorded(tmp_path, monkeypatch):
+    monkeypatch.setenv("RPC_RECORD_DIR", str(tmp_path / "fixtures"))
+
+    config_file = tmp_path / "rpcs_config.yaml"
+    write_rpc_config(["ethereum"], "http://rpc", 1, str(config_file))
+    client = EvmRPCClient(Bridge.CCTP, str(config_file))
+
+    def fake_post(url, json, headers, timeout):
+        return FakeResponse({"id": 1, "result": {"transactionHash": json["params"][0]}})
+
+    monkeypatch.setattr("rpcs.http_session.post", fake_post)
+
+    client.make_request("http://rpc/ethereum/0", "ethereum", "eth_getTransactionReceipt", ["0x1"])
+
+    assert load_recorded_calls(str(tmp_path / "fixtures")) == {
+        "ethereum": [
+            {
+                "method": "eth_getTransactionReceipt",
+                "params": ["0x1"],
+                "result": {"transactionHash": "0x1"},
+            }
+        ]
+    }
+
+
+def test_logs_are_replayed_from_recorded_ranges():
+    node = MockRPCNode(
+        {
+            "ethereum": [
+                {
+                    "method": "eth_getLogs",
+                    "params": get_logs_params(0, 9),
+                    "result": [build_log(5)],
+                },
+                {
+                    "method": "eth_getLogs",
+                    "params": get_logs_params(10, 19),
+                    "result": [build_log(10), build_log(19)],
+                },
+            ]
+        }
+    )
+
+    assert node.replay("ethereum", "eth_getLogs", get_logs_params(0, 19)) == [
+        build_log(5),
+        build_log(10),
+        build_log(19),
+    ]
+    assert node.replay("ethereum", "eth_getLogs", get_logs_params(6, 12)) == [build_log(10)]
+    # the recorded ranges do not cover block 20
+    assert node.replay("ethereum", "eth_getLogs", get_logs_params(0, 20)) is None
+
+
+def test_rate_limits_and_errors_are_simulated():
+    node = MockRPCNode({}, requests_per_second=1, burst=1)
+    payload = {"id": 1, "jsonrpc": "2.0", "method": "eth_blockNumber", "params": []}
+
+    status, body, _ = node.handle("/ethereum/0", payload)
+    assert status == 200
+    assert body["error"]["message"] == "call eth_blockNumber not recorded"
+
+    status, _, headers = node.handle("/ethereum/0", payload)
+    assert status == 429
+    assert float(headers["Retry-After"]) > 0
+
+    # endpoints are rate limited independently
+    assert node.handle("/ethereum/1", payload)[0] == 200
+
+    assert MockRPCNode({}, error_rate=1).handle("/ethereum/0", payload)[0] == 503
+
+
+def test_extraction_calls_are_replayed_over_http(tmp_path):
+    node = MockRPCNode(
+        {
+            "ethereum": [
+                {
+                    "method": "eth_getLogs",
+                    "params": get_logs_params(0, 9),
+                    "result": [build_log(5)],
+                },
+                {"method": "eth_getLogs", "params": get_logs_params(10, 19), "result": []},
+                {
+                    "method": "eth_getTransactionReceipt",
+                    "params": ["0xabc"],
+                    "result": {"transactionHash": "0xabc", "status": "0x1"},
+                },
+            ]
+        }
+    )
+    server = node.build_server("127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        config_file = tmp_path / "rpcs_config.yaml"
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        write_rpc_config(["ethereum"], base_url, 2, str(config_file))
+        client = EvmRPCClient(Bridge.CCTP, str(config_file))
+
+        # the range was recorded in two requests
+        assert client.fetch_logs("ethereum", "0xContract", ["0xtopic"], 0, 19) == [build_log(5)]
+        assert client.get_transaction_receipt("ethereum", "0xABC")["status"] == "0x1"
+    finally:
+        server.shutdown()
+        server.server_close()
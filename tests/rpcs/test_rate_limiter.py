@@ -0,0 +1,48 @@
+import pytest
+
+from rpcs import rate_limiter
+from rpcs.rate_limiter import TokenBucket
+
+
+@pytest.fixture(autouse=True)
+def empty_buckets(monkeypatch):
+    monkeypatch.setattr("rpcs.rate_limiter._buckets", {})
+
+
+def test_requests_beyond_the_burst_are_delayed():
+    bucket = TokenBucket(rate=10, burst=2)
+
+    delays = [bucket.reserve() for _ in range(4)]
+
+    assert delays[:2] == [0.0, 0.0]
+    assert delays[2] == pytest.approx(0.1, abs=0.01)
+    assert delays[3] == pytest.approx(0.2, abs=0.01)
+
+
+def test_paused_bucket_delays_requests():
+    rate_limiter.pause("http://rpc", 2)
+
+    assert rate_limiter.get_bucket("http://rpc").reserve() == pytest.approx(2, abs=0.05)
+    assert rate_limiter.get_bucket("http://other-rpc").reserve() == 0.0
+
+
+def test_retry_delay():
+    assert rate_limiter.get_retry_delay("3") == 3
+    assert rate_limiter.get_retry_delay(None, "rate limited, try again in 500ms") == 0.5
+    assert rate_limiter.get_retry_delay(None, "Too Many Requests. Retry after 2 s") == 2
+    assert rate_limiter.get_retry_delay(None, "") == rate_limiter.RATE_LIMIT_DEFAULT_PAUSE
+
+
+def test_configuring_a_bucket_again_keeps_its_tokens():
+    rate_limiter.configure("http://rpc", 1, 2)
+    bucket = rate_limiter.get_bucket("http://rpc")
+    bucket.reserve()
+    bucket.reserve()
+
+    # e.g. another client of the same endpoint is created
+    rate_limiter.configure("http://rpc", 1, 2)
+    assert bucket.reserve() == pytest.approx(1, abs=0.05)
+
+    # new settings are applied without refilling the bucket
+    rate_limiter.configure("http://rpc", 2, 4)
+    assert bucket.reserve() == pytest.approx(1, abs=0.05)
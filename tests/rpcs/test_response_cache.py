@@ -0,0 +1,110 @@
+import asyncio
+import threading
+
+import pytest
+import yaml
+
+from config.constants import Bridge
+from rpcs.async_evm_rpc_client import AsyncEvmRPCClient
+from rpcs.evm_rpc_client import EvmRPCClient
+from rpcs.response_cache import ResponseCache
+
+
+class FakeResponse:
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def response_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("RPC_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr("rpcs.response_cache._cache", None)
+
+
+def create_client(tmp_path, client_class=EvmRPCClient):
+    config_file = tmp_path / "rpcs_config.yaml"
+    config_file.write_text(
+        yaml.dump({"blockchains": [{"name": "ethereum", "rpcs": ["http://rpc"]}]})
+    )
+    return client_class(Bridge.CCTP, str(config_file))
+
+
+def test_keys_are_canonical(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("ethereum", "eth_getTransactionReceipt", ["0xABC"], {"result": {"status": "0x1"}})
+
+    assert cache.get("ethereum", "eth_getTransactionReceipt", ["0xabc"]) == {
+        "result": {"status": "0x1"}
+    }
+    assert cache.get("polygon", "eth_getTransactionReceipt", ["0xabc"]) is None
+
+
+def test_only_final_responses_are_cached(tmp_path, monkeypatch):
+    client = create_client(tmp_path)
+    posts = []
+
+    def fake_post(url, json, headers, timeout):
+        posts.append(json["method"])
+        if json["method"] == "eth_blockNumber":
+            return FakeResponse({"id": 1, "result": hex(1_000)})
+        result = {"transactionHash": json["params"][0], "blockNumber": json["params"][0]}
+        return FakeResponse({"id": 1, "result": result})
+
+    monkeypatch.setattr("rpcs.http_session.post", fake_post)
+
+    # block 0x10 is final, block 0x3e0 (992) is too recent
+    for _ in range(2):
+        client.make_request("http://rpc", "ethereum", "eth_getTransactionReceipt", ["0x10"])
+        client.make_request("http://rpc", "ethereum", "eth_getTransactionReceipt", ["0x3e0"])
+
+    assert posts.count("eth_getTransactionReceipt") == 3
+    assert posts.count("eth_blockNumber") == 1
+
+
+def answer_receipt(payload):
+    result = {"transactionHash": payload["params"][0], "blockNumber": payload["params"][0]}
+    return {"id": payload["id"], "jsonrpc": "2.0", "result": result}
+
+
+def test_async_clients_use_the_cache_outside_of_the_event_loop(tmp_path, monkeypatch):
+    client = create_client(tmp_path, AsyncEvmRPCClient)
+    cache_threads = []
+    posts = []
+
+    for name in ("get", "put"):
+        method = getattr(client.response_cache, name)
+
+        def record_thread(*args, method=method):
+            cache_threads.append(threading.current_thread())
+            return method(*args)
+
+        monkeypatch.setattr(client.response_cache, name, record_thread)
+
+    async def fake_post(rpc_url, blockchain_name, payload, timeout):
+        posts.append(payload)
+        if isinstance(payload, list):
+            return 200, [answer_receipt(call) for call in payload], None
+        if payload["method"] == "eth_blockNumber":
+            return 200, {"id": 1, "result": hex(1_000)}, None
+        return 200, answer_receipt(payload), None
+
+    client.post = fake_post
+    calls = [("eth_getTransactionReceipt", ["0x10"]), ("eth_getTransactionReceipt", ["0x11"])]
+
+    async def fetch_twice():
+        await client.make_batch_request("ethereum", calls)
+        return await client.make_batch_request("ethereum", calls)
+
+    responses = asyncio.run(fetch_twice())
+
+    assert [response["result"]["transactionHash"] for response in responses] == ["0x10", "0x11"]
+    assert len([post for post in posts if isinstance(post, list)]) == 1
+    assert cache_threads
+    assert threading.main_thread() not in cache_threads
@@ -0,0 +1,25 @@
+import threading
+from collections import defaultdict
+
+
+class Metrics:
+    """Thread-safe named counters, used to report the work done by long-running components."""
+
+    def __init__(self):
+        self.counters = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def increment(self, name: str, value: int = 1):
+        with self.lock:
+            self.counters[name] += value
+
+    def get(self, name: str) -> int:
+        with self.lock:
+            return self.counters.get(name, 0)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return dict(self.counters)
+
+    def summary(self) -> str:
+        return ", ".join(f"{name}: {value}" for name, value in sorted(self.snapshot().items()))
@@ -7,7 +7,6 @@ from datetime import datetime
 from enum import Enum
 
 import base58
-import requests
 from hexbytes import HexBytes
 
 from config.constants import BLOCKCHAIN_IDS, TOKEN_PRICING_SUPPORTED_BLOCKCHAINS, Bridge
@@ -41,17 +40,37 @@ def load_solana_api_key() -> str:
     return key
 
 
-def get_block_by_timestamp(timestamp: int, blockchain: str) -> int:
-    chain_id = get_blockchain_evm_id(blockchain)
+def load_block_timestamp_cache_dir() -> str | None:
+    """Directory where block timestamps are persisted. Persistence is disabled when not set."""
+    return os.getenv("BLOCK_TIMESTAMP_CACHE_DIR")
 
-    url = f"https://api.findblock.xyz/v1/chain/{chain_id}/block/before/{timestamp}"
-    response = requests.get(url)
 
-    if response.status_code == 200:
-        data = response.json()
-        return data["number"]
-    else:
-        raise Exception(f"Error fetching {blockchain} block with timestamp {timestamp}.")
+def load_block_index_dir() -> str | None:
+    """Directory where the block-time index is persisted. Disabled when not set."""
+    return os.getenv("BLOCK_INDEX_DIR")
+
+
+def load_abi_bundle_dir() -> str | None:
+    """Directory of the precompiled ABI bundles of the bridges. Disabled when not set."""
+    return os.getenv("ABI_BUNDLE_DIR")
+
+
+def load_rpc_cache_dir() -> str | None:
+    """Directory where the responses of final blocks are cached. Disabled when not set."""
+    return os.getenv("RPC_CACHE_DIR")
+
+
+def load_rpc_record_dir() -> str | None:
+    """Directory where the RPC calls of a run are recorded as fixtures. Disabled when not set."""
+    return os.getenv("RPC_RECORD_DIR")
+
+
+def get_block_by_timestamp(timestamp: int, blockchain: str, bridge: Bridge) -> int:
+    """Returns the last block of an EVM blockchain with a timestamp at or before `timestamp`."""
+    # imported here, as the RPC clients depend on this module
+    from rpcs.block_resolver import get_block_resolver
+
+    return get_block_resolver(bridge).get_block_by_timestamp(blockchain, int(timestamp))
 
 
 def get_blockchain_evm_id(blockchain: str) -> str:
@@ -214,11 +233,15 @@ def load_bridge_config(bridge_name: str) -> dict:
     return module.BRIDGE_CONFIG
 
 
+def get_abi_path(root_dir: str, bridge: Bridge, blockchain, contract_addr: str) -> str:
+    return os.path.join(root_dir, bridge.value, "ABIs", blockchain, f"{contract_addr.lower()}.json")
+
+
 def load_abi(root_dir: str, bridge: Bridge, blockchain, contract_addr: str):
-    abi_path = os.path.join(
-        root_dir, bridge.value, "ABIs", blockchain, f"{contract_addr.lower()}.json"
-    )
+    return load_abi_file(get_abi_path(root_dir, bridge, blockchain, contract_addr))
 
+
+def load_abi_file(abi_path: str):
     # Use utf-8-sig to gracefully handle files saved with a UTF-8 BOM on Windows
     try:
         with open(abi_path, "r", encoding="utf-8-sig") as abi_file:
@@ -226,10 +249,18 @@ def load_abi(root_dir: str, bridge: Bridge, blockchain, contract_addr: str):
             return abi
     except json.JSONDecodeError as e:
         raise CustomException(
-            "utils", "load_abi", f"Failed to parse ABI JSON at {abi_path}: {e}"
+            "utils", "load_abi_file", f"Failed to parse ABI JSON at {abi_path}: {e}"
         ) from e
 
 
 class CustomException(Exception):
     def __init__(self, classname: str, func_name: str, message: str):
         super().__init__(f"(Class: {classname}) {func_name}: {message}")
+
+
+class ProviderLimitException(CustomException):
+    """Raised when an RPC endpoint refuses a request because it exceeds the provider limits."""
+
+    def __init__(self, classname: str, func_name: str, message: str, rpc_url: str):
+        super().__init__(classname, func_name, message)
+        self.rpc_url = rpc_url